@@ -1,14 +1,28 @@
+import asyncio
+
 from fastapi import FastAPI
-from redis.asyncio import Redis
-from fastapi_limiter import FastAPILimiter
 from fastapi.middleware.cors import CORSMiddleware
 
+from prometheus_client import REGISTRY
+
 from src.conf.config import settings
+from src.conf.constant import METRICS_PATH
+from src.conf.redis_conf import close_redis, redis_client, redis_pool_stats
+from src.database.db import db_pool_stats, engine, replicas
 from src.routes import auth, comments, admin, users, tags
 from src.routes import photos
+from src.services.jobs import run_worker
+from src.services.read_your_writes import route_reads
+from src.services.metrics import (
+    MetricsMiddleware,
+    PoolCollector,
+    instrument_engine,
+    instrument_redis,
+    metrics,
+    monitor_event_loop_lag,
+)
 import uvicorn
 
-
 origins = ["http://localhost:3000"]
 
 app = FastAPI()
@@ -20,6 +34,16 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.middleware("http")(route_reads)
+app.add_middleware(MetricsMiddleware)
+
+instrument_engine(engine, "primary")
+for replica in replicas.engines if replicas else []:
+    instrument_engine(replica, "replica")
+instrument_redis(redis_client)
+REGISTRY.register(PoolCollector(db_pool_stats, redis_pool_stats))
+
+app.add_route(METRICS_PATH, metrics, include_in_schema=False)
 
 app.include_router(auth.router, prefix="/api")
 app.include_router(photos.router, prefix="/api")
@@ -32,23 +56,31 @@ app.include_router(tags.router, prefix="/api")
 async def startup_event():
     """
     This function is called during the startup of the FastAPI application.
-    It creates a Redis connection using the settings from the application configuration,
-    and then initializes the FastAPILimiter with the Redis connection.
-    The FastAPILimiter is used to implement rate limiting for the API endpoints,
-    to prevent abuse and ensure fair usage of the application.
+    Rate limiting of the costly endpoints is done by the RateLimit route dependencies
+    (src.services.rate_limit), which need no initialization here.
+    With the in-memory job queue the background jobs are run inside the application process.
+    It also starts measuring the event loop lag exposed at /metrics.
+    """
+    app.state.event_loop_monitor = asyncio.create_task(monitor_event_loop_lag())
+    if settings.job_queue_backend == "memory":
+        app.state.job_worker = asyncio.create_task(run_worker())
+
+
+async def shutdown_event():
+    """
+    This function is called during the shutdown of the FastAPI application.
+    It stops the in-process job worker (if any) and the event loop monitor,
+    and closes the connections of the shared Redis pool.
     """
-    redis_base = await Redis(
-        host=settings.redis_host,
-        port=settings.redis_port,
-        password=settings.redis_password,
-        db=0,
-        encoding="utf-8",
-        decode_responses=True,
-    )
-    await FastAPILimiter.init(redis_base)
+    for task_name in ("job_worker", "event_loop_monitor"):
+        task = getattr(app.state, task_name, None)
+        if task is not None:
+            task.cancel()
+    await close_redis()
 
 
 app.add_event_handler("startup", startup_event)
+app.add_event_handler("shutdown", shutdown_event)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,36 @@
+"""photo metadata
+
+Revision ID: 0b6e3f9a4c25
+Revises: f18c4e2a7b93
+Create Date: 2026-10-19 17:21:54.603177
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0b6e3f9a4c25'
+down_revision: Union[str, None] = 'f18c4e2a7b93'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('photos', sa.Column('width', sa.Integer(), nullable=True))
+    op.add_column('photos', sa.Column('height', sa.Integer(), nullable=True))
+    op.add_column('photos', sa.Column('byte_size', sa.Integer(), nullable=True))
+    op.add_column('photos', sa.Column('mime_type', sa.String(length=32), nullable=True))
+    op.add_column('photos', sa.Column('camera', sa.String(length=255), nullable=True))
+    op.add_column('photos', sa.Column('captured_at', sa.DateTime(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('photos', 'captured_at')
+    op.drop_column('photos', 'camera')
+    op.drop_column('photos', 'mime_type')
+    op.drop_column('photos', 'byte_size')
+    op.drop_column('photos', 'height')
+    op.drop_column('photos', 'width')
@@ -0,0 +1,31 @@
+"""tag name prefix index
+
+Revision ID: 3c5e9a1f7b42
+Revises: 99e9bbcabe8e
+Create Date: 2026-10-19 09:12:41.512384
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3c5e9a1f7b42'
+down_revision: Union[str, None] = '99e9bbcabe8e'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        'ix_tags_tag_name_lower',
+        'tags',
+        [sa.text('lower(tag_name) text_pattern_ops')],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_tags_tag_name_lower', table_name='tags')
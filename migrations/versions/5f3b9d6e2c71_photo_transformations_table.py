@@ -0,0 +1,104 @@
+"""photo transformations table
+
+Revision ID: 5f3b9d6e2c71
+Revises: e4a7c2d18b55
+Create Date: 2026-10-19 14:10:27.604391
+
+"""
+import hashlib
+import json
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5f3b9d6e2c71'
+down_revision: Union[str, None] = 'e4a7c2d18b55'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _canonical_params(params) -> list:
+    # The rules of canonical_transformation in src/services/photos.py, applied to the legacy
+    # list of single-key dicts (background, angle, width, height, crop, effects in that order).
+    values = {}
+    effects = []
+    for param in params:
+        for key, value in param.items():
+            if key == 'effect':
+                effects.append(value)
+            else:
+                values[key] = value
+    canonical = []
+    background = str(values.get('background') or '').strip().lower()
+    if background:
+        canonical.append({'background': background})
+    angle = int(values.get('angle') or 0) % 360
+    if angle:
+        canonical.append({'angle': angle})
+    for key in ('width', 'height'):
+        if values.get(key) and int(values[key]) > 0:
+            canonical.append({key: int(values[key])})
+    crop = str(values.get('crop') or '').strip().lower()
+    if crop:
+        canonical.append({'crop': crop})
+    effects = [str(effect or '').strip().lower() for effect in effects]
+    for effect in dict.fromkeys(effect for effect in effects if effect):
+        canonical.append({'effect': effect})
+    return canonical
+
+
+def _param_hash(params) -> str:
+    return hashlib.sha256(
+        json.dumps(params, sort_keys=True, separators=(",", ":")).encode()
+    ).hexdigest()
+
+
+def upgrade() -> None:
+    transformations = op.create_table('photo_transformations',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('photo_id', sa.Integer(), nullable=False),
+    sa.Column('param_hash', sa.String(length=64), nullable=False),
+    sa.Column('url', sa.String(length=1024), nullable=False),
+    sa.Column('params', sa.JSON(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['photo_id'], ['photos.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('photo_id', 'param_hash', name='photo_param_hash_uc')
+    )
+    op.create_index('ix_photo_transformations_photo_id_id', 'photo_transformations', ['photo_id', 'id'], unique=False)
+
+    photos = sa.table('photos', sa.column('id', sa.Integer), sa.column('transformation', sa.JSON))
+    connection = op.get_bind()
+    rows = []
+    for photo_id, transformation in connection.execute(
+        sa.select(photos.c.id, photos.c.transformation).where(photos.c.transformation.isnot(None))
+    ):
+        hashes = set()
+        for url, params in (transformation or {}).items():
+            params = _canonical_params(params)
+            param_hash = _param_hash(params)
+            if param_hash not in hashes:
+                hashes.add(param_hash)
+                rows.append({'photo_id': photo_id, 'param_hash': param_hash, 'url': url, 'params': params, 'created_at': sa.func.now()})
+    if rows:
+        connection.execute(transformations.insert().values(rows))
+    op.drop_column('photos', 'transformation')
+
+
+def downgrade() -> None:
+    op.add_column('photos', sa.Column('transformation', sa.JSON(), nullable=True))
+    photos = sa.table('photos', sa.column('id', sa.Integer), sa.column('transformation', sa.JSON))
+    transformations = sa.table('photo_transformations', sa.column('photo_id', sa.Integer), sa.column('url', sa.String), sa.column('params', sa.JSON), sa.column('id', sa.Integer))
+    connection = op.get_bind()
+    merged = {}
+    for photo_id, url, params in connection.execute(
+        sa.select(transformations.c.photo_id, transformations.c.url, transformations.c.params).order_by(transformations.c.id)
+    ):
+        merged.setdefault(photo_id, {})[url] = params
+    for photo_id, transformation in merged.items():
+        connection.execute(photos.update().where(photos.c.id == photo_id).values(transformation=transformation))
+    op.drop_index('ix_photo_transformations_photo_id_id', table_name='photo_transformations')
+    op.drop_table('photo_transformations')
@@ -0,0 +1,32 @@
+"""photo location
+
+Revision ID: 7a2d5c8e1f36
+Revises: 0b6e3f9a4c25
+Create Date: 2026-10-19 17:58:12.774301
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7a2d5c8e1f36'
+down_revision: Union[str, None] = '0b6e3f9a4c25'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('photos', sa.Column('latitude', sa.Float(), nullable=True))
+    op.add_column('photos', sa.Column('longitude', sa.Float(), nullable=True))
+    op.add_column('photos', sa.Column('geohash', sa.String(length=9), nullable=True))
+    op.create_index('ix_photos_geohash_id', 'photos', ['geohash', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_photos_geohash_id', table_name='photos')
+    op.drop_column('photos', 'geohash')
+    op.drop_column('photos', 'longitude')
+    op.drop_column('photos', 'latitude')
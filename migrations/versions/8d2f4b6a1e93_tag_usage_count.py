@@ -0,0 +1,32 @@
+"""tag usage count
+
+Revision ID: 8d2f4b6a1e93
+Revises: 3c5e9a1f7b42
+Create Date: 2026-10-19 10:03:17.204518
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8d2f4b6a1e93'
+down_revision: Union[str, None] = '3c5e9a1f7b42'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('tags', sa.Column('usage_count', sa.Integer(), server_default='0', nullable=False))
+    op.create_index('ix_tags_usage_count', 'tags', ['usage_count'], unique=False)
+    op.execute(
+        'UPDATE tags SET usage_count = '
+        '(SELECT count(*) FROM photo_tags WHERE photo_tags.tag_id = tags.id)'
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_tags_usage_count', table_name='tags')
+    op.drop_column('tags', 'usage_count')
@@ -0,0 +1,26 @@
+"""photo transformation status
+
+Revision ID: a91d3e7f5b08
+Revises: 5f3b9d6e2c71
+Create Date: 2026-10-19 14:52:09.311846
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a91d3e7f5b08'
+down_revision: Union[str, None] = '5f3b9d6e2c71'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('photo_transformations', sa.Column('status', sa.String(length=16), server_default='lazy', nullable=False))
+
+
+def downgrade() -> None:
+    op.drop_column('photo_transformations', 'status')
@@ -0,0 +1,26 @@
+"""photo tags tag id index
+
+Revision ID: b7e1c05d9f28
+Revises: 8d2f4b6a1e93
+Create Date: 2026-10-19 11:21:05.873120
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7e1c05d9f28'
+down_revision: Union[str, None] = '8d2f4b6a1e93'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_photo_tags_tag_id', 'photo_tags', ['tag_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_photo_tags_tag_id', table_name='photo_tags')
@@ -0,0 +1,34 @@
+"""transformation presets
+
+Revision ID: c26f8e4a9d17
+Revises: a91d3e7f5b08
+Create Date: 2026-10-19 15:38:44.902615
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c26f8e4a9d17'
+down_revision: Union[str, None] = 'a91d3e7f5b08'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('transformation_presets',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(length=50), nullable=False),
+    sa.Column('params', sa.JSON(), nullable=False),
+    sa.Column('param_hash', sa.String(length=64), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('name')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('transformation_presets')
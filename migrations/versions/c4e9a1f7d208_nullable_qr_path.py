@@ -0,0 +1,36 @@
+"""nullable qr path
+
+Revision ID: c4e9a1f7d208
+Revises: 7a2d5c8e1f36
+Create Date: 2026-10-19 19:12:40.518207
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4e9a1f7d208'
+down_revision: Union[str, None] = '7a2d5c8e1f36'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.alter_column('photos', 'qr_path',
+               existing_type=sa.VARCHAR(length=255),
+               nullable=True)
+    op.alter_column('photo_assets', 'qr_path',
+               existing_type=sa.VARCHAR(length=255),
+               nullable=True)
+
+
+def downgrade() -> None:
+    op.alter_column('photo_assets', 'qr_path',
+               existing_type=sa.VARCHAR(length=255),
+               nullable=False)
+    op.alter_column('photos', 'qr_path',
+               existing_type=sa.VARCHAR(length=255),
+               nullable=False)
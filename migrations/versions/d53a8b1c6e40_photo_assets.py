@@ -0,0 +1,41 @@
+"""photo assets
+
+Revision ID: d53a8b1c6e40
+Revises: c26f8e4a9d17
+Create Date: 2026-10-19 16:12:07.348120
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd53a8b1c6e40'
+down_revision: Union[str, None] = 'c26f8e4a9d17'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('photo_assets',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('content_hash', sa.String(length=64), nullable=False),
+    sa.Column('file_path', sa.String(length=255), nullable=False),
+    sa.Column('qr_path', sa.String(length=255), nullable=False),
+    sa.Column('renditions', sa.JSON(), nullable=True),
+    sa.Column('ref_count', sa.Integer(), server_default='0', nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('content_hash')
+    )
+    op.add_column('photos', sa.Column('content_hash', sa.String(length=64), nullable=True))
+    op.create_index(op.f('ix_photos_content_hash'), 'photos', ['content_hash'], unique=False)
+    op.create_foreign_key('fk_photos_content_hash_photo_assets', 'photos', 'photo_assets', ['content_hash'], ['content_hash'])
+
+
+def downgrade() -> None:
+    op.drop_constraint('fk_photos_content_hash_photo_assets', 'photos', type_='foreignkey')
+    op.drop_index(op.f('ix_photos_content_hash'), table_name='photos')
+    op.drop_column('photos', 'content_hash')
+    op.drop_table('photo_assets')
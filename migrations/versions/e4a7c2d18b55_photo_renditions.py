@@ -0,0 +1,26 @@
+"""photo renditions
+
+Revision ID: e4a7c2d18b55
+Revises: b7e1c05d9f28
+Create Date: 2026-10-19 13:02:41.518204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e4a7c2d18b55'
+down_revision: Union[str, None] = 'b7e1c05d9f28'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('photos', sa.Column('renditions', sa.JSON(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('photos', 'renditions')
@@ -0,0 +1,26 @@
+"""photo dhash
+
+Revision ID: f18c4e2a7b93
+Revises: d53a8b1c6e40
+Create Date: 2026-10-19 16:47:31.220934
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f18c4e2a7b93'
+down_revision: Union[str, None] = 'd53a8b1c6e40'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('photos', sa.Column('dhash', sa.BigInteger(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('photos', 'dhash')
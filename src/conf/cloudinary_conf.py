@@ -12,4 +12,5 @@ CLOUDINARY_CONFIG = cloudinary.config(
 CLOUDINARY_PARAMS = {
     "photo_public_id_prefix": "PhotoShare",
     "qr_public_id_prefix": "PhotoShare/qr-codes",
+    "rendition_public_id_prefix": "PhotoShare/renditions",
 }
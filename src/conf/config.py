@@ -27,9 +27,42 @@ class Settings(BaseSettings):
         redis_host (str, optional): Redis server hostname (default is "localhost").
         redis_port (int, optional): Redis server port (default is 6379).
         redis_password (str): Redis server password (default is "password").
+        redis_max_connections (int, optional): Size of the shared Redis connection pool (default is 50).
+        redis_pool_timeout (float, optional): Seconds to wait for a free pooled connection (default is 5).
+        redis_socket_timeout (float, optional): Seconds to wait for a Redis reply (default is 5).
+        redis_socket_connect_timeout (float, optional): Seconds to wait for a new connection (default is 2).
+        redis_health_check_interval (int, optional): Seconds of idleness after which a pooled
+            connection is checked with PING before use (default is 30).
+        redis_sentinels (str, optional): Comma separated "host:port" Sentinel addresses, if set the
+            master is found through Sentinel (default is "").
+        redis_sentinel_master (str, optional): Name of the master monitored by Sentinel (default is "mymaster").
+        redis_cluster (bool, optional): Connect to a Redis Cluster through redis_host (default is False).
+        db_pool_size (int, optional): Number of connections kept in the database pool (default is 5).
+        db_max_overflow (int, optional): Number of connections opened above the pool size (default is 10).
+        db_pool_timeout (float, optional): Seconds to wait for a free pooled connection (default is 30).
+        db_pool_pre_ping (bool, optional): Test pooled connections before use (default is True).
+        db_pool_recycle (int, optional): Seconds after which a pooled connection is replaced (default is 1800).
+        db_statement_timeout (int, optional): Milliseconds after which PostgreSQL cancels a statement,
+            0 disables the timeout (default is 30000).
+        db_pgbouncer (bool, optional): The database is reached through PgBouncer in transaction mode,
+            the application does not pool connections (default is False).
+        db_replica_urls (str, optional): Comma separated URLs of read replicas, read-only requests
+            read from them (default is "").
+        db_replica_health_interval (float, optional): Seconds between health checks of a replica (default is 10).
+        db_read_your_writes_window (int, optional): Seconds after a write during which the reads of
+            the client go to the primary database (default is 5).
+        metrics_token (str, optional): Bearer token required to scrape /metrics, the metrics are
+            not exposed without it (default is "").
         cloudinary_name (str): Cloudinary account name.
         cloudinary_api_key (str): Cloudinary API key.
         cloudinary_api_secret (str): Cloudinary API secret.
+        upload_staging_dir (str, optional): Directory for unfinished resumable uploads (default is "uploads").
+        job_queue_backend (str, optional): "redis" or "memory" (jobs run inside the API process,
+            for development and tests) (default is "redis").
+        rate_limit_backend (str, optional): "redis" (sliding window shared by all API processes)
+            or "memory" (token bucket of a single process) (default is "redis").
+        rate_limits (dict[str, str], optional): Limits overriding the defaults by route group
+            ("upload", "transform", "search", "login") as "requests/seconds", e.g. {"upload": "10/60"}.
 
     Config:
         env_file (str): Path to the environment file (default is ".env").
@@ -57,9 +90,32 @@ class Settings(BaseSettings):
     redis_host: str = "localhost"
     redis_port: int = 6379
     redis_password: str
+    redis_max_connections: int = 50
+    redis_pool_timeout: float = 5
+    redis_socket_timeout: float = 5
+    redis_socket_connect_timeout: float = 2
+    redis_health_check_interval: int = 30
+    redis_sentinels: str = ""
+    redis_sentinel_master: str = "mymaster"
+    redis_cluster: bool = False
+    db_pool_size: int = 5
+    db_max_overflow: int = 10
+    db_pool_timeout: float = 30
+    db_pool_pre_ping: bool = True
+    db_pool_recycle: int = 1800
+    db_statement_timeout: int = 30000
+    db_pgbouncer: bool = False
+    db_replica_urls: str = ""
+    db_replica_health_interval: float = 10
+    db_read_your_writes_window: int = 5
+    metrics_token: str = ""
     cloudinary_name: str
     cloudinary_api_key: str
     cloudinary_api_secret: str
+    upload_staging_dir: str = "uploads"
+    job_queue_backend: str = "redis"
+    rate_limit_backend: str = "redis"
+    rate_limits: dict[str, str] = {}
 
     class Config:
         env_file = ".env"
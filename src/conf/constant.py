@@ -8,3 +8,74 @@ PHOTO_SEARCH_ENUMS = [
     "rating-desc",
     "rating-asc",
 ]
+MAX_BATCH_PHOTO_IDS = 50
+DEFAULT_BATCH_COMMENTS_PER_PHOTO = 3
+MAX_BATCH_COMMENTS_PER_PHOTO = 20
+TAG_SUGGEST_DEFAULT_LIMIT = 10
+TAG_SUGGEST_MAX_LIMIT = 50
+TAG_SUGGEST_CACHE_SIZE = 10000
+TAG_SUGGEST_CACHE_TTL = 300
+TAG_POPULAR_DEFAULT_LIMIT = 50
+TAG_POPULAR_MAX_LIMIT = 200
+PHOTO_PAGE_DEFAULT_LIMIT = 20
+PHOTO_PAGE_MAX_LIMIT = 100
+MAX_TAGS_IN_QUERY = 10
+TAG_MATCH_ENUMS = ["all", "any"]
+USERS_PAGE_DEFAULT_LIMIT = 50
+USERS_PAGE_MAX_LIMIT = 200
+USER_SEARCH_ENUMS = [
+    "created_at-desc",
+    "created_at-asc",
+    "username-asc",
+    "username-desc",
+    "photo_count-desc",
+    "photo_count-asc",
+]
+USERS_EXPORT_BATCH_SIZE = 1000
+USERS_EXPORT_FORMATS = ["ndjson", "csv"]
+MAX_BATCH_UPLOAD_FILES = 20
+BATCH_UPLOAD_WORKERS = 4
+MAX_UPLOAD_BYTES = 20 * 1024 * 1024
+MAX_IMAGE_PIXELS = 50_000_000
+IMAGE_HEADER_PROBE_BYTES = 64 * 1024
+CONTENT_HASH_CHUNK_BYTES = 1024 * 1024
+SIGNED_UPLOAD_FORMATS = ["jpg", "png", "gif", "webp"]
+SIGNED_UPLOAD_TTL = 3600
+RESUMABLE_UPLOAD_TTL = 24 * 60 * 60
+RENDITION_WIDTHS = {"thumbnail": 320, "preview": 1280}
+RENDITION_FORMAT = "WEBP"
+RENDITION_QUALITY = 80
+RENDITION_WORKERS = 2
+TRANSFORMATION_URL_CACHE_SIZE = 4096
+MAX_PRESET_NAME_LENGTH = 50
+PRESET_CACHE_TTL = 60
+DHASH_SIZE = 8
+SIMILAR_PHOTOS_DEFAULT_DISTANCE = 6
+SIMILAR_PHOTOS_MAX_DISTANCE = 12
+SIMILAR_INDEX_TTL = 600
+MAX_CAMERA_LENGTH = 255
+MAX_MIME_TYPE_LENGTH = 32
+EXIF_DATETIME_FORMAT = "%Y:%m:%d %H:%M:%S"
+METADATA_PROBE_BYTES = 128 * 1024
+METADATA_BACKFILL_BATCH_SIZE = 200
+METADATA_BACKFILL_WORKERS = 8
+GEOHASH_PRECISION = 9
+MAX_GEOHASH_CELLS = 16
+MAX_NEARBY_RADIUS = 100_000
+NEARBY_MAX_SCANNED_ROWS = 1000
+JOB_QUEUE_NAME = "photos"
+JOB_MAX_ATTEMPTS = 5
+JOB_RETRY_DELAY = 10
+JOB_VISIBILITY_TIMEOUT = 300
+JOB_POLL_INTERVAL = 1.0
+RATE_LIMITS = {
+    "upload": (20, 60),
+    "transform": (60, 60),
+    "search": (120, 60),
+    "login": (10, 60),
+}
+RATE_LIMIT_LOCAL_MAX_KEYS = 10_000
+RATE_LIMIT_REDIS_RETRY = 30
+READ_ONLY_METHODS = ("GET", "HEAD")
+EVENT_LOOP_LAG_INTERVAL = 0.5
+METRICS_PATH = "/metrics"
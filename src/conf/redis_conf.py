@@ -0,0 +1,105 @@
+from redis.asyncio import BlockingConnectionPool, Redis
+from redis.asyncio.cluster import RedisCluster
+from redis.asyncio.sentinel import Sentinel, SentinelConnectionPool
+
+from src.conf.config import settings
+
+
+class BlockingSentinelConnectionPool(SentinelConnectionPool, BlockingConnectionPool):
+    """Sentinel backed pool which, like BlockingConnectionPool, waits for a free connection when full."""
+
+
+def _connection_kwargs() -> dict:
+    """Connection options shared by all kinds of Redis deployments."""
+    return {
+        "password": settings.redis_password,
+        "socket_timeout": settings.redis_socket_timeout,
+        "socket_connect_timeout": settings.redis_socket_connect_timeout,
+        "health_check_interval": settings.redis_health_check_interval,
+    }
+
+
+def create_redis() -> Redis | RedisCluster:
+    """
+    Creates the Redis client shared by the application (auth cache, rate limiter, job queue).
+
+    A single host and a Sentinel master use a blocking pool, so a burst of requests waits up to
+    redis_pool_timeout for a free connection instead of opening new ones. With redis_sentinels
+    the master is found through Sentinel, with redis_cluster the client connects to a Redis Cluster.
+    Connections are opened on first use.
+
+    Returns:
+        Redis | RedisCluster: The client.
+    """
+    if settings.redis_sentinels:
+        sentinels = [
+            (host, int(port))
+            for host, _, port in (
+                address.strip().partition(":")
+                for address in settings.redis_sentinels.split(",")
+            )
+        ]
+        return Sentinel(
+            sentinels,
+            sentinel_kwargs={
+                "socket_timeout": settings.redis_socket_timeout,
+                "socket_connect_timeout": settings.redis_socket_connect_timeout,
+            },
+        ).master_for(
+            settings.redis_sentinel_master,
+            connection_pool_class=BlockingSentinelConnectionPool,
+            max_connections=settings.redis_max_connections,
+            timeout=settings.redis_pool_timeout,
+            **_connection_kwargs(),
+        )
+    if settings.redis_cluster:
+        return RedisCluster(
+            host=settings.redis_host,
+            port=settings.redis_port,
+            max_connections=settings.redis_max_connections,
+            **_connection_kwargs(),
+        )
+    return Redis(
+        connection_pool=BlockingConnectionPool(
+            host=settings.redis_host,
+            port=settings.redis_port,
+            db=0,
+            max_connections=settings.redis_max_connections,
+            timeout=settings.redis_pool_timeout,
+            **_connection_kwargs(),
+        )
+    )
+
+
+redis_client = create_redis()
+
+
+def redis_pool_stats(client: Redis | RedisCluster = redis_client) -> dict[str, int]:
+    """
+    Reports the usage of the connection pool of the shared Redis client.
+
+    Args:
+        client (Redis | RedisCluster): The client.
+
+    Returns:
+        dict[str, int]: Maximum number of connections and numbers of connections in use
+            and idle (summed over all nodes of a cluster).
+    """
+    if isinstance(client, RedisCluster):
+        nodes = client.get_nodes()
+        return {
+            "max_connections": sum(node.max_connections for node in nodes),
+            "in_use": sum(len(node._connections) - len(node._free) for node in nodes),
+            "available": sum(len(node._free) for node in nodes),
+        }
+    pool = client.connection_pool
+    return {
+        "max_connections": pool.max_connections,
+        "in_use": len(pool._in_use_connections),
+        "available": len(pool._available_connections),
+    }
+
+
+async def close_redis() -> None:
+    """Closes all connections of the shared Redis client (on application shutdown)."""
+    await redis_client.aclose()
@@ -1,25 +1,299 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+import logging
+import time
+from threading import Lock
+
+from fastapi import Request
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import NullPool, QueuePool
 
 from src.conf.config import settings
+from src.conf.constant import READ_ONLY_METHODS
 
+logger = logging.getLogger(__name__)
 
 SQLALCHEMY_DATABASE_URL = settings.sqlalchemy_database_url
 
 
-engine = create_engine(SQLALCHEMY_DATABASE_URL)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+class PoolMetrics:
+    """
+    Gauges of the connection pool updated by pool events.
+
+    Attributes:
+        in_use (int): Number of connections checked out of the pool.
+        checkouts (int): Number of checkouts.
+        wait_total (float): Seconds spent waiting for checkouts in total.
+        wait_max (float): The longest wait for a checkout in seconds.
+        last_wait (float): Seconds spent waiting for the last checkout.
+    """
+
+    def __init__(self):
+        self._lock = Lock()
+        self.in_use = 0
+        self.checkouts = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.last_wait = 0.0
+
+    def checked_out(self, wait: float) -> None:
+        """Record a checkout which waited `wait` seconds for a connection."""
+        with self._lock:
+            self.in_use += 1
+            self.checkouts += 1
+            self.wait_total += wait
+            self.wait_max = max(self.wait_max, wait)
+            self.last_wait = wait
+
+    def checked_in(self) -> None:
+        """Record a connection returned to the pool."""
+        with self._lock:
+            self.in_use = max(self.in_use - 1, 0)
+
+
+class TimedQueuePool(QueuePool):
+    """
+    QueuePool recording how long every checkout waited for a connection (including connecting)
+    in the info of the connection record, where the checkout event listener reads it.
+    """
+
+    def _do_get(self):
+        start = time.perf_counter()
+        record = super()._do_get()
+        record.info["checkout_wait"] = time.perf_counter() - start
+        return record
+
+
+def _listen_pool_metrics(engine: Engine, metrics: PoolMetrics) -> None:
+    """Update the metrics on checkout and checkin events of the pool of the engine."""
+
+    @event.listens_for(engine, "checkout")
+    def checkout(dbapi_connection, connection_record, connection_proxy):
+        metrics.checked_out(connection_record.info.pop("checkout_wait", 0.0))
+
+    @event.listens_for(engine, "checkin")
+    def checkin(dbapi_connection, connection_record):
+        metrics.checked_in()
+
+
+def _set_statement_timeout(engine: Engine, timeout: int) -> None:
+    """Set the statement timeout at the beginning of every transaction (SET LOCAL works behind PgBouncer)."""
+
+    @event.listens_for(engine, "begin")
+    def begin(connection):
+        connection.exec_driver_sql(f"SET LOCAL statement_timeout = {int(timeout)}")
+
+
+def create_db_engine(
+    url: str = SQLALCHEMY_DATABASE_URL, metrics: PoolMetrics | None = None
+) -> Engine:
+    """
+    Creates the engine configured for the application.
+
+    The pool is sized by db_pool_size and db_max_overflow, a checkout waits up to
+    db_pool_timeout for a free connection, connections are tested with pre-ping and replaced
+    after db_pool_recycle seconds. On PostgreSQL every statement is cancelled after
+    db_statement_timeout milliseconds. In PgBouncer mode the application does not pool
+    connections (PgBouncer does), the timeout is set per transaction because PgBouncer
+    rejects startup options, and psycopg2 never uses server-side prepared statements,
+    so transaction pooling is safe.
+
+    Args:
+        url (str): The database URL.
+        metrics (PoolMetrics | None): Gauges updated by pool events.
+
+    Returns:
+        Engine: The engine.
+    """
+    postgres = make_url(url).get_backend_name() == "postgresql"
+    options = {}
+    connect_args = {}
+    if settings.db_pgbouncer:
+        options["poolclass"] = NullPool
+    else:
+        options.update(
+            poolclass=TimedQueuePool,
+            pool_size=settings.db_pool_size,
+            max_overflow=settings.db_max_overflow,
+            pool_timeout=settings.db_pool_timeout,
+            pool_pre_ping=settings.db_pool_pre_ping,
+            pool_recycle=settings.db_pool_recycle,
+        )
+        if postgres and settings.db_statement_timeout:
+            connect_args["options"] = (
+                f"-c statement_timeout={settings.db_statement_timeout}"
+            )
+    engine = create_engine(url, connect_args=connect_args, **options)
+    if postgres and settings.db_pgbouncer and settings.db_statement_timeout:
+        _set_statement_timeout(engine, settings.db_statement_timeout)
+    if metrics is not None:
+        _listen_pool_metrics(engine, metrics)
+    return engine
+
+
+class ReplicaSet:
+    """
+    Read replicas used in turn (round-robin), skipping the ones failing health checks.
+
+    A replica is checked with "SELECT 1" when it is chosen and its last check is older than
+    `health_interval` seconds, so a failed replica is tried again after the interval.
+
+    Attributes:
+        engines (list[Engine]): Engines of the replicas.
+        health_interval (float): Seconds between health checks of a replica.
+
+    Methods:
+        choose(): Choose the next healthy replica.
+    """
+
+    def __init__(self, engines: list[Engine], health_interval: float):
+        self.engines = engines
+        self.health_interval = health_interval
+        self._lock = Lock()
+        self._next = 0
+        self._health: dict[Engine, tuple[bool, float]] = {}
+
+    def _healthy(self, replica: Engine) -> bool:
+        now = time.monotonic()
+        with self._lock:
+            healthy, checked_at = self._health.get(replica, (True, None))
+            if checked_at is not None and now - checked_at < self.health_interval:
+                return healthy
+            self._health[replica] = (healthy, now)
+        try:
+            with replica.connect() as connection:
+                connection.exec_driver_sql("SELECT 1")
+            healthy = True
+        except SQLAlchemyError:
+            logger.warning("Read replica %s is unavailable", replica.url)
+            healthy = False
+        with self._lock:
+            self._health[replica] = (healthy, now)
+        return healthy
+
+    def choose(self) -> Engine | None:
+        """
+        Choose the next healthy replica.
+
+        Returns:
+            Engine | None: The replica or None if no replica is healthy.
+        """
+        for _ in range(len(self.engines)):
+            with self._lock:
+                replica = self.engines[self._next % len(self.engines)]
+                self._next += 1
+            if self._healthy(replica):
+                return replica
+        return None
 
 
-def get_db():
+class RoutingSession(Session):
+    """
+    Session sending reads to a read replica and everything else to the primary database.
+
+    A session reads from a replica only if its info has "use_replica" set (by get_db for
+    read-only requests), and it keeps to one replica, so all reads of a request see the same
+    data. Flushes and UPDATE/DELETE/INSERT statements go to the primary, after the first one
+    the session reads from the primary too, so it sees its own changes. Sessions which wrote
+    have "wrote" set in their info.
+    """
+
+    def get_bind(self, mapper=None, clause=None, **kwargs):
+        if self._flushing or not getattr(clause, "is_select", False):
+            self.info["use_replica"] = False
+            self.info["wrote"] = True
+            return engine
+        if not self.info.get("use_replica") or replicas is None:
+            return engine
+        if "replica" not in self.info:
+            self.info["replica"] = replicas.choose() or engine
+        return self.info["replica"]
+
+
+pool_metrics = PoolMetrics()
+engine = create_db_engine(metrics=pool_metrics)
+replicas = (
+    ReplicaSet(
+        [
+            create_db_engine(url.strip())
+            for url in settings.db_replica_urls.split(",")
+            if url.strip()
+        ],
+        settings.db_replica_health_interval,
+    )
+    if settings.db_replica_urls
+    else None
+)
+SessionLocal = sessionmaker(
+    class_=RoutingSession, autocommit=False, autoflush=False, bind=engine
+)
+
+
+def db_pool_stats(
+    db_engine: Engine = engine, metrics: PoolMetrics = pool_metrics
+) -> dict:
+    """
+    Reports the usage of the database connection pool.
+
+    Args:
+        db_engine (Engine): The engine.
+        metrics (PoolMetrics): Gauges updated by pool events of the engine.
+
+    Returns:
+        dict: Size of the pool, numbers of connections in use, idle and in overflow,
+            number of checkouts and checkout wait times in seconds.
+    """
+    pool = db_engine.pool
+    pooled = isinstance(pool, QueuePool)
+    return {
+        "size": pool.size() if pooled else 0,
+        "in_use": metrics.in_use,
+        "available": pool.checkedin() if pooled else 0,
+        "overflow": max(pool.overflow(), 0) if pooled else 0,
+        "checkouts": metrics.checkouts,
+        "wait_avg": (
+            metrics.wait_total / metrics.checkouts if metrics.checkouts else 0.0
+        ),
+        "wait_max": metrics.wait_max,
+        "last_wait": metrics.last_wait,
+    }
+
+
+def get_db(request: Request):
     """
      Create a new database session.
 
+    Read-only requests (GET, HEAD) read from a replica, unless the client wrote recently
+    or the route reads from the primary (request.state.use_primary is set by the read-your-writes
+    middleware or the read_from_primary dependency). If the session wrote to the primary,
+    request.state.wrote is set, so the middleware marks the client whatever the method.
+
+    Args:
+        request (Request): The request.
+
     Yields:
         Session: The database session.
     """
     db = SessionLocal()
+    db.info["use_replica"] = request.method in READ_ONLY_METHODS and not getattr(
+        request.state, "use_primary", False
+    )
     try:
         yield db
     finally:
+        if db.info.get("wrote"):
+            request.state.wrote = True
         db.close()
+
+
+def read_from_primary(request: Request) -> None:
+    """
+    Dependency of read-only (GET) routes which write, e.g. to rotate a token: their session
+    reads from the primary database, so the data they change is never a stale replica copy.
+    Must be listed in the dependencies of the route, which are resolved before get_db.
+
+    Args:
+        request (Request): The request.
+    """
+    request.state.use_primary = True
@@ -1,6 +1,8 @@
 from sqlalchemy import (
     Column,
     Integer,
+    BigInteger,
+    Float,
     String,
     func,
     Boolean,
@@ -8,15 +10,20 @@ from sqlalchemy import (
     ForeignKey,
     JSON,
     UniqueConstraint,
+    Index,
 )
 from sqlalchemy.ext.hybrid import hybrid_property
 from sqlalchemy.sql.sqltypes import DateTime
 from sqlalchemy.orm import relationship, declarative_base
 from src.conf.constant import (
+    GEOHASH_PRECISION,
+    MAX_CAMERA_LENGTH,
+    MAX_MIME_TYPE_LENGTH,
     MAX_USERNAME_LENGTH,
     MAX_COMMENT_LENGTH,
     MAX_DESCRIPTION_LENGTH,
     MAX_TAG_NAME_LENGTH,
+    MAX_PRESET_NAME_LENGTH,
 )
 
 Base = declarative_base()
@@ -71,18 +78,59 @@ class Photo(Base):
     :type upload_date: DateTime
     :param user_id: Foreign key to the user who uploaded the photo.
     :type user_id: int
+    :param content_hash: SHA-256 hash of the uploaded file, key of the shared stored asset.
+    :type content_hash: str
+    :param dhash: Perceptual (difference) hash of the photo used to find near-duplicates.
+    :type dhash: int
+    :param width: Width of the photo in pixels (as displayed).
+    :type width: int
+    :param height: Height of the photo in pixels (as displayed).
+    :type height: int
+    :param byte_size: Size of the photo file in bytes.
+    :type byte_size: int
+    :param mime_type: MIME type of the photo file.
+    :type mime_type: str
+    :param camera: Make and model of the camera from EXIF.
+    :type camera: str
+    :param captured_at: Time the photo was taken from EXIF.
+    :type captured_at: DateTime
+    :param latitude: Latitude of the place the photo was taken, from EXIF GPS data.
+    :type latitude: float
+    :param longitude: Longitude of the place the photo was taken, from EXIF GPS data.
+    :type longitude: float
+    :param geohash: Geohash of the location, indexed with the id for (bounding box) range scans.
+    :type geohash: str
     """
 
     __tablename__ = "photos"
     id = Column(Integer, primary_key=True)
     file_path = Column(String(255), nullable=False)
-    qr_path = Column(String(255), nullable=False)
-    transformation = Column(JSON, nullable=True)
+    qr_path = Column(String(255), nullable=True)
+    renditions = Column(JSON, nullable=True)
     description = Column(String(MAX_DESCRIPTION_LENGTH), nullable=False)
     upload_date = Column(DateTime, default=func.now())
     user_id = Column(Integer, ForeignKey("users.id"))
+    content_hash = Column(
+        String(64),
+        ForeignKey(
+            "photo_assets.content_hash", name="fk_photos_content_hash_photo_assets"
+        ),
+        nullable=True,
+        index=True,
+    )
+    dhash = Column(BigInteger, nullable=True)
+    width = Column(Integer, nullable=True)
+    height = Column(Integer, nullable=True)
+    byte_size = Column(Integer, nullable=True)
+    mime_type = Column(String(MAX_MIME_TYPE_LENGTH), nullable=True)
+    camera = Column(String(MAX_CAMERA_LENGTH), nullable=True)
+    captured_at = Column(DateTime, nullable=True)
+    latitude = Column(Float, nullable=True)
+    longitude = Column(Float, nullable=True)
+    geohash = Column(String(GEOHASH_PRECISION), nullable=True)
 
     user = relationship("User", back_populates="photos")
+    asset = relationship("PhotoAsset")
     comments = relationship(
         "Comment", back_populates="photo", cascade="all, delete-orphan"
     )
@@ -94,6 +142,13 @@ class Photo(Base):
     ratings = relationship(
         "Rating", back_populates="photo", cascade="all, delete-orphan"
     )
+    transformations = relationship(
+        "PhotoTransformation", back_populates="photo", cascade="all, delete-orphan"
+    )
+
+    __table_args__ = (
+        Index("ix_photos_geohash_id", geohash, id),
+    )
 
     @hybrid_property
     def average_rating(self):
@@ -102,6 +157,91 @@ class Photo(Base):
         return 0
 
 
+class PhotoAsset(Base):
+    """
+    Represents a photo stored in Cloudinary, shared by all photos uploaded with the same content.
+    :param id: Primary key.
+    :type id: int
+    :param content_hash: Required, unique SHA-256 hash of the stored file.
+    :type content_hash: str
+    :param file_path: Required, the url of the stored photo.
+    :type file_path: str
+    :param qr_path: The url of the QR code of the photo, set by a background job after the upload.
+    :type qr_path: str
+    :param renditions: Urls of smaller versions of the photo by their names.
+    :type renditions: JSON
+    :param ref_count: Number of photos using the asset.
+    :type ref_count: int
+    """
+
+    __tablename__ = "photo_assets"
+    id = Column(Integer, primary_key=True)
+    content_hash = Column(String(64), nullable=False, unique=True)
+    file_path = Column(String(255), nullable=False)
+    qr_path = Column(String(255), nullable=True)
+    renditions = Column(JSON, nullable=True)
+    ref_count = Column(Integer, nullable=False, default=0, server_default="0")
+
+
+class PhotoTransformation(Base):
+    """
+    Represents a Cloudinary transformation applied to a photo.
+    :param id: Primary key.
+    :type id: int
+    :param photo_id: Foreign key to the transformed photo.
+    :type photo_id: int
+    :param param_hash: Required, SHA-256 hash of the canonical transformation parameters.
+    :type param_hash: str
+    :param url: Required, the url of the transformed photo.
+    :type url: str
+    :param params: Required, the canonical transformation parameters.
+    :type params: JSON
+    :param created_at: Automatically set to the current time when the transformation is created.
+    :type created_at: DateTime
+    :param status: Generation status: "lazy" (rendered on first request), "pending", "ready" or "failed".
+    :type status: str
+    """
+
+    __tablename__ = "photo_transformations"
+    id = Column(Integer, primary_key=True)
+    photo_id = Column(Integer, ForeignKey("photos.id"), nullable=False)
+    param_hash = Column(String(64), nullable=False)
+    url = Column(String(1024), nullable=False)
+    params = Column(JSON, nullable=False)
+    created_at = Column(DateTime, default=func.now())
+    status = Column(String(16), nullable=False, default="lazy", server_default="lazy")
+
+    photo = relationship("Photo", back_populates="transformations")
+
+    __table_args__ = (
+        UniqueConstraint("photo_id", "param_hash", name="photo_param_hash_uc"),
+        Index("ix_photo_transformations_photo_id_id", photo_id, id),
+    )
+
+
+class TransformationPreset(Base):
+    """
+    Represents a named set of transformation parameters managed by admins.
+    :param id: Primary key.
+    :type id: int
+    :param name: Required, unique name of the preset.
+    :type name: str
+    :param params: Required, the canonical transformation parameters.
+    :type params: JSON
+    :param param_hash: Required, SHA-256 hash of the canonical transformation parameters.
+    :type param_hash: str
+    :param created_at: Automatically set to the current time when the preset is created.
+    :type created_at: DateTime
+    """
+
+    __tablename__ = "transformation_presets"
+    id = Column(Integer, primary_key=True)
+    name = Column(String(MAX_PRESET_NAME_LENGTH), nullable=False, unique=True)
+    params = Column(JSON, nullable=False)
+    param_hash = Column(String(64), nullable=False)
+    created_at = Column(DateTime, default=func.now())
+
+
 class Comment(Base):
     """
     Represents a comment made by a user on a photo.
@@ -139,11 +279,14 @@ class Tag(Base):
     :type id: int
     :param tag_name: Required, the name of the tag.
     :type tag_name: str
+    :param usage_count: The number of photos tagged with the tag.
+    :type usage_count: int
     """
 
     __tablename__ = "tags"
     id = Column(Integer, primary_key=True)
     tag_name = Column(String(MAX_TAG_NAME_LENGTH), nullable=False, unique=True)
+    usage_count = Column(Integer, nullable=False, default=0, server_default="0")
 
     photos = relationship(
         "Photo",
@@ -151,6 +294,15 @@ class Tag(Base):
         back_populates="tags",
     )
 
+    __table_args__ = (
+        Index(
+            "ix_tags_tag_name_lower",
+            func.lower(tag_name).label("tag_name_lower"),
+            postgresql_ops={"tag_name_lower": "text_pattern_ops"},
+        ),
+        Index("ix_tags_usage_count", usage_count),
+    )
+
 
 class PhotoTag(Base):
     """
@@ -166,6 +318,8 @@ class PhotoTag(Base):
     photo_id = Column(Integer, ForeignKey("photos.id"), primary_key=True)
     tag_id = Column(Integer, ForeignKey("tags.id"), primary_key=True)
 
+    __table_args__ = (Index("ix_photo_tags_tag_id", tag_id),)
+
 
 class Rating(Base):
     """
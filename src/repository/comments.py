@@ -1,9 +1,10 @@
-from sqlalchemy.orm import Session
+from sqlalchemy import func
+from sqlalchemy.orm import Session, aliased
 from sqlalchemy.exc import IntegrityError
 from fastapi import HTTPException, status
 
 from src.database.models import Comment, Photo
-from src.schemas import CommentOut
+from src.schemas import CommentOut, PhotoCommentsOut
 
 
 async def add_comment(
@@ -104,3 +105,49 @@ async def get_comments(photo_id: int, db: Session) -> list[CommentOut]:
             status_code=status.HTTP_404_NOT_FOUND, detail="Photo not found"
         )
     return [comments for comments in photo.comments if comments]
+
+
+async def get_latest_comments_for_photos(
+    photo_ids: list[int], limit: int, db: Session
+) -> list[PhotoCommentsOut]:
+    """
+    Downloading the latest comments for many photos with a single query.
+
+    Comments are ranked per photo with ROW_NUMBER() OVER (PARTITION BY photo_id ...),
+    so only the newest `limit` comments of every photo leave the database.
+
+    Parameters:
+        photo_ids (list[int]): The IDs of the photos for which comments are to be downloaded.
+        limit (int): The maximum number of comments returned for each photo.
+        db (Session): Database session dependency.
+
+    Returns:
+        list[PhotoCommentsOut]: The latest comments for every requested photo, in request order.
+            Photos without comments (or not existing) get an empty list.
+    """
+    photo_ids = list(dict.fromkeys(photo_ids))
+    row_number = (
+        func.row_number()
+        .over(
+            partition_by=Comment.photo_id,
+            order_by=(Comment.date_posted.desc(), Comment.id.desc()),
+        )
+        .label("row_number")
+    )
+    ranked = (
+        db.query(Comment, row_number).filter(Comment.photo_id.in_(photo_ids)).subquery()
+    )
+    latest_comment = aliased(Comment, ranked)
+    comments = (
+        db.query(latest_comment)
+        .filter(ranked.c.row_number <= limit)
+        .order_by(ranked.c.photo_id, ranked.c.row_number)
+        .all()
+    )
+    comments_by_photo = {photo_id: [] for photo_id in photo_ids}
+    for comment in comments:
+        comments_by_photo[comment.photo_id].append(CommentOut.model_validate(comment))
+    return [
+        PhotoCommentsOut(photo_id=photo_id, comments=photo_comments)
+        for photo_id, photo_comments in comments_by_photo.items()
+    ]
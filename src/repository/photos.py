@@ -1,61 +1,442 @@
+import base64
+import json
+from collections import Counter
+from datetime import datetime
 from typing import List, Optional, Type
 
-from sqlalchemy import or_, func
-from sqlalchemy.orm import Session
+from sqlalchemy import or_, func, select, cast, tuple_, distinct, Float
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, selectinload
 from fastapi import HTTPException, status
 
-from src.database.models import Photo, Tag, PhotoTag, User, Rating
-from src.schemas import PhotoOut, UserOut, PhotoSearchOut, RatingIn, RatingOut
-from src.conf.constant import PHOTO_SEARCH_ENUMS
+from src.database.models import (
+    Photo,
+    PhotoAsset,
+    Tag,
+    PhotoTag,
+    User,
+    Rating,
+    PhotoTransformation,
+)
+from src.schemas import (
+    PhotoOut,
+    UserOut,
+    PhotoSearchOut,
+    PhotoPageOut,
+    SimilarPhotoOut,
+    PhotoTransformationOut,
+    RatingIn,
+    RatingOut,
+)
+from src.conf.constant import NEARBY_MAX_SCANNED_ROWS, PHOTO_SEARCH_ENUMS
+from src.repository.tags import change_usage_count
+from src.services.geo import distance, geohash_cells, geohash_prefix_end
+from src.services.similar import photo_hash_index
+from src.services.tags import tag_cache
 
 
-async def upload_photo(
+def _normalize_tags(tags: List[str] | None) -> set[str]:
+    """
+    Helper function to normalize tag names given on upload (stripped, lower case, unique).
+
+    Args:
+        tags (List[str] | None): tag names
+
+    Returns:
+        set[str]: normalized, non-empty tag names
+    """
+    return {tag_name.strip().lower() for tag_name in tags or []} - {""}
+
+
+def _get_or_create_tags(tag_names: set[str], db: Session) -> dict[str, Tag]:
+    """
+    Helper function to fetch tags by name with one query and add the missing ones.
+    New tags are flushed (to get their ids), the caller commits the transaction.
+
+    Args:
+        tag_names (set[str]): normalized tag names
+        db (Session): database session
+
+    Returns:
+        dict[str, Tag]: tags by their names
+    """
+    if not tag_names:
+        return {}
+    tags = {
+        tag.tag_name: tag
+        for tag in db.query(Tag).filter(Tag.tag_name.in_(tag_names)).all()
+    }
+    for tag_name in tag_names - tags.keys():
+        tags[tag_name] = Tag(tag_name=tag_name)
+        db.add(tags[tag_name])
+    db.flush()
+    return tags
+
+
+async def get_photo_assets(
+    content_hashes: list[str], db: Session
+) -> dict[str, PhotoAsset]:
+    """
+    Get stored photos by the hashes of their content.
+
+    Args:
+         content_hashes (list[str]): SHA-256 hashes of the photos content
+         db (Session): database session
+
+    Returns:
+        dict[str, PhotoAsset]: already stored photos by their content hashes
+    """
+    if not content_hashes:
+        return {}
+    return {
+        asset.content_hash: asset
+        for asset in db.query(PhotoAsset)
+        .filter(PhotoAsset.content_hash.in_(content_hashes))
+        .all()
+    }
+
+
+async def is_photo_asset_used(file_path: str, db: Session) -> bool:
+    """
+    Check whether a stored photo is still used by any photo.
+
+    Args:
+         file_path (str): photo url
+         db (Session): database session
+
+    Returns:
+        bool: True if the stored photo must be kept
+    """
+    return (
+        db.query(PhotoAsset.id).filter(PhotoAsset.file_path == file_path).first()
+        is not None
+    )
+
+
+async def get_photos_by_file_path(file_path: str, db: Session) -> list[Photo]:
+    """
+    Get all photos using the stored photo (duplicates share one stored file).
+
+    Args:
+         file_path (str): photo url
+         db (Session): database session
+
+    Returns:
+        list[Photo]: photos with the given url, ordered by id
+    """
+    return db.query(Photo).filter(Photo.file_path == file_path).order_by(Photo.id).all()
+
+
+async def get_unprocessed_file_paths(db: Session) -> tuple[list[str], list[str]]:
+    """
+    Get the stored photos whose background processing has not finished.
+
+    Args:
+         db (Session): database session
+
+    Returns:
+        tuple[list[str], list[str]]: urls of the photos without a QR code and urls of the photos
+            without metadata (width), each url once
+    """
+    without_qr_code = (
+        db.query(Photo.file_path).filter(Photo.qr_path.is_(None)).distinct().all()
+    )
+    without_metadata = (
+        db.query(Photo.file_path).filter(Photo.width.is_(None)).distinct().all()
+    )
+    return [row.file_path for row in without_qr_code], [
+        row.file_path for row in without_metadata
+    ]
+
+
+async def set_photo_qr_code(file_path: str, qr_code_url: str, db: Session) -> None:
+    """
+    Set the QR code of the stored photo and of all photos using it which have none yet.
+
+    Args:
+         file_path (str): photo url
+         qr_code_url (str): qrcode url
+         db (Session): database session
+    """
+    db.query(Photo).filter(
+        Photo.file_path == file_path, Photo.qr_path.is_(None)
+    ).update({Photo.qr_path: qr_code_url}, synchronize_session=False)
+    db.query(PhotoAsset).filter(
+        PhotoAsset.file_path == file_path, PhotoAsset.qr_path.is_(None)
+    ).update({PhotoAsset.qr_path: qr_code_url}, synchronize_session=False)
+    db.commit()
+
+
+async def set_photo_content(
+    file_path: str, renditions: dict[str, str] | None, values: dict, db: Session
+) -> None:
+    """
+    Fill renditions and metadata of the stored photo and of all photos using it.
+    Only missing values are set, values already saved are kept.
+
+    Args:
+         file_path (str): photo url
+         renditions (dict[str, str] | None): urls of smaller versions of the photo by their names
+         values (dict): values of the photo metadata columns (perceptual hash, dimensions, size,
+            format, camera, capture time and location)
+         db (Session): database session
+    """
+    photos = await get_photos_by_file_path(file_path, db)
+    for photo in photos:
+        if renditions and not photo.renditions:
+            photo.renditions = renditions
+        for column, value in values.items():
+            if getattr(photo, column) is None:
+                setattr(photo, column, value)
+    if renditions:
+        for asset in db.query(PhotoAsset).filter(PhotoAsset.file_path == file_path):
+            if not asset.renditions:
+                asset.renditions = renditions
+    db.commit()
+    for photo in photos:
+        if photo.dhash is not None:
+            photo_hash_index.add(photo.id, photo.dhash)
+
+
+def _acquire_assets(
+    stored: dict[str, tuple[str, str | None, dict[str, str] | None]],
+    usage: Counter,
+    db: Session,
+) -> dict[str, PhotoAsset]:
+    """
+    Helper function to add references to stored photos in the current transaction.
+    A photo stored by a concurrent upload in the meantime is used instead of the new one.
+    Reference counts are written as "ref_count = ref_count + delta".
+
+    Args:
+         stored (dict[str, tuple[str, str | None, dict[str, str] | None]]): photo url, qrcode url
+            (None until it is generated) and renditions urls by content hashes
+         usage (Counter): number of new references by content hashes
+         db (Session): database session
+
+    Returns:
+        dict[str, PhotoAsset]: stored photos by their content hashes
+    """
+    assets = {
+        asset.content_hash: asset
+        for asset in db.query(PhotoAsset)
+        .filter(PhotoAsset.content_hash.in_(list(stored)))
+        .all()
+    }
+    for content_hash, (file_path, qr_code_url, renditions) in stored.items():
+        if content_hash in assets:
+            continue
+        asset = PhotoAsset(
+            content_hash=content_hash,
+            file_path=file_path,
+            qr_path=qr_code_url,
+            renditions=renditions or None,
+            ref_count=0,
+        )
+        try:
+            with db.begin_nested():
+                db.add(asset)
+        except IntegrityError:
+            asset = (
+                db.query(PhotoAsset)
+                .filter(PhotoAsset.content_hash == content_hash)
+                .one()
+            )
+        assets[content_hash] = asset
+    for content_hash, delta in usage.items():
+        assets[content_hash].ref_count = PhotoAsset.ref_count + delta
+    return assets
+
+
+def _add_photo(
     file_path: str,
-    qr_code_url: str,
+    qr_code_url: str | None,
     user_id: int,
     description: str,
-    tags: List[str] | None,
+    tag_names: set[str],
+    tags: dict[str, Tag],
+    renditions: dict[str, str] | None,
+    metadata: dict | None,
     db: Session,
-) -> PhotoOut:
+) -> Photo:
     """
-    Upload new photo to database
+    Helper function to add a photo with its tags to the current transaction.
+    Usage counts of the tags are not changed here.
 
     Args:
          file_path (str): photo url
-         qr_code_url (str): qrcode url
+         qr_code_url (str | None): qrcode url, None until it is generated
          user_id (int): user id
          description (str): description
-         tags (List[str]): tags
+         tag_names (set[str]): normalized tag names of the photo
+         tags (dict[str, Tag]): tags by their names (must contain tag_names)
+         renditions (dict[str, str] | None): urls of smaller versions of the photo by their names
+         metadata (dict | None): values of the photo metadata columns (content hash,
+            perceptual hash, dimensions, size, format, camera, capture time)
          db (Session): database session
 
     Returns:
-        PhotoOut: PhotoOut object
+        Photo: the new photo (flushed, not committed)
     """
     new_photo = Photo(
         file_path=file_path,
         qr_path=qr_code_url,
         description=description,
         user_id=user_id,
+        renditions=renditions or None,
+        **(metadata or {}),
     )
     db.add(new_photo)
+    db.flush()
+    for tag_name in tag_names:
+        db.add(PhotoTag(photo_id=new_photo.id, tag_id=tags[tag_name].id))
+    return new_photo
+
+
+async def upload_photo(
+    file_path: str,
+    qr_code_url: str | None,
+    user_id: int,
+    description: str,
+    tags: List[str] | None,
+    db: Session,
+    renditions: dict[str, str] | None = None,
+    metadata: dict | None = None,
+) -> PhotoOut:
+    """
+    Upload new photo to database.
+    A photo with a content hash in its metadata references the stored photo with the same
+    content, which is used instead of the given urls when it already exists.
+
+    Args:
+         file_path (str): photo url
+         qr_code_url (str | None): qrcode url, None until it is generated
+         user_id (int): user id
+         description (str): description
+         tags (List[str]): tags
+         db (Session): database session
+         renditions (dict[str, str] | None): urls of smaller versions of the photo by their names
+         metadata (dict | None): values of the photo metadata columns
+
+    Returns:
+        PhotoOut: PhotoOut object
+    """
+    tag_names = _normalize_tags(tags)
+    photo_tags = _get_or_create_tags(tag_names, db)
+    content_hash = (metadata or {}).get("content_hash")
+    if content_hash:
+        asset = _acquire_assets(
+            {content_hash: (file_path, qr_code_url, renditions)},
+            Counter([content_hash]),
+            db,
+        )[content_hash]
+        file_path, qr_code_url, renditions = (
+            asset.file_path,
+            asset.qr_path,
+            asset.renditions,
+        )
+    new_photo = _add_photo(
+        file_path,
+        qr_code_url,
+        user_id,
+        description,
+        tag_names,
+        photo_tags,
+        renditions,
+        metadata,
+        db,
+    )
+    for tag in photo_tags.values():
+        change_usage_count(tag, 1)
     db.commit()
-    if tags:
-        for tag_name in set(tags):
-            tag_name = tag_name.strip().lower()
-            if tag_name:
-                tag = db.query(Tag).filter(Tag.tag_name == tag_name).first()
-                if not tag:
-                    tag = Tag(tag_name=tag_name)
-                    db.add(tag)
-                    db.commit()
-                    db.refresh(tag)
-                photo_tag = PhotoTag(photo_id=new_photo.id, tag_id=tag.id)
-                db.add(photo_tag)
-        db.commit()
+    for tag in photo_tags.values():
+        tag_cache.change_usage(tag.id, tag.tag_name, 1)
     db.refresh(new_photo)
+    if new_photo.dhash is not None:
+        photo_hash_index.add(new_photo.id, new_photo.dhash)
     return PhotoOut.model_validate(new_photo)
 
 
+async def upload_photos(
+    photos: list[
+        tuple[str, str, str, List[str] | None, dict[str, str] | None, dict | None]
+    ],
+    user_id: int,
+    db: Session,
+) -> list[PhotoOut]:
+    """
+    Upload many new photos to database in a single transaction.
+    Photos with the same content hash reference the same stored photo.
+
+    Args:
+         photos (list[tuple[str, str, str, List[str] | None, dict[str, str] | None, dict | None]]):
+            photo url, qrcode url, description, tags, renditions urls and metadata of every photo
+         user_id (int): user id
+         db (Session): database session
+
+    Returns:
+        list[PhotoOut]: PhotoOut objects in the same order as photos
+    """
+    photos_tag_names = [_normalize_tags(photo[3]) for photo in photos]
+    tags = _get_or_create_tags(set().union(*photos_tag_names), db)
+    content_hashes = [(photo[5] or {}).get("content_hash") for photo in photos]
+    assets = _acquire_assets(
+        {
+            content_hash: (photo[0], photo[1], photo[4])
+            for photo, content_hash in zip(photos, content_hashes)
+            if content_hash
+        },
+        Counter(content_hash for content_hash in content_hashes if content_hash),
+        db,
+    )
+    new_photos = []
+    for (
+        (
+            file_path,
+            qr_code_url,
+            description,
+            _,
+            renditions,
+            metadata,
+        ),
+        tag_names,
+        content_hash,
+    ) in zip(photos, photos_tag_names, content_hashes):
+        if content_hash:
+            asset = assets[content_hash]
+            file_path, qr_code_url, renditions = (
+                asset.file_path,
+                asset.qr_path,
+                asset.renditions,
+            )
+        new_photos.append(
+            _add_photo(
+                file_path,
+                qr_code_url,
+                user_id,
+                description,
+                tag_names,
+                tags,
+                renditions,
+                metadata,
+                db,
+            )
+        )
+    usage = Counter(
+        tag_name for tag_names in photos_tag_names for tag_name in tag_names
+    )
+    for tag_name, delta in usage.items():
+        change_usage_count(tags[tag_name], delta)
+    db.commit()
+    for tag_name, delta in usage.items():
+        tag_cache.change_usage(tags[tag_name].id, tag_name, delta)
+    for new_photo in new_photos:
+        db.refresh(new_photo)
+        if new_photo.dhash is not None:
+            photo_hash_index.add(new_photo.id, new_photo.dhash)
+    return [PhotoOut.model_validate(new_photo) for new_photo in new_photos]
+
+
 async def get_photo_by_id(photo_id: int, db: Session) -> PhotoOut:
     """
     Get photo by id
@@ -114,6 +495,7 @@ def update_photo_description(
 async def delete_photo(photo_id: int, user: UserOut, db: Session) -> PhotoOut:
     """
     Delete a photo from the database if it belongs to the specified user or if the user is administrator.
+    The stored photo it references is deleted from the database when no other photo uses it.
 
     Args:
         photo_id (int): The ID of the photo to be deleted.
@@ -133,8 +515,22 @@ async def delete_photo(photo_id: int, user: UserOut, db: Session) -> PhotoOut:
             status_code=status.HTTP_404_NOT_FOUND, detail="Photo not found"
         )
     if photo.user_id == user.id or user.role == "admin":
+        photo_tags = list(photo.tags)
+        for tag in photo_tags:
+            change_usage_count(tag, -1)
+        asset = photo.asset
         db.delete(photo)
+        if asset:
+            asset.ref_count = PhotoAsset.ref_count - 1
+            db.flush()
+            db.refresh(asset)
+            if asset.ref_count <= 0:
+                db.delete(asset)
         db.commit()
+        for tag in photo_tags:
+            tag_cache.change_usage(tag.id, tag.tag_name, -1)
+        if photo.dhash is not None:
+            photo_hash_index.remove(photo.id, photo.dhash)
         return PhotoOut.model_validate(photo)
     raise HTTPException(
         status_code=status.HTTP_403_FORBIDDEN,
@@ -143,28 +539,176 @@ async def delete_photo(photo_id: int, user: UserOut, db: Session) -> PhotoOut:
 
 
 async def add_transformation(
-    photo: Photo, transform_photo_url: str, params: list, db: Session
-) -> PhotoOut:
+    photo: Photo,
+    transform_photo_url: str,
+    params: list,
+    param_hash: str,
+    db: Session,
+) -> PhotoTransformationOut:
     """
-    Add a new transformation to the photo.
+    Add a new transformation to the photo, an already applied transformation is returned as it is.
 
     Args:
          photo (PhotoOut): Photo object to be transformed.
          transform_photo_url (str): The url of the transformation.
          params (list): List of parameters to be passed to the transformation.
+         param_hash (str): The hash of the canonical transformation parameters.
          db (Session): database session
 
     Returns:
-        PhotoOut: Photo object with transformed photo.
+        PhotoTransformationOut: The transformation of the photo.
+    """
+    query = db.query(PhotoTransformation).filter(
+        PhotoTransformation.photo_id == photo.id,
+        PhotoTransformation.param_hash == param_hash,
+    )
+    transformation = query.first()
+    if transformation:
+        return PhotoTransformationOut.model_validate(transformation)
+    transformation = PhotoTransformation(
+        photo_id=photo.id, param_hash=param_hash, url=transform_photo_url, params=params
+    )
+    db.add(transformation)
+    try:
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        return PhotoTransformationOut.model_validate(query.one())
+    db.refresh(transformation)
+    return PhotoTransformationOut.model_validate(transformation)
+
+
+async def get_transformation(
+    photo_id: int, transformation_id: int, db: Session
+) -> PhotoTransformationOut:
+    """
+    Get a transformation of the photo.
+
+    Args:
+        photo_id (int): photo id
+        transformation_id (int): transformation id
+        db (Session): database session
+
+    Returns:
+        PhotoTransformationOut: the transformation
+
+    Raises:
+        HTTPException: 404 Not Found if the transformation does not exist
+    """
+    transformation = (
+        db.query(PhotoTransformation)
+        .filter(
+            PhotoTransformation.id == transformation_id,
+            PhotoTransformation.photo_id == photo_id,
+        )
+        .first()
+    )
+    if not transformation:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Transformation not found"
+        )
+    return PhotoTransformationOut.model_validate(transformation)
+
+
+async def add_transformations(
+    photo_id: int,
+    transformations: list[tuple[str, list, str]],
+    transformation_status: str,
+    db: Session,
+) -> list[PhotoTransformationOut]:
+    """
+    Add many transformations to the photo at once, already applied transformations are skipped.
+
+    Args:
+        photo_id (int): photo id
+        transformations (list[tuple[str, list, str]]): url, canonical parameters and their hash of every transformation
+        transformation_status (str): generation status of the new transformations
+        db (Session): database session
+
+    Returns:
+        list[PhotoTransformationOut]: the new transformations
     """
-    transformations = photo.transformation or {}
-    transformations[transform_photo_url] = params
-    photo.transformation = None
+    existing = {
+        param_hash
+        for param_hash, in db.query(PhotoTransformation.param_hash).filter(
+            PhotoTransformation.photo_id == photo_id
+        )
+    }
+    new_transformations = []
+    for url, params, param_hash in transformations:
+        if param_hash not in existing:
+            existing.add(param_hash)
+            new_transformations.append(
+                PhotoTransformation(
+                    photo_id=photo_id,
+                    param_hash=param_hash,
+                    url=url,
+                    params=params,
+                    status=transformation_status,
+                )
+            )
+    db.add_all(new_transformations)
     db.commit()
-    photo.transformation = transformations
+    return [
+        PhotoTransformationOut.model_validate(transformation)
+        for transformation in new_transformations
+    ]
+
+
+async def set_transformation_status(
+    transformation_ids: list[int], transformation_status: str, db: Session
+) -> None:
+    """
+    Set the generation status of transformations.
+
+    Args:
+        transformation_ids (list[int]): transformation ids
+        transformation_status (str): "lazy", "pending", "ready" or "failed"
+        db (Session): database session
+    """
+    db.query(PhotoTransformation).filter(
+        PhotoTransformation.id.in_(transformation_ids)
+    ).update(
+        {PhotoTransformation.status: transformation_status},
+        synchronize_session=False,
+    )
     db.commit()
-    db.refresh(photo)
-    return PhotoOut.model_validate(photo)
+
+
+async def get_transformations(
+    photo_id: int, skip: int, limit: int, db: Session
+) -> list[PhotoTransformationOut]:
+    """
+    Get transformations of the photo, the newest first.
+
+    Args:
+        photo_id (int): photo id
+        skip (int): number of transformations to skip
+        limit (int): maximum number of transformations to return
+        db (Session): database session
+
+    Returns:
+        list[PhotoTransformationOut]: transformations of the photo
+
+    Raises:
+        HTTPException: 404 Not Found if photo does not exist
+    """
+    if not db.query(Photo.id).filter(Photo.id == photo_id).first():
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Photo not found"
+        )
+    transformations = (
+        db.query(PhotoTransformation)
+        .filter(PhotoTransformation.photo_id == photo_id)
+        .order_by(PhotoTransformation.id.desc())
+        .offset(skip)
+        .limit(limit)
+        .all()
+    )
+    return [
+        PhotoTransformationOut.model_validate(transformation)
+        for transformation in transformations
+    ]
 
 
 async def get_user_photos(user_id: int, db: Session) -> list[PhotoSearchOut]:
@@ -190,6 +734,67 @@ async def get_user_photos(user_id: int, db: Session) -> list[PhotoSearchOut]:
     return [PhotoSearchOut.model_validate(photo) for photo in photos if photos]
 
 
+def _load_photo_hash_index(db: Session) -> None:
+    """
+    Helper function to rebuild the index of perceptual hashes from the database.
+
+    Args:
+        db (Session): database session
+    """
+    photo_hash_index.load(
+        db.query(Photo.id, Photo.dhash).filter(Photo.dhash.isnot(None)).yield_per(10000)
+    )
+
+
+async def get_similar_photos(
+    photo_id: int, max_distance: int, limit: int, db: Session
+) -> list[SimilarPhotoOut]:
+    """
+    Get near-duplicates of a photo (e.g. its resized or re-encoded copies) by the Hamming
+    distance of their perceptual hashes, looked up in the in-process index.
+
+    Args:
+        photo_id (int): The ID of the photo.
+        max_distance (int): The maximum Hamming distance of the hashes.
+        limit (int): The maximum number of returned photos.
+        db (Session): database session
+
+    Returns:
+        list[SimilarPhotoOut]: The most similar photos first, empty if the photo has no perceptual hash.
+
+    Raises:
+        HTTPException: 404 NOT FOUND - If the photo does not exist.
+    """
+    photo = db.query(Photo).filter(Photo.id == photo_id).first()
+    if not photo:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Photo not found"
+        )
+    if photo.dhash is None:
+        return []
+    if not photo_hash_index.is_fresh():
+        _load_photo_hash_index(db)
+    matches = [
+        match
+        for match in photo_hash_index.search(photo.dhash, max_distance)
+        if match[0] != photo_id
+    ][:limit]
+    photos = {
+        similar.id: similar
+        for similar in db.query(Photo)
+        .filter(Photo.id.in_([similar_id for similar_id, _ in matches]))
+        .all()
+    }
+    return [
+        SimilarPhotoOut(
+            **PhotoSearchOut.model_validate(photos[similar_id]).model_dump(),
+            distance=distance,
+        )
+        for similar_id, distance in matches
+        if similar_id in photos
+    ]
+
+
 async def get_photos(db: Session) -> list[PhotoSearchOut]:
     """
     Get the list of all photos.
@@ -284,3 +889,268 @@ async def rate_photo(
     db.commit()
     db.refresh(rating)
     return RatingOut.model_validate(rating)
+
+
+def _encode_cursor(sort_value, photo_id: int) -> str:
+    """
+    Encode the position of the last photo on a page as an opaque cursor.
+
+    Args:
+        sort_value (datetime | float): The value of the sort column of the last photo.
+        photo_id (int): The ID of the last photo.
+
+    Returns:
+        str: The cursor of the next page.
+    """
+    if isinstance(sort_value, datetime):
+        sort_value = sort_value.isoformat()
+    payload = json.dumps([sort_value, photo_id]).encode()
+    return base64.urlsafe_b64encode(payload).decode()
+
+
+def _decode_cursor(cursor: str, field: str) -> tuple:
+    """
+    Decode a cursor created by _encode_cursor.
+
+    Args:
+        cursor (str): The cursor of the page.
+        field (str): The sort field ('upload_date', 'rating', 'id' or 'geohash').
+
+    Returns:
+        tuple: The sort value and the ID of the last photo on the previous page.
+
+    Raises:
+        HTTPException: 400 Bad Request if the cursor is invalid.
+    """
+    try:
+        sort_value, photo_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        if field == "upload_date":
+            sort_value = datetime.fromisoformat(sort_value)
+        elif field == "id":
+            sort_value = int(sort_value)
+        elif field == "geohash":
+            if not isinstance(sort_value, str):
+                raise TypeError("geohash must be a string")
+        else:
+            sort_value = float(sort_value)
+        return sort_value, int(photo_id)
+    except (ValueError, TypeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor",
+        )
+
+
+async def get_photos_by_tags(
+    tag_names: List[str],
+    match_all: bool,
+    sort_by: str,
+    cursor: Optional[str],
+    limit: int,
+    db: Session,
+) -> PhotoPageOut:
+    """
+    Get one page of photos tagged with the given tags (exact, case-insensitive tag names).
+
+    Matching photos are found in the database with GROUP BY photo_id over photo_tags,
+    for match_all a photo has to have every tag (HAVING count(DISTINCT tag) = number of tags).
+    Pages are built with keyset pagination on (sort value, photo id).
+
+    Args:
+        tag_names (List[str]): Names of the tags.
+        match_all (bool): True if photos must have all tags, False if any of them is enough.
+        sort_by (str): Sorting criterion, either 'upload_date' or 'rating' with -desc or -asc info.
+        cursor (str | None): The next_cursor of the previous page, None for the first page.
+        limit (int): The maximum number of photos on the page.
+        db (Session): Database session.
+
+    Returns:
+        PhotoPageOut: The photos and the cursor of the next page.
+
+    Raises:
+        HTTPException: 400 Bad Request if invalid sort option or cursor is provided.
+    """
+    if sort_by not in PHOTO_SEARCH_ENUMS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid sort option: {sort_by}",
+        )
+    tag_names = {tag_name.strip().lower() for tag_name in tag_names}
+    tag_names.discard("")
+    if not tag_names:
+        return PhotoPageOut(items=[])
+    matching_photos = (
+        select(PhotoTag.photo_id)
+        .join(Tag, Tag.id == PhotoTag.tag_id)
+        .where(func.lower(Tag.tag_name).in_(tag_names))
+        .group_by(PhotoTag.photo_id)
+    )
+    if match_all:
+        matching_photos = matching_photos.having(
+            func.count(distinct(func.lower(Tag.tag_name))) == len(tag_names)
+        )
+    matching_photos = matching_photos.subquery()
+    query = db.query(Photo).join(
+        matching_photos, matching_photos.c.photo_id == Photo.id
+    )
+
+    field, sort = sort_by.split("-")
+    if field == "upload_date":
+        sort_column = Photo.upload_date
+    else:
+        ratings = (
+            select(
+                Rating.photo_id,
+                cast(func.avg(Rating.score), Float).label("average_rating"),
+            )
+            .group_by(Rating.photo_id)
+            .subquery()
+        )
+        sort_column = func.coalesce(ratings.c.average_rating, 0.0)
+        query = query.outerjoin(ratings, ratings.c.photo_id == Photo.id)
+    query = query.add_columns(sort_column.label("sort_value"))
+
+    if cursor:
+        sort_value, photo_id = _decode_cursor(cursor, field)
+        position = tuple_(sort_column, Photo.id)
+        query = query.filter(
+            position < tuple_(sort_value, photo_id)
+            if sort == "desc"
+            else position > tuple_(sort_value, photo_id)
+        )
+    if sort == "desc":
+        query = query.order_by(sort_column.desc(), Photo.id.desc())
+    else:
+        query = query.order_by(sort_column.asc(), Photo.id.asc())
+
+    rows = (
+        query.options(selectinload(Photo.tags), selectinload(Photo.ratings))
+        .limit(limit + 1)
+        .all()
+    )
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last_photo, last_sort_value = rows[-1]
+        next_cursor = _encode_cursor(last_sort_value, last_photo.id)
+    return PhotoPageOut(
+        items=[PhotoSearchOut.model_validate(photo) for photo, _ in rows],
+        next_cursor=next_cursor,
+    )
+
+
+def _nearby_scan_query(
+    cell: str, after: tuple[str, int] | None, limit: int, db: Session
+):
+    """
+    Query of the next locations in a geohash cell, in the order of the (geohash, id) index.
+
+    Args:
+        cell (str): The geohash prefix of the cell.
+        after (tuple[str, int] | None): Geohash and ID of the last location read.
+        limit (int): The maximum number of locations.
+        db (Session): Database session.
+
+    Returns:
+        Query: Rows of id, geohash, latitude and longitude.
+    """
+    query = db.query(Photo.id, Photo.geohash, Photo.latitude, Photo.longitude).filter(
+        Photo.geohash >= cell
+    )
+    end = geohash_prefix_end(cell)
+    if end is not None:
+        query = query.filter(Photo.geohash < end)
+    if after is not None:
+        query = query.filter(tuple_(Photo.geohash, Photo.id) > tuple_(*after))
+    return query.order_by(Photo.geohash, Photo.id).limit(limit)
+
+
+async def get_nearby_photos(
+    min_lat: float,
+    min_lon: float,
+    max_lat: float,
+    max_lon: float,
+    cursor: Optional[str],
+    limit: int,
+    db: Session,
+    center: tuple[float, float, float] | None = None,
+    max_scanned: int = NEARBY_MAX_SCANNED_ROWS,
+) -> PhotoPageOut:
+    """
+    Get one page of photos taken inside a bounding box, optionally only those within
+    a radius from its center, ordered by location (geohash).
+
+    The cells covering the box are read one after another, each by a range scan of the
+    (geohash, id) index in its order, so no rows are sorted and pages are built with keyset
+    pagination on (geohash, id). Locations read are filtered by exact coordinates, at most
+    about `max_scanned` of them per request: if the limit is reached first the page may be
+    shorter than `limit` and its next_cursor continues after the last location read.
+
+    Args:
+        min_lat (float): South edge of the box.
+        min_lon (float): West edge of the box.
+        max_lat (float): North edge of the box.
+        max_lon (float): East edge of the box.
+        cursor (str | None): The next_cursor of the previous page, None for the first page.
+        limit (int): The maximum number of photos on the page.
+        db (Session): Database session.
+        center (tuple[float, float, float] | None): Latitude, longitude and radius in meters
+            of the circle the photos must be taken in.
+        max_scanned (int): The number of locations read after which the search stops.
+
+    Returns:
+        PhotoPageOut: The photos and the cursor of the next page.
+
+    Raises:
+        HTTPException: 400 Bad Request if the cursor is invalid.
+        ValueError: If the box is too large to be searched by geohash cells.
+    """
+    cells = geohash_cells(min_lat, min_lon, max_lat, max_lon)
+    last = _decode_cursor(cursor, "geohash") if cursor else None
+    found = []
+    scanned = 0
+    exhausted = True
+    for cell in cells:
+        end = geohash_prefix_end(cell)
+        if last is not None and end is not None and end <= last[0]:
+            continue
+        while len(found) <= limit:
+            if scanned >= max_scanned:
+                exhausted = False
+                break
+            batch = _nearby_scan_query(cell, last, limit + 1, db).all()
+            scanned += len(batch)
+            if batch:
+                last = (batch[-1].geohash, batch[-1].id)
+            found.extend(
+                (row.geohash, row.id)
+                for row in batch
+                if min_lat <= row.latitude <= max_lat
+                and min_lon <= row.longitude <= max_lon
+                and (
+                    center is None
+                    or distance(center[0], center[1], row.latitude, row.longitude)
+                    <= center[2]
+                )
+            )
+            if len(batch) <= limit:
+                break
+        if len(found) > limit or not exhausted:
+            break
+    next_cursor = None
+    if len(found) > limit:
+        found = found[:limit]
+        next_cursor = _encode_cursor(*found[-1])
+    elif not exhausted:
+        next_cursor = _encode_cursor(*last)
+    photos = {
+        photo.id: photo
+        for photo in db.query(Photo)
+        .filter(Photo.id.in_([photo_id for _, photo_id in found]))
+        .options(selectinload(Photo.tags), selectinload(Photo.ratings))
+    }
+    photos = [photos[photo_id] for _, photo_id in found if photo_id in photos]
+    return PhotoPageOut(
+        items=[PhotoSearchOut.model_validate(photo) for photo in photos],
+        next_cursor=next_cursor,
+    )
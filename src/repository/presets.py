@@ -0,0 +1,156 @@
+from fastapi import HTTPException, status
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from src.database.models import TransformationPreset
+from src.schemas import TransformationPresetOut
+from src.services.presets import preset_cache
+
+
+def _get_preset(name: str, db: Session) -> TransformationPreset:
+    """
+    Helper function to retrieve a preset from the database.
+
+    Args:
+        name (str): The name of the preset
+        db (Session): SQLAlchemy session
+
+    Returns:
+        TransformationPreset: The preset from the database
+
+    Raises:
+        HTTPException if the preset is not found
+    """
+    preset = (
+        db.query(TransformationPreset).filter(TransformationPreset.name == name).first()
+    )
+    if not preset:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Preset not found"
+        )
+    return preset
+
+
+async def get_presets(db: Session) -> list[TransformationPresetOut]:
+    """
+    Function to retrieve all transformation presets, served from the in-process cache.
+
+    Args:
+        db (Session): SQLAlchemy session
+
+    Returns:
+        list[TransformationPresetOut]: The presets sorted by name.
+    """
+    if not preset_cache.is_fresh():
+        preset_cache.load(
+            [
+                TransformationPresetOut.model_validate(preset)
+                for preset in db.query(TransformationPreset).all()
+            ]
+        )
+    return preset_cache.all()
+
+
+async def get_preset(name: str, db: Session) -> TransformationPresetOut:
+    """
+    Function to retrieve a transformation preset by its name, served from the in-process cache.
+
+    Args:
+        name (str): The name of the preset
+        db (Session): SQLAlchemy session
+
+    Returns:
+        TransformationPresetOut: The preset.
+
+    Raises:
+        HTTPException (404_NOT_FOUND) if the preset does not exist.
+    """
+    await get_presets(db)
+    preset = preset_cache.get(name)
+    if not preset:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Preset not found"
+        )
+    return preset
+
+
+async def create_preset(
+    name: str, params: list[dict], param_hash: str, db: Session
+) -> TransformationPresetOut:
+    """
+    Function to create a transformation preset.
+
+    Args:
+        name (str): The name of the preset
+        params (list[dict]): The canonical transformation parameters
+        param_hash (str): The hash of the parameters
+        db (Session): SQLAlchemy session
+
+    Returns:
+        TransformationPresetOut: The new preset.
+
+    Raises:
+        HTTPException (409_CONFLICT) if a preset with this name already exists.
+    """
+    preset = TransformationPreset(name=name, params=params, param_hash=param_hash)
+    db.add(preset)
+    try:
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Preset with this name already exists",
+        )
+    db.refresh(preset)
+    preset_cache.clear()
+    return TransformationPresetOut.model_validate(preset)
+
+
+async def update_preset(
+    name: str, params: list[dict], param_hash: str, db: Session
+) -> TransformationPresetOut:
+    """
+    Function to change parameters of a transformation preset.
+
+    Args:
+        name (str): The name of the preset
+        params (list[dict]): The canonical transformation parameters
+        param_hash (str): The hash of the parameters
+        db (Session): SQLAlchemy session
+
+    Returns:
+        TransformationPresetOut: The updated preset.
+
+    Raises:
+        HTTPException (404_NOT_FOUND) if the preset does not exist.
+    """
+    preset = _get_preset(name, db)
+    preset.params = params
+    preset.param_hash = param_hash
+    db.commit()
+    db.refresh(preset)
+    preset_cache.clear()
+    return TransformationPresetOut.model_validate(preset)
+
+
+async def delete_preset(name: str, db: Session) -> TransformationPresetOut:
+    """
+    Function to delete a transformation preset. Transformations already made with it are kept.
+
+    Args:
+        name (str): The name of the preset
+        db (Session): SQLAlchemy session
+
+    Returns:
+        TransformationPresetOut: The deleted preset.
+
+    Raises:
+        HTTPException (404_NOT_FOUND) if the preset does not exist.
+    """
+    preset = _get_preset(name, db)
+    preset_out = TransformationPresetOut.model_validate(preset)
+    db.delete(preset)
+    db.commit()
+    preset_cache.clear()
+    return preset_out
@@ -1,8 +1,10 @@
 from fastapi import HTTPException, status
+from sqlalchemy import func, select, update
 from sqlalchemy.orm import Session
 
-from src.schemas import TagOut, UserOut
+from src.schemas import TagOut, TagUsageOut, UserOut
 from src.database.models import Photo, Tag, PhotoTag
+from src.services.tags import tag_cache
 
 
 def _get_photo(photo_id: int, db: Session) -> Photo:
@@ -49,6 +51,36 @@ def _get_tag(tag_id: int, db: Session) -> Tag:
     return tag
 
 
+def change_usage_count(tag: Tag, delta: int) -> None:
+    """
+    Helper function to change the number of photos using the tag.
+    The change is written as "usage_count = usage_count + delta", so concurrent
+    requests do not overwrite each other. It is saved with the next commit.
+
+    Args:
+        tag (Tag): The tag to update
+        delta (int): The change of the number of photos using the tag
+    """
+    tag.usage_count = Tag.usage_count + delta
+
+
+def _delete_tag_if_unused(tag: Tag, db: Session) -> None:
+    """
+    Helper function to delete a tag which is no longer used by any photo,
+    otherwise the tag cache is updated with the lower usage count.
+
+    Args:
+        tag (Tag): The tag after its connection with a photo was deleted and committed
+        db (Session): SQLAlchemy session
+    """
+    if tag.usage_count > 0:
+        tag_cache.change_usage(tag.id, tag.tag_name, -1)
+        return
+    tag_cache.remove(tag.tag_name)
+    db.delete(tag)
+    db.commit()
+
+
 async def get_tags(photo_id: int, db: Session) -> list[TagOut]:
     """
     Function to retrieve a list of tags from the database.
@@ -113,7 +145,9 @@ async def add_tag(
         )
     photo_tag = PhotoTag(photo_id=photo_id, tag_id=tag.id)
     db.add(photo_tag)
+    change_usage_count(tag, 1)
     db.commit()
+    tag_cache.change_usage(tag.id, tag.tag_name, 1)
     db.refresh(photo)
     return [tags for tags in photo.tags if tags]
 
@@ -169,11 +203,11 @@ async def update_tag(
     photo_tag = PhotoTag(photo_id=photo_id, tag_id=new_tag.id)
     db.add(photo_tag)
     db.delete(photo_tag_old)
+    change_usage_count(new_tag, 1)
+    change_usage_count(tag, -1)
     db.commit()
-    photo_tags = db.query(PhotoTag).filter(PhotoTag.tag_id == tag.id).all()
-    if not photo_tags:
-        db.delete(tag)
-        db.commit()
+    tag_cache.change_usage(new_tag.id, new_tag.tag_name, 1)
+    _delete_tag_if_unused(tag, db)
     db.refresh(photo)
     return [tags for tags in photo.tags if tags]
 
@@ -203,17 +237,142 @@ async def delete_tag(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Only the photo owner, moderator or admin can delete tags",
         )
-    photo_tags = db.query(PhotoTag).filter(PhotoTag.tag_id == tag.id).all()
-    if len(photo_tags) > 1:
-        photo_tag = (
-            db.query(PhotoTag)
-            .filter(PhotoTag.photo_id == photo_id, PhotoTag.tag_id == tag_id)
-            .first()
-        )
+    photo_tag = (
+        db.query(PhotoTag)
+        .filter(PhotoTag.photo_id == photo_id, PhotoTag.tag_id == tag_id)
+        .first()
+    )
+    if photo_tag:
         db.delete(photo_tag)
+        change_usage_count(tag, -1)
         db.commit()
-    else:
-        db.delete(tag)
-        db.commit()
+        _delete_tag_if_unused(tag, db)
     db.refresh(photo)
     return [tags for tags in photo.tags if tags]
+
+
+def _escape_like(value: str) -> str:
+    """
+    Helper function to escape LIKE wildcards in user input.
+
+    Args:
+        value (str): The value to escape
+
+    Returns:
+        str: The value safe to use as a LIKE pattern (with "\\" as the escape character)
+    """
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def _tags_with_usage_query(db: Session):
+    """
+    Helper function to build a query returning (id, tag_name, usage_count) rows.
+
+    Args:
+        db (Session): SQLAlchemy session
+
+    Returns:
+        Query: The query sorted by usage count (descending) and tag name
+    """
+    return db.query(Tag.id, Tag.tag_name, Tag.usage_count).order_by(
+        Tag.usage_count.desc(), Tag.tag_name
+    )
+
+
+def _load_tag_cache(db: Session) -> None:
+    """
+    Helper function to (re)load the in-process tag cache with the most used tags.
+
+    Args:
+        db (Session): SQLAlchemy session
+    """
+    rows = _tags_with_usage_query(db).limit(tag_cache.max_size + 1).all()
+    tag_cache.load(
+        [tuple(row) for row in rows[: tag_cache.max_size]],
+        complete=len(rows) <= tag_cache.max_size,
+    )
+
+
+async def suggest_tags(prefix: str, limit: int, db: Session) -> list[TagUsageOut]:
+    """
+    Function to suggest the most used tags starting with the given prefix.
+
+    Suggestions are served from the in-process tag cache, the database (lower(tag_name)
+    prefix index) is asked only when the cache cannot answer the query.
+
+    Args:
+        prefix (str): The beginning of the tag name (case-insensitive)
+        limit (int): The maximum number of suggestions
+        db (Session): SQLAlchemy session
+
+    Returns:
+        list[TagUsageOut]: The list of tags sorted by the number of photos using them.
+    """
+    prefix = prefix.strip().lower()
+    if not tag_cache.is_fresh():
+        _load_tag_cache(db)
+    rows = tag_cache.suggest(prefix, limit)
+    if rows is None:
+        rows = (
+            _tags_with_usage_query(db)
+            .filter(
+                func.lower(Tag.tag_name).like(f"{_escape_like(prefix)}%", escape="\\")
+            )
+            .limit(limit)
+            .all()
+        )
+    return [
+        TagUsageOut(id=tag_id, tag_name=tag_name, usage_count=usage_count)
+        for tag_id, tag_name, usage_count in rows
+    ]
+
+
+async def get_popular_tags(limit: int, db: Session) -> list[TagUsageOut]:
+    """
+    Function to retrieve the most used tags (e.g. for a tag cloud).
+
+    Tags are served from the in-process tag cache, the database is asked only
+    when more tags are requested than the cache holds.
+
+    Args:
+        limit (int): The maximum number of tags
+        db (Session): SQLAlchemy session
+
+    Returns:
+        list[TagUsageOut]: The list of tags sorted by the number of photos using them.
+    """
+    if not tag_cache.is_fresh():
+        _load_tag_cache(db)
+    rows = tag_cache.popular(limit)
+    if rows is None:
+        rows = _tags_with_usage_query(db).limit(limit).all()
+    return [
+        TagUsageOut(id=tag_id, tag_name=tag_name, usage_count=usage_count)
+        for tag_id, tag_name, usage_count in rows
+    ]
+
+
+async def recount_tags_usage(db: Session) -> int:
+    """
+    Function to repair usage counts of all tags by recounting them from photo_tags.
+
+    Args:
+        db (Session): SQLAlchemy session
+
+    Returns:
+        int: The number of tags whose usage count was wrong and has been fixed.
+    """
+    photo_count = (
+        select(func.count(PhotoTag.photo_id))
+        .where(PhotoTag.tag_id == Tag.id)
+        .scalar_subquery()
+    )
+    result = db.execute(
+        update(Tag)
+        .where(Tag.usage_count != photo_count)
+        .values(usage_count=photo_count)
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+    tag_cache.clear()
+    return result.rowcount
@@ -1,13 +1,18 @@
-from typing import Optional, List
+from typing import Optional, List, Iterator
 
 from libgravatar import Gravatar
-from sqlalchemy import func
-from sqlalchemy.orm import Session
+from sqlalchemy import func, exists
+from sqlalchemy.orm import Session, Query, aliased
 from fastapi import HTTPException, status
 
 from src.database.models import User, Photo, Tag
-from src.schemas import UserIn, UserOut, UserPublicProfile
+from src.schemas import UserIn, UserOut, UserPublicProfile, UsersFilter
 from src.services.auth import auth_service
+from src.conf.constant import (
+    USER_SEARCH_ENUMS,
+    USERS_PAGE_DEFAULT_LIMIT,
+    USERS_EXPORT_BATCH_SIZE,
+)
 
 
 async def count_users(db: Session):
@@ -138,17 +143,75 @@ async def update_avatar(email, url: str, db: Session) -> UserOut:
     )
 
 
-async def get_users(db: Session) -> list[UserOut]:
+def _filter_users(query: Query, filters: UsersFilter | None) -> Query:
     """
-    Retrieves all users from the database.
+    Apply the filters to a query of users.
+
+    Args:
+        query (Query): The query of users.
+        filters (UsersFilter | None): The filters, None means no filtering.
+
+    Returns:
+        Query: The filtered query.
+    """
+    if filters is None:
+        return query
+    if filters.role is not None:
+        query = query.filter(User.role == filters.role.value)
+    if filters.is_active is not None:
+        query = query.filter(User.is_active == filters.is_active)
+    if filters.confirmed is not None:
+        query = query.filter(User.confirmed == filters.confirmed)
+    if filters.created_from is not None:
+        query = query.filter(User.created_at >= filters.created_from)
+    if filters.created_to is not None:
+        query = query.filter(User.created_at < filters.created_to)
+    return query
+
+
+async def get_users(
+    db: Session,
+    filters: UsersFilter | None = None,
+    skip: int = 0,
+    limit: int = USERS_PAGE_DEFAULT_LIMIT,
+) -> list[UserOut]:
+    """
+    Retrieves a page of users from the database.
 
     Parameters:
     - db (Session): Database session dependency.
+    - filters (UsersFilter | None): Filters of the list (role, is_active, confirmed, created_at range).
+    - skip (int): The number of users to skip.
+    - limit (int): The maximum number of returned users.
 
     Returns:
     list[UserOut]: The list of users.
     """
-    return db.query(User).all()
+    query = _filter_users(db.query(User), filters)
+    return query.order_by(User.id).offset(skip).limit(limit).all()
+
+
+def iter_users(
+    db: Session,
+    filters: UsersFilter | None = None,
+    batch_size: int = USERS_EXPORT_BATCH_SIZE,
+) -> Iterator[User]:
+    """
+    Iterates over all users matching the filters without loading them all into memory.
+
+    Rows are fetched in batches with a server-side cursor (yield_per), so memory usage
+    does not depend on the number of users.
+
+    Parameters:
+    - db (Session): Database session dependency.
+    - filters (UsersFilter | None): Filters of the list (role, is_active, confirmed, created_at range).
+    - batch_size (int): The number of users fetched from the database at once.
+
+    Yields:
+    User: The next user.
+    """
+    query = _filter_users(db.query(User), filters).order_by(User.id)
+    yield from query.yield_per(batch_size)
 
 
 async def set_user_role(user_id: int, role: str, db: Session) -> UserOut:
@@ -279,31 +342,79 @@ async def update_current_user_profile(
 
 
 async def admin_moderator_search_users_with_photos(
-    username: Optional[str], description: Optional[str], tag: Optional[str], db: Session
+    username: Optional[str],
+    description: Optional[str],
+    tag: Optional[str],
+    db: Session,
+    sort_by: str = USER_SEARCH_ENUMS[0],
+    skip: int = 0,
+    limit: int = USERS_PAGE_DEFAULT_LIMIT,
 ) -> List[UserPublicProfile]:
-    query = db.query(User).join(Photo, User.id == Photo.user_id).distinct()
+    """
+    Search users having photos, with the number of their photos, in a single query.
 
-    if username:
-        query = query.filter(User.username.ilike(f"%{username}%"))
-    if description:
-        query = query.filter(Photo.description.ilike(f"%{description}%"))
-    if tag:
-        query = query.join(Photo.tags).filter(Tag.tag_name.ilike(f"%{tag}%"))
+    Photo counts are computed with GROUP BY in the same statement, description and
+    tag filters are applied with a correlated EXISTS, so photo_count is always
+    the number of all photos of the user.
 
-    query = query.group_by(User.id).order_by(User.created_at.desc())
+    Args:
+        username (str | None): Part of the username.
+        description (str | None): Part of the description of any photo of the user.
+        tag (str | None): Part of the tag name of any photo of the user.
+        db (Session): The database session.
+        sort_by (str): Sorting criterion, one of USER_SEARCH_ENUMS.
+        skip (int): The number of users to skip.
+        limit (int): The maximum number of returned users.
 
-    user_list = query.all()
-    if not user_list:
-        return []
+    Returns:
+        List[UserPublicProfile]: Users matching the search criteria.
+
+    Raises:
+        HTTPException: 400 Bad Request if invalid sort option is provided.
+    """
+    if sort_by not in USER_SEARCH_ENUMS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid sort option: {sort_by}",
+        )
+    photo_count = func.count(Photo.id).label("photo_count")
+    query = db.query(User.id, User.username, User.avatar, photo_count).join(
+        Photo, User.id == Photo.user_id
+    )
+
+    if username:
+        query = query.filter(User.username.ilike(f"%{username}%"))
+    if description or tag:
+        matching_photo = aliased(Photo)
+        matching_photos = exists().where(matching_photo.user_id == User.id)
+        if description:
+            matching_photos = matching_photos.where(
+                matching_photo.description.ilike(f"%{description}%")
+            )
+        if tag:
+            matching_photos = matching_photos.where(
+                matching_photo.tags.any(Tag.tag_name.ilike(f"%{tag}%"))
+            )
+        query = query.filter(matching_photos)
+
+    field, sort = sort_by.split("-")
+    sort_column = {
+        "created_at": User.created_at,
+        "username": User.username,
+        "photo_count": photo_count,
+    }[field]
+    query = query.group_by(User.id, User.username, User.avatar).order_by(
+        sort_column.desc() if sort == "desc" else sort_column.asc(),
+        User.id.desc() if sort == "desc" else User.id.asc(),
+    )
+    users_with_photo_count = query.offset(skip).limit(limit).all()
 
     return [
         UserPublicProfile(
-            id=user.id,
-            username=user.username,
-            avatar=user.avatar,
-            photo_count=db.query(func.count(Photo.id))
-            .filter(Photo.user_id == user.id)
-            .scalar(),
+            id=user_id,
+            username=user_name,
+            avatar=avatar,
+            photo_count=user_photo_count,
         )
-        for user in user_list
+        for user_id, user_name, avatar, user_photo_count in users_with_photo_count
     ]
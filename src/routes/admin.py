@@ -1,28 +1,57 @@
-from typing import List, Optional
+import csv
+import io
+from typing import List, Optional, Iterator
 from sqlalchemy.orm import Session
-from src.database.db import get_db
+from src.database.db import SessionLocal, get_db, db_pool_stats
 from src.database.models import User
 from fastapi import APIRouter, HTTPException, Depends, status, Query
+from fastapi.responses import StreamingResponse
 from src.services.auth import auth_service
 from src.repository import users as repository_users
-from src.schemas import UserOut, UserRole, UserPublicProfile
+from src.repository import tags as repository_tags
+from src.repository import presets as repository_presets
+from src.services import photos as photos_services
+from src.conf.redis_conf import redis_pool_stats
+from src.schemas import (
+    UserOut,
+    UserRole,
+    UserPublicProfile,
+    UsersFilter,
+    UserExport,
+    TransformationParameters,
+    TransformationPresetIn,
+    TransformationPresetOut,
+)
+from src.conf.constant import (
+    USER_SEARCH_ENUMS,
+    USERS_PAGE_DEFAULT_LIMIT,
+    USERS_PAGE_MAX_LIMIT,
+    USERS_EXPORT_FORMATS,
+)
 
 router = APIRouter(prefix="/admin", tags=["admin"])
 
 
 @router.get("/", response_model=list[UserOut])
 async def get_users(
+    filters: UsersFilter = Depends(),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(USERS_PAGE_DEFAULT_LIMIT, ge=1, le=USERS_PAGE_MAX_LIMIT),
     db: Session = Depends(get_db),
     current_user: User = Depends(auth_service.get_current_user),
 ):
     """
-    Retrieves all users from the database.
+    Retrieves a page of users from the database.
 
     Args:
+        filters (UsersFilter): Filters of the list (role, is_active, confirmed, created_at range).
+        skip (int): The number of users to skip.
+        limit (int): The maximum number of returned users.
         db (Session, optional): Database session dependency.
         current_user (User): Current authenticated user.
 
     Returns:
+        list[UserOut]: The page of users.
 
     Raises:
         HTTPException: 403 FORBIDDEN - If the current user is not an admin.
@@ -33,7 +62,113 @@ async def get_users(
             detail="Only admin can get all users list.",
         )
 
-    return await repository_users.get_users(db)
+    return await repository_users.get_users(db, filters, skip, limit)
+
+
+def _users_to_ndjson(users: Iterator[User]) -> Iterator[str]:
+    """
+    Converts users to newline delimited JSON, one line per user.
+
+    Args:
+        users (Iterator[User]): The users to convert.
+
+    Yields:
+        str: The next line.
+    """
+    for user in users:
+        yield UserExport.model_validate(user).model_dump_json() + "\n"
+
+
+def _users_to_csv(users: Iterator[User]) -> Iterator[str]:
+    """
+    Converts users to CSV with a header row.
+
+    Args:
+        users (Iterator[User]): The users to convert.
+
+    Yields:
+        str: The next line.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    fields = list(UserExport.model_fields)
+    writer.writerow(fields)
+    for user in users:
+        user_export = UserExport.model_validate(user).model_dump(mode="json")
+        writer.writerow([user_export[field] for field in fields])
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    yield buffer.getvalue()
+
+
+def _iter_users_in_own_session(filters: UsersFilter) -> Iterator[User]:
+    """
+    Iterates over the exported users in a session owned by the generator.
+
+    The session of the request is closed before a streamed body is sent, so the export
+    opens its own session and closes it when the stream ends (or is interrupted).
+
+    Args:
+        filters (UsersFilter): Filters of the list.
+
+    Yields:
+        User: The next user.
+    """
+    db = SessionLocal()
+    try:
+        yield from repository_users.iter_users(db, filters)
+    finally:
+        db.close()
+
+
+@router.get("/users/export")
+async def export_users(
+    filters: UsersFilter = Depends(),
+    export_format: str = Query(
+        USERS_EXPORT_FORMATS[0], alias="format", enum=USERS_EXPORT_FORMATS
+    ),
+    current_user: User = Depends(auth_service.get_current_user),
+) -> StreamingResponse:
+    """
+    Exports users as a stream of NDJSON or CSV lines.
+
+    Users are read from the database in batches while the response is being sent,
+    so memory usage does not depend on the number of users. The batches are read in
+    a session opened for the stream, which is closed when the stream ends.
+
+    Args:
+        filters (UsersFilter): Filters of the list (role, is_active, confirmed, created_at range).
+        export_format (str): 'ndjson' or 'csv'.
+        current_user (User): Current authenticated user.
+
+    Returns:
+        StreamingResponse: The exported users.
+
+    Raises:
+        HTTPException: 403 FORBIDDEN - If the current user is not an admin.
+        HTTPException: 400 BAD REQUEST - If the export format is not supported.
+    """
+    if current_user.role != "admin":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only admin can export users list.",
+        )
+    users = _iter_users_in_own_session(filters)
+    if export_format == "ndjson":
+        return StreamingResponse(
+            _users_to_ndjson(users), media_type="application/x-ndjson"
+        )
+    if export_format == "csv":
+        return StreamingResponse(
+            _users_to_csv(users),
+            media_type="text/csv",
+            headers={"Content-Disposition": "attachment; filename=users.csv"},
+        )
+    raise HTTPException(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        detail=f"Invalid export format: {export_format}",
+    )
 
 
 @router.post("/activ_status/{user_id}")
@@ -84,10 +219,254 @@ async def search_users_with_photos(
     username: Optional[str] = Query(None, description="Search by username"),
     description: Optional[str] = Query(None, description="Search by photo description"),
     tag: Optional[str] = Query(None, description="Search by photo tag"),
+    sort_by: str = Query(USER_SEARCH_ENUMS[0], enum=USER_SEARCH_ENUMS),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(USERS_PAGE_DEFAULT_LIMIT, ge=1, le=USERS_PAGE_MAX_LIMIT),
     db: Session = Depends(get_db),
     current_user: UserOut = Depends(auth_service.get_current_user),
 ) -> List[UserPublicProfile]:
+    """
+    Searches users having photos, with the number of their photos.
+
+    Args:
+        username (str | None): Part of the username
+        description (str | None): Part of the description of any photo of the user
+        tag (str | None): Part of the tag name of any photo of the user
+        sort_by (str): Sorting criterion
+        skip (int): The number of users to skip
+        limit (int): The maximum number of returned users
+        db (Session): Database session
+        current_user (UserOut): The current user
+
+    Returns:
+        List[UserPublicProfile]: Users matching the search criteria
+
+    Raises:
+        HTTPException: If the current user is not admin or moderator.
+    """
     if current_user.role not in ["admin", "moderator"]:
         raise HTTPException(status_code=403, detail="Unauthorized access")
-    users = await repository_users.admin_moderator_search_users_with_photos(username, description, tag, db)
+    users = await repository_users.admin_moderator_search_users_with_photos(
+        username, description, tag, db, sort_by, skip, limit
+    )
     return users
+
+
+@router.post("/tags/recount_usage")
+async def recount_tags_usage(
+    current_user: UserOut = Depends(auth_service.get_current_user),
+    db: Session = Depends(get_db),
+) -> dict:
+    """
+    Repairs usage counts of all tags by recounting them from the photo - tag connections.
+
+    Args:
+        current_user (UserOut): The current user
+        db (Session): Database session
+
+    Returns:
+        dict: The number of tags whose usage count has been fixed.
+
+    Raises:
+        HTTPException: If the current user is not admin.
+    """
+    if current_user.role != "admin":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only admin users are allowed to recount tags usage",
+        )
+    fixed_tags = await repository_tags.recount_tags_usage(db)
+    return {"fixed_tags": fixed_tags}
+
+
+@router.get("/redis_pool")
+async def get_redis_pool_stats(
+    current_user: UserOut = Depends(auth_service.get_current_user),
+) -> dict:
+    """
+    Reports the usage of the shared Redis connection pool.
+
+    Args:
+        current_user (UserOut): The current user
+
+    Returns:
+        dict: Maximum number of connections and numbers of connections in use and idle.
+
+    Raises:
+        HTTPException: If the current user is not admin.
+    """
+    if current_user.role != "admin":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only admin users are allowed to see Redis pool usage",
+        )
+    return redis_pool_stats()
+
+
+@router.get("/db_pool")
+async def get_db_pool_stats(
+    current_user: UserOut = Depends(auth_service.get_current_user),
+) -> dict:
+    """
+    Reports the usage of the database connection pool.
+
+    Args:
+        current_user (UserOut): The current user
+
+    Returns:
+        dict: Size of the pool, numbers of connections in use, idle and in overflow,
+            number of checkouts and checkout wait times in seconds.
+
+    Raises:
+        HTTPException: If the current user is not admin.
+    """
+    if current_user.role != "admin":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only admin users are allowed to see database pool usage",
+        )
+    return db_pool_stats()
+
+
+def _check_admin(current_user: UserOut) -> None:
+    """
+    Checks if the current user is admin.
+
+    Args:
+        current_user (UserOut): The current user
+
+    Raises:
+        HTTPException: If the current user is not admin.
+    """
+    if current_user.role != "admin":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only admin users are allowed to manage transformation presets",
+        )
+
+
+def _canonical_preset_params(
+    params: TransformationParameters,
+) -> tuple[list[dict], str]:
+    """
+    Builds canonical parameters of a preset and their hash.
+
+    Args:
+        params (TransformationParameters): The transformation parameters of the preset
+
+    Returns:
+        tuple[list[dict], str]: The canonical parameters and their hash.
+
+    Raises:
+        HTTPException: If no valid transformation is given.
+    """
+    canonical = photos_services.canonical_transformation(params)
+    if not canonical:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="No valid transformations were provided.",
+        )
+    return canonical, photos_services.transformation_hash(canonical)
+
+
+@router.get("/transformation_presets", response_model=list[TransformationPresetOut])
+async def get_transformation_presets(
+    current_user: UserOut = Depends(auth_service.get_current_user),
+    db: Session = Depends(get_db),
+) -> list[TransformationPresetOut]:
+    """
+    Retrieves all transformation presets.
+
+    Args:
+        current_user (UserOut): The current user
+        db (Session): Database session
+
+    Returns:
+        list[TransformationPresetOut]: The presets sorted by name.
+
+    Raises:
+        HTTPException: If the current user is not admin.
+    """
+    _check_admin(current_user)
+    return await repository_presets.get_presets(db)
+
+
+@router.post(
+    "/transformation_presets",
+    response_model=TransformationPresetOut,
+    status_code=status.HTTP_201_CREATED,
+)
+async def create_transformation_preset(
+    preset: TransformationPresetIn,
+    current_user: UserOut = Depends(auth_service.get_current_user),
+    db: Session = Depends(get_db),
+) -> TransformationPresetOut:
+    """
+    Creates a named transformation preset, applied with POST /photos/transformation/{photo_id}?preset=name
+    and precomputed for every new photo.
+
+    Args:
+        preset (TransformationPresetIn): The name and transformation parameters of the preset
+        current_user (UserOut): The current user
+        db (Session): Database session
+
+    Returns:
+        TransformationPresetOut: The new preset.
+
+    Raises:
+        HTTPException: If the current user is not admin, the parameters are empty or the name is taken.
+    """
+    _check_admin(current_user)
+    params, param_hash = _canonical_preset_params(preset.params)
+    return await repository_presets.create_preset(preset.name, params, param_hash, db)
+
+
+@router.put("/transformation_presets/{name}", response_model=TransformationPresetOut)
+async def update_transformation_preset(
+    name: str,
+    params: TransformationParameters,
+    current_user: UserOut = Depends(auth_service.get_current_user),
+    db: Session = Depends(get_db),
+) -> TransformationPresetOut:
+    """
+    Changes transformation parameters of a preset.
+
+    Args:
+        name (str): The name of the preset
+        params (TransformationParameters): The new transformation parameters
+        current_user (UserOut): The current user
+        db (Session): Database session
+
+    Returns:
+        TransformationPresetOut: The updated preset.
+
+    Raises:
+        HTTPException: If the current user is not admin, the parameters are empty or the preset does not exist.
+    """
+    _check_admin(current_user)
+    canonical, param_hash = _canonical_preset_params(params)
+    return await repository_presets.update_preset(name, canonical, param_hash, db)
+
+
+@router.delete("/transformation_presets/{name}", response_model=TransformationPresetOut)
+async def delete_transformation_preset(
+    name: str,
+    current_user: UserOut = Depends(auth_service.get_current_user),
+    db: Session = Depends(get_db),
+) -> TransformationPresetOut:
+    """
+    Deletes a transformation preset, transformations already made with it are kept.
+
+    Args:
+        name (str): The name of the preset
+        current_user (UserOut): The current user
+        db (Session): Database session
+
+    Returns:
+        TransformationPresetOut: The deleted preset.
+
+    Raises:
+        HTTPException: If the current user is not admin or the preset does not exist.
+    """
+    _check_admin(current_user)
+    return await repository_presets.delete_preset(name, db)
@@ -7,11 +7,12 @@ from fastapi.security import (
 from fastapi.requests import Request
 from sqlalchemy.orm import Session
 
-from src.database.db import get_db
+from src.database.db import get_db, read_from_primary
 from src.schemas import UserIn, UserOut, TokenModel, RequestEmail
 from src.repository import users as repository_users
 from src.services.auth import auth_service
 from src.services.email_service import send_email
+from src.services.rate_limit import RateLimit
 
 router = APIRouter(prefix="/auth", tags=["auth"])
 security = HTTPBearer()
@@ -54,7 +55,11 @@ async def signup(
     return new_user
 
 
-@router.post("/login", response_model=TokenModel)
+@router.post(
+    "/login",
+    response_model=TokenModel,
+    dependencies=[Depends(RateLimit("login"))],
+)
 async def login(
     body: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)
 ):
@@ -97,7 +102,11 @@ async def login(
     return TokenModel(access_token=access_token, refresh_token=refresh_token)
 
 
-@router.get("/refresh_token", response_model=TokenModel)
+@router.get(
+    "/refresh_token",
+    response_model=TokenModel,
+    dependencies=[Depends(read_from_primary)],
+)
 async def refresh_token(
     credentials: HTTPAuthorizationCredentials = Security(security),
     db: Session = Depends(get_db),
@@ -140,7 +149,7 @@ async def refresh_token(
     }
 
 
-@router.get("/confirmed_email/{token}")
+@router.get("/confirmed_email/{token}", dependencies=[Depends(read_from_primary)])
 async def confirmed_email(token: str, db: Session = Depends(get_db)):
     """
     Confirm the email address associated with the provided token.
@@ -1,15 +1,20 @@
 from sqlalchemy.orm import Session
 
 from src.database.models import Comment, User, Photo
-from src.schemas import CommentOut
-from fastapi import APIRouter, Depends, HTTPException, status
+from src.schemas import CommentOut, PhotoCommentsOut
+from fastapi import APIRouter, Depends, HTTPException, status, Query
 
 from src.services.auth import Auth
 from src.database.db import get_db
 from src.schemas import UserOut, UserRoleValid
 from src.repository import comments as comment_repository
 from src.repository import photos as photo_repository
-from src.conf.constant import MAX_COMMENT_LENGTH
+from src.conf.constant import (
+    MAX_COMMENT_LENGTH,
+    MAX_BATCH_PHOTO_IDS,
+    DEFAULT_BATCH_COMMENTS_PER_PHOTO,
+    MAX_BATCH_COMMENTS_PER_PHOTO,
+)
 
 router = APIRouter(prefix="/comments", tags=["comments"])
 auth_service = Auth()
@@ -144,3 +149,40 @@ async def get_comments(
 
     comments = await comment_repository.get_comments(photo_id, db)
     return comments
+
+
+@router.get("/batch", response_model=list[PhotoCommentsOut])
+async def get_latest_comments_for_photos(
+    photo_ids: list[int] = Query(
+        ..., description=f"IDs of the photos (max {MAX_BATCH_PHOTO_IDS})"
+    ),
+    limit: int = Query(
+        DEFAULT_BATCH_COMMENTS_PER_PHOTO,
+        ge=1,
+        le=MAX_BATCH_COMMENTS_PER_PHOTO,
+        description="Number of latest comments returned per photo",
+    ),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(auth_service.get_current_user),
+):
+    """
+    Get the latest comments for many photos in one request (e.g. gallery previews).
+
+    Parameters:
+        - photo_ids (list[int]): The IDs of the photos for which comments are to be downloaded.
+        - limit (int): Number of latest comments returned per photo.
+        - db (Session, optional): Database session dependency.
+        - current_user (User, optional): Current authenticated user.
+
+    Returns:
+        list[PhotoCommentsOut]: The latest comments for every requested photo.
+
+    Raises:
+        HTTPException: 400 BAD REQUEST - If too many photo IDs are requested.
+    """
+    if len(photo_ids) > MAX_BATCH_PHOTO_IDS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"You can request comments for max {MAX_BATCH_PHOTO_IDS} photos at once.",
+        )
+    return await comment_repository.get_latest_comments_for_photos(photo_ids, limit, db)
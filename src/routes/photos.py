@@ -1,3 +1,4 @@
+import logging
 from typing import List, Optional
 
 from fastapi import (
@@ -9,36 +10,141 @@ from fastapi import (
     HTTPException,
     status,
     Query,
+    Request,
+    Header,
+    Response,
+    Path,
+    BackgroundTasks,
 )
+from redis.exceptions import RedisError
+from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.orm import Session
 
 from src.database.db import get_db
 from src.database.models import User, Photo
 from src.schemas import (
     PhotoOut,
+    PhotoBatchItemOut,
     UserOut,
     TransformationParameters,
     PhotoSearchOut,
     RatingIn,
     RatingOut,
     TagIn,
+    SignedUploadOut,
+    SignedUploadComplete,
+    ResumableUploadOut,
+    PhotoTransformationOut,
+    SimilarPhotoOut,
+    PhotoPageOut,
 )
 from src.services.auth import auth_service
 from src.repository import photos as photos_repository
+from src.repository import presets as presets_repository
+from src.services import jobs
 from src.services import photos as photos_services
+from src.services.geo import radius_bbox
+from src.services.rate_limit import RateLimit
+from src.services.uploads import resumable_uploads
 from src.conf.constant import (
+    MAX_BATCH_UPLOAD_FILES,
     MAX_DESCRIPTION_LENGTH,
     MAX_TAG_NAME_LENGTH,
+    MAX_UPLOAD_BYTES,
     PHOTO_SEARCH_ENUMS,
+    PHOTO_PAGE_DEFAULT_LIMIT,
+    PHOTO_PAGE_MAX_LIMIT,
+    SIMILAR_PHOTOS_DEFAULT_DISTANCE,
+    SIMILAR_PHOTOS_MAX_DISTANCE,
+    MAX_NEARBY_RADIUS,
 )
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter(prefix="/photos", tags=["photos"])
 
+UPLOAD_ID_PATTERN = "^[0-9a-f]{32}$"
+
+
+def _validate_photo_form(description: str, tags: str) -> list[str]:
+    """
+    Validates description and tags given with an uploaded photo.
+
+    Args:
+        description (str): The description of the photo.
+        tags (str): Comma separated tags.
+
+    Returns:
+        list[str]: The list of tags.
+
+    Raises:
+        HTTPException: If the description or tag_name are too long or empty, or if you try to add to many tags.
+    """
+    if len(description) > MAX_DESCRIPTION_LENGTH:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Description must be less than {MAX_DESCRIPTION_LENGTH} characters",
+        )
+    if len(description.strip()) == 0:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Description cannot be an empty string",
+        )
+    if not tags:
+        return []
+    tags = tags.split(",")
+    if len(tags) > 5:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Too many tags provided. You can use max of 5 tags.",
+        )
+    for tag in tags:
+        if len(tag) > MAX_TAG_NAME_LENGTH:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Tag name must be less than {MAX_TAG_NAME_LENGTH} characters.",
+            )
+    return tags
+
+
+async def _enqueue_photo_jobs(photos: list[PhotoOut], db: Session) -> None:
+    """
+    Queues background processing of new photos: QR codes, renditions, perceptual hashes
+    and metadata of their files (once per file) and precomputing transformation presets.
+
+    The photos are already saved, so a queue failure is only logged: the upload succeeds
+    and the worker queues the missing processing when it starts
+    (photos_services.enqueue_unprocessed_photos).
+
+    Args:
+        photos (list[PhotoOut]): The new photos.
+        db (Session): A database session.
+    """
+    try:
+        for file_path in dict.fromkeys(
+            photo.file_path for photo in photos if not photo.qr_path
+        ):
+            await jobs.enqueue("create_qr_code", file_path=file_path)
+        for file_path in dict.fromkeys(
+            photo.file_path
+            for photo in photos
+            if not photo.renditions or photo.width is None
+        ):
+            await jobs.enqueue("process_photo_content", file_path=file_path)
+        if await presets_repository.get_presets(db):
+            for photo in photos:
+                await jobs.enqueue(
+                    "apply_presets", photo_id=photo.id, photo_url=photo.file_path
+                )
+    except (RedisError, OSError):
+        logger.exception("Processing of uploaded photos could not be queued")
+
 
 @router.post(
     "/",
     response_model=PhotoOut,
     status_code=status.HTTP_201_CREATED,
+    dependencies=[Depends(RateLimit("upload"))],
 )
 async def upload_photo(
     file: UploadFile = File(),
@@ -50,6 +156,9 @@ async def upload_photo(
     """
     Uploads a new photo to the database.
 
+    The response is returned as soon as the original is stored, its QR code, renditions
+    and metadata are filled in by background jobs.
+
     Args:
         file (UploadFile): A file to be uploaded.
         description (str): The description of the photo.
@@ -63,35 +172,479 @@ async def upload_photo(
     Raises:
           HTTPException: If the description or tag_name are too long or empty, or if you try to add to many tags.
     """
-    if len(description) > MAX_DESCRIPTION_LENGTH:
+    tags = _validate_photo_form(description, tags[0] if tags else "")
+    photo_url, qr_code_url, renditions, metadata = (
+        await photos_services.store_unique_photo(file.file, db)
+    )
+    new_photo = await photos_repository.upload_photo(
+        photo_url,
+        qr_code_url,
+        current_user.id,
+        description,
+        tags,
+        db,
+        renditions,
+        metadata,
+    )
+    await _enqueue_photo_jobs([new_photo], db)
+    return new_photo
+
+
+@router.post(
+    "/signed_upload",
+    response_model=SignedUploadOut,
+    dependencies=[Depends(RateLimit("upload"))],
+)
+async def create_signed_upload(
+    current_user: UserOut = Depends(auth_service.get_current_user),
+) -> SignedUploadOut:
+    """
+    Issues signed parameters for uploading a photo directly to Cloudinary.
+
+    The client posts the file with these parameters to upload_url and then finishes
+    the upload with POST /photos/signed_upload/complete.
+
+    Args:
+        current_user (UserOut): The current user.
+
+    Returns:
+          SignedUploadOut: Parameters of the upload.
+    """
+    return photos_services.create_signed_upload(current_user.id)
+
+
+@router.post(
+    "/signed_upload/complete",
+    response_model=PhotoOut,
+    status_code=status.HTTP_201_CREATED,
+)
+async def complete_signed_upload(
+    upload: SignedUploadComplete,
+    current_user: UserOut = Depends(auth_service.get_current_user),
+    db: Session = Depends(get_db),
+) -> PhotoOut:
+    """
+    Saves a photo uploaded directly to Cloudinary.
+
+    Args:
+        upload (SignedUploadComplete): Data returned by Cloudinary with the description and tags of the photo.
+        current_user (UserOut): The current user.
+        db (Session): A database session.
+
+    Returns:
+          PhotoOut: The uploaded photo.
+
+    Raises:
+          HTTPException: If the description or tags are invalid, the upload cannot be verified
+            or the photo has already been saved.
+    """
+    tags = _validate_photo_form(upload.description, ",".join(upload.tags))
+    photo_url = await photos_services.verify_signed_upload(upload, current_user.id)
+    if db.query(Photo).filter(Photo.file_path == photo_url).first():
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="This photo has already been saved",
+        )
+    new_photo = await photos_repository.upload_photo(
+        photo_url,
+        None,
+        current_user.id,
+        upload.description,
+        tags,
+        db,
+        photos_services.cloudinary_renditions(upload.public_id),
+    )
+    await _enqueue_photo_jobs([new_photo], db)
+    return new_photo
+
+
+@router.post(
+    "/stream",
+    response_model=PhotoOut,
+    status_code=status.HTTP_201_CREATED,
+    dependencies=[Depends(RateLimit("upload"))],
+)
+async def upload_photo_stream(
+    request: Request,
+    description: str = Query(),
+    tags: str = Query(""),
+    content_length: int | None = Header(None),
+    current_user: UserOut = Depends(auth_service.get_current_user),
+    db: Session = Depends(get_db),
+) -> PhotoOut:
+    """
+    Uploads a new photo sent as the raw request body (not multipart).
+
+    The body is validated while it is being received: too large files and files which are not
+    supported images are rejected before anything is sent to the storage.
+
+    Args:
+        request (Request): The request with the image as its body.
+        description (str): The description of the photo.
+        tags (str): Comma separated tags.
+        content_length (int | None): The declared size of the body.
+        current_user (UserOut): The current user.
+        db (Session): A database session.
+
+    Returns:
+          PhotoOut: The uploaded photo.
+
+    Raises:
+          HTTPException: If the description or tags are invalid (400), the image is too large (413),
+            is not a supported image (415) or its header is invalid (400).
+    """
+    tags = _validate_photo_form(description, tags)
+    if content_length is not None and content_length > MAX_UPLOAD_BYTES:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Photo must be smaller than {MAX_UPLOAD_BYTES} bytes",
+        )
+    image = await photos_services.read_image_stream(request.stream())
+    photo_url, qr_code_url, renditions, metadata = (
+        await photos_services.store_unique_photo(image, db)
+    )
+    new_photo = await photos_repository.upload_photo(
+        photo_url,
+        qr_code_url,
+        current_user.id,
+        description,
+        tags,
+        db,
+        renditions,
+        metadata,
+    )
+    await _enqueue_photo_jobs([new_photo], db)
+    return new_photo
+
+
+@router.post(
+    "/uploads",
+    response_model=ResumableUploadOut,
+    status_code=status.HTTP_201_CREATED,
+    dependencies=[Depends(RateLimit("upload"))],
+)
+async def create_resumable_upload(
+    request: Request,
+    response: Response,
+    upload_length: int = Header(),
+    description: str = Query(),
+    tags: str = Query(""),
+    current_user: UserOut = Depends(auth_service.get_current_user),
+) -> ResumableUploadOut:
+    """
+    Starts a resumable upload of a photo.
+
+    The file is then sent in chunks with PATCH /photos/uploads/{upload_id}, the current offset
+    can be checked with HEAD /photos/uploads/{upload_id} after a broken connection.
+
+    Args:
+        request (Request): The request, used to build the Location header.
+        response (Response): The response, used to set Location and Upload-Offset headers.
+        upload_length (int): The size of the whole file in bytes (Upload-Length header).
+        description (str): The description of the photo.
+        tags (str): Comma separated tags.
+        current_user (UserOut): The current user.
+
+    Returns:
+          ResumableUploadOut: The new upload.
+
+    Raises:
+          HTTPException: If the description or tags are invalid or the file is too large.
+    """
+    tags = _validate_photo_form(description, tags)
+    upload = resumable_uploads.create(current_user.id, upload_length, description, tags)
+    response.headers["Location"] = str(
+        request.url_for("get_resumable_upload_offset", upload_id=upload.id)
+    )
+    response.headers["Upload-Offset"] = "0"
+    return upload
+
+
+@router.head("/uploads/{upload_id}")
+async def get_resumable_upload_offset(
+    upload_id: str = Path(pattern=UPLOAD_ID_PATTERN),
+    current_user: UserOut = Depends(auth_service.get_current_user),
+) -> Response:
+    """
+    Returns the offset of a resumable upload in Upload-Offset header.
+
+    Args:
+        upload_id (str): The id of the upload.
+        current_user (UserOut): The current user.
+
+    Returns:
+          Response: Empty response with Upload-Offset and Upload-Length headers.
+    """
+    upload = resumable_uploads.get(upload_id, current_user.id)
+    return Response(
+        headers={
+            "Upload-Offset": str(upload["offset"]),
+            "Upload-Length": str(upload["length"]),
+            "Cache-Control": "no-store",
+        }
+    )
+
+
+@router.patch(
+    "/uploads/{upload_id}",
+    response_model=PhotoOut,
+    status_code=status.HTTP_201_CREATED,
+    responses={status.HTTP_204_NO_CONTENT: {"description": "Chunk saved"}},
+)
+async def append_resumable_upload(
+    request: Request,
+    upload_id: str = Path(pattern=UPLOAD_ID_PATTERN),
+    upload_offset: int = Header(),
+    current_user: UserOut = Depends(auth_service.get_current_user),
+    db: Session = Depends(get_db),
+) -> PhotoOut | Response:
+    """
+    Saves the next chunk of a resumable upload (the request body).
+
+    Until the whole file is received an empty 204 response with the new Upload-Offset header is returned.
+    The request completing the file uploads the photo and returns it.
+
+    Args:
+        request (Request): The request with the chunk as its body.
+        upload_id (str): The id of the upload.
+        upload_offset (int): The offset of the chunk (Upload-Offset header), it must equal the current offset.
+        current_user (UserOut): The current user.
+        db (Session): A database session.
+
+    Returns:
+          PhotoOut | Response: The uploaded photo or an empty response with Upload-Offset header.
+
+    Raises:
+          HTTPException: If the offset does not match or the upload is being completed by another
+            request (409), the chunk exceeds the declared length (413) or the file is not a valid image.
+    """
+    upload = await resumable_uploads.append(
+        upload_id, current_user.id, upload_offset, request.stream()
+    )
+    if upload["offset"] < upload["length"]:
+        return Response(
+            status_code=status.HTTP_204_NO_CONTENT,
+            headers={"Upload-Offset": str(upload["offset"])},
+        )
+    with resumable_uploads.completing(upload_id) as path:
+        with open(path, "rb") as file:
+            photo_url, qr_code_url, renditions, metadata = (
+                await photos_services.store_unique_photo(file, db)
+            )
+        new_photo = await photos_repository.upload_photo(
+            photo_url,
+            qr_code_url,
+            current_user.id,
+            upload["description"],
+            upload["tags"],
+            db,
+            renditions,
+            metadata,
+        )
+    await _enqueue_photo_jobs([new_photo], db)
+    return new_photo
+
+
+@router.delete("/uploads/{upload_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_resumable_upload(
+    upload_id: str = Path(pattern=UPLOAD_ID_PATTERN),
+    current_user: UserOut = Depends(auth_service.get_current_user),
+) -> None:
+    """
+    Cancels a resumable upload.
+
+    Args:
+        upload_id (str): The id of the upload.
+        current_user (UserOut): The current user.
+
+    Raises:
+        HTTPException: 409 if the upload is being completed.
+    """
+    upload = resumable_uploads.get(upload_id, current_user.id)
+    if upload.get("completing"):
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Upload is being completed by another request",
+        )
+    resumable_uploads.discard(upload_id)
+
+
+@router.post(
+    "/batch",
+    response_model=list[PhotoBatchItemOut],
+    dependencies=[Depends(RateLimit("upload"))],
+)
+async def upload_photos(
+    files: list[UploadFile] = File(),
+    descriptions: list[str] = Form(),
+    tags: list[str] = Form([]),
+    current_user: UserOut = Depends(auth_service.get_current_user),
+    db: Session = Depends(get_db),
+) -> list[PhotoBatchItemOut]:
+    """
+    Uploads many photos at once.
+
+    Every file has its own description and (optional) comma separated tags given at the same position.
+    Files are uploaded to Cloudinary concurrently, saved photos are inserted in one transaction.
+    An invalid or failed file does not stop the others, the status of every file is returned.
+
+    Args:
+        files (list[UploadFile]): Files to be uploaded.
+        descriptions (list[str]): The description of every photo.
+        tags (list[str]): Comma separated tags of every photo.
+        current_user (UserOut): The current user.
+        db (Session): A database session.
+
+    Returns:
+          list[PhotoBatchItemOut]: The result of every file in the request order.
+
+    Raises:
+          HTTPException: If there are too many files or the number of descriptions or tags does not match them.
+    """
+    if len(files) > MAX_BATCH_UPLOAD_FILES:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"Description must be less than {MAX_DESCRIPTION_LENGTH} characters",
+            detail=f"Too many files provided. You can upload max of {MAX_BATCH_UPLOAD_FILES} files at once.",
         )
-    if len(description.strip()) == 0:
+    if len(descriptions) != len(files) or tags and len(tags) != len(files):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"Description cannot be an empty string",
+            detail="Every file must have its description and tags (if any) at the same position",
         )
-    if tags:
-        tags = tags[0].split(",")
-        if len(tags) > 5:
+    results = [
+        PhotoBatchItemOut(index=index, filename=file.filename, status="failed")
+        for index, file in enumerate(files)
+    ]
+    valid = []
+    for index, description in enumerate(descriptions):
+        try:
+            photo_tags = _validate_photo_form(description, tags[index] if tags else "")
+        except HTTPException as e:
+            results[index].detail = e.detail
+            continue
+        valid.append((index, description, photo_tags))
+    stored = await photos_services.store_photos(
+        [files[index] for index, *_ in valid], db
+    )
+    to_save = []
+    uploaded = []
+    for (index, description, photo_tags), result in zip(valid, stored):
+        if isinstance(result, Exception):
+            results[index].detail = "Photo upload failed"
+            continue
+        uploaded.append(result)
+        photo_url, qr_code_url, renditions, metadata = result
+        to_save.append(
+            (
+                index,
+                (
+                    photo_url,
+                    qr_code_url,
+                    description,
+                    photo_tags,
+                    renditions,
+                    metadata,
+                ),
+            )
+        )
+    if to_save:
+        try:
+            new_photos = await photos_repository.upload_photos(
+                [photo for _, photo in to_save], current_user.id, db
+            )
+        except SQLAlchemyError:
+            db.rollback()
+            for index, _ in to_save:
+                results[index].detail = "Photo could not be saved"
+            await photos_services.discard_unsaved_uploads(uploaded, db)
+        else:
+            for (index, _), new_photo in zip(to_save, new_photos):
+                results[index].status = "created"
+                results[index].photo = new_photo
+    await _enqueue_photo_jobs([result.photo for result in results if result.photo], db)
+    return results
+
+
+@router.get(
+    "/nearby",
+    response_model=PhotoPageOut,
+    dependencies=[Depends(RateLimit("search"))],
+)
+async def get_nearby_photos(
+    bbox: str | None = Query(
+        None,
+        description="Bounding box: min_lon,min_lat,max_lon,max_lat",
+        examples=["20.85,52.10,21.27,52.37"],
+    ),
+    lat: float | None = Query(None, ge=-90, le=90),
+    lon: float | None = Query(None, ge=-180, le=180),
+    radius: float | None = Query(
+        None, gt=0, le=MAX_NEARBY_RADIUS, description="Radius in meters"
+    ),
+    cursor: str | None = Query(None, description="next_cursor of the previous page"),
+    limit: int = Query(PHOTO_PAGE_DEFAULT_LIMIT, ge=1, le=PHOTO_PAGE_MAX_LIMIT),
+    current_user: UserOut = Depends(auth_service.get_current_user),
+    db: Session = Depends(get_db),
+) -> PhotoPageOut:
+    """
+    Get a page of photos taken inside a bounding box or within a radius from a point.
+
+    Args:
+         bbox (str | None): The bounding box as min_lon,min_lat,max_lon,max_lat.
+         lat (float | None): The latitude of the center of the circle.
+         lon (float | None): The longitude of the center of the circle.
+         radius (float | None): The radius of the circle in meters.
+         cursor (str | None): Cursor of the page.
+         limit (int): Page size.
+         current_user (UserOut): An instance of User representing the authenticated user.
+         db (Session): Database session.
+
+    Returns:
+        PhotoPageOut: The photos ordered by location (geohash) and the cursor of the next page.
+
+    Raises:
+        HTTPException: 400 if neither a valid bbox nor lat, lon and radius are given,
+            the box is too large or the circle crosses the antimeridian.
+    """
+    if bbox is not None:
+        try:
+            min_lon, min_lat, max_lon, max_lat = (
+                float(value) for value in bbox.split(",")
+            )
+        except ValueError:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Too many tags provided. You can use max of 5 tags.",
+                detail="bbox must be min_lon,min_lat,max_lon,max_lat",
             )
-        for tag in tags:
-            if len(tag) > MAX_TAG_NAME_LENGTH:
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail=f"Tag name must be less than {MAX_TAG_NAME_LENGTH} characters.",
-                )
-    photo_url = await photos_services.upload_photo(file)
-    qr_code_url = await photos_services.create_qr_code(photo_url)
-    new_photo = await photos_repository.upload_photo(
-        photo_url, qr_code_url, current_user.id, description, tags, db
+        if not (-90 <= min_lat <= max_lat <= 90 and -180 <= min_lon <= max_lon <= 180):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid bbox coordinates",
+            )
+        try:
+            return await photos_repository.get_nearby_photos(
+                min_lat, min_lon, max_lat, max_lon, cursor, limit, db
+            )
+        except ValueError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="bbox is too large, search a smaller area",
+            )
+    if lat is None or lon is None or radius is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Either bbox or lat, lon and radius are required",
+        )
+    try:
+        bounds = radius_bbox(lat, lon, radius)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid radius coordinates, the circle crosses the antimeridian",
+        )
+    return await photos_repository.get_nearby_photos(
+        *bounds, cursor, limit, db, center=(lat, lon, radius)
     )
-    return new_photo
 
 
 @router.get("/{photo_id}", response_model=PhotoOut)
@@ -190,6 +743,7 @@ async def delete_photo(
 ):
     """
     Delete a photo from the database if it belongs to the authenticated user.
+    The stored photo is deleted from Cloudinary when no other photo uses it.
 
     Args:
         photo_id (int): The ID of the photo to be deleted.
@@ -207,31 +761,52 @@ async def delete_photo(
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Photo not found"
         )
-    await photos_services.delete_from_cloudinary(photo)
+    if not await photos_repository.is_photo_asset_used(photo.file_path, db):
+        await photos_services.delete_from_cloudinary(photo)
     return photo
 
 
-@router.post("/transformation/{photo_id}", response_model=PhotoOut)
+@router.post(
+    "/transformation/{photo_id}",
+    response_model=PhotoTransformationOut,
+    dependencies=[Depends(RateLimit("transform"))],
+)
 async def transform_photo(
     photo_id: int,
-    transformation_params: TransformationParameters,
+    background_tasks: BackgroundTasks,
+    transformation_params: TransformationParameters | None = None,
+    preset: str | None = Query(
+        None, description="Name of a transformation preset used instead of the body"
+    ),
+    eager: bool = Query(
+        False, description="Render the transformation in the background now"
+    ),
     current_user: UserOut = Depends(auth_service.get_current_user),
     db: Session = Depends(get_db),
 ):
     """
     Create a photo transformation
 
+    Cloudinary renders transformations lazily, on the first request to their url. With eager=true
+    the rendering is started in the background and the status of the transformation changes
+    from "pending" to "ready" (or "failed"), so clients can wait for it instead of hitting a cold url.
+
     Args:
          photo_id (int): The ID of the photo to be transformed.
-         transformation_params (TransformationParameters): The transformation parameters (more info in Schemas.py).
+         background_tasks (BackgroundTasks): Background tasks to execute, e.g., eager rendering.
+         transformation_params (TransformationParameters | None): The transformation parameters (more info in Schemas.py),
+            required when no preset is given.
+         preset (str | None): The name of a transformation preset to apply.
+         eager (bool): Whether to render the transformation in the background now.
          current_user (UserOut): An instance of User representing the authenticated user.
          db (Session): Database session.
 
     Returns:
-        PhotoOut: The transformed photo object
+        PhotoTransformationOut: The transformation of the photo
 
     Raises:
-        HTTPException: If the specified photo is not found in the database or action is not performed by photo owner.
+        HTTPException: If the specified photo or preset is not found in the database, neither parameters nor preset
+            are given or action is not performed by photo owner.
     """
     photo = db.query(Photo).filter(Photo.id == photo_id).first()
     if not photo:
@@ -243,13 +818,125 @@ async def transform_photo(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Only the current authenticated user is allowed to perform the transformation.",
         )
-    transform_photo_url, params = await photos_services.transform_photo(
-        photo, transformation_params
-    )
-    photo = await photos_repository.add_transformation(
-        photo, transform_photo_url, params, db
+    if preset:
+        transformation_preset = await presets_repository.get_preset(preset, db)
+        params = transformation_preset.params
+        param_hash = transformation_preset.param_hash
+        transform_photo_url = await photos_services.transformation_url(
+            photo.file_path, params, param_hash
+        )
+    elif transformation_params:
+        transform_photo_url, params, param_hash = await photos_services.transform_photo(
+            photo, transformation_params
+        )
+    else:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Transformation parameters or preset are required",
+        )
+    transformation = await photos_repository.add_transformation(
+        photo, transform_photo_url, params, param_hash, db
     )
-    return photo
+    if eager and transformation.status in ("lazy", "failed"):
+        await photos_repository.set_transformation_status(
+            [transformation.id], "pending", db
+        )
+        transformation.status = "pending"
+        background_tasks.add_task(
+            photos_services.generate_transformations,
+            [transformation.id],
+            photo.file_path,
+            [transformation.params],
+        )
+    return transformation
+
+
+@router.get(
+    "/{photo_id}/transformations/{transformation_id}",
+    response_model=PhotoTransformationOut,
+)
+async def get_photo_transformation(
+    photo_id: int,
+    transformation_id: int,
+    current_user: UserOut = Depends(auth_service.get_current_user),
+    db: Session = Depends(get_db),
+) -> PhotoTransformationOut:
+    """
+    Get a transformation of a photo (e.g. to check if its eager rendering is ready).
+
+    Args:
+         photo_id (int): The ID of the photo.
+         transformation_id (int): The ID of the transformation.
+         current_user (UserOut): An instance of User representing the authenticated user.
+         db (Session): Database session.
+
+    Returns:
+        PhotoTransformationOut: The transformation of the photo.
+
+    Raises:
+        HTTPException: If the specified transformation is not found in the database.
+    """
+    return await photos_repository.get_transformation(photo_id, transformation_id, db)
+
+
+@router.get("/{photo_id}/transformations", response_model=list[PhotoTransformationOut])
+async def get_photo_transformations(
+    photo_id: int,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(PHOTO_PAGE_DEFAULT_LIMIT, ge=1, le=PHOTO_PAGE_MAX_LIMIT),
+    current_user: UserOut = Depends(auth_service.get_current_user),
+    db: Session = Depends(get_db),
+) -> list[PhotoTransformationOut]:
+    """
+    Get transformations of a photo, the newest first.
+
+    Args:
+         photo_id (int): The ID of the photo.
+         skip (int): The number of transformations to skip.
+         limit (int): The maximum number of transformations to return.
+         current_user (UserOut): An instance of User representing the authenticated user.
+         db (Session): Database session.
+
+    Returns:
+        list[PhotoTransformationOut]: The transformations of the photo.
+
+    Raises:
+        HTTPException: If the specified photo is not found in the database.
+    """
+    return await photos_repository.get_transformations(photo_id, skip, limit, db)
+
+
+@router.get(
+    "/{photo_id}/similar",
+    response_model=list[SimilarPhotoOut],
+    dependencies=[Depends(RateLimit("search"))],
+)
+async def get_similar_photos(
+    photo_id: int,
+    max_distance: int = Query(
+        SIMILAR_PHOTOS_DEFAULT_DISTANCE, ge=0, le=SIMILAR_PHOTOS_MAX_DISTANCE
+    ),
+    limit: int = Query(PHOTO_PAGE_DEFAULT_LIMIT, ge=1, le=PHOTO_PAGE_MAX_LIMIT),
+    current_user: UserOut = Depends(auth_service.get_current_user),
+    db: Session = Depends(get_db),
+) -> list[SimilarPhotoOut]:
+    """
+    Get near-duplicates of a photo (e.g. its resized or re-encoded copies), the most similar first.
+
+    Args:
+         photo_id (int): The ID of the photo.
+         max_distance (int): The maximum Hamming distance of perceptual hashes of the photos.
+         limit (int): The maximum number of photos to return.
+         current_user (UserOut): An instance of User representing the authenticated user.
+         db (Session): Database session.
+
+    Returns:
+        list[SimilarPhotoOut]: The similar photos with their distances.
+
+    Raises:
+        HTTPException: If the specified photo is not found in the database.
+    """
+    return await photos_repository.get_similar_photos(photo_id, max_distance, limit, db)
 
 
 @router.get("/user/{user_id}", response_model=list[PhotoSearchOut])
@@ -289,7 +976,11 @@ async def get_photos(
     return await photos_repository.get_photos(db)
 
 
-@router.get("/photo/search", response_model=list[PhotoSearchOut])
+@router.get(
+    "/photo/search",
+    response_model=list[PhotoSearchOut],
+    dependencies=[Depends(RateLimit("search"))],
+)
 async def search_photos(
     query: Optional[str] = Query(
         None, description="Search by keywords in description or tags"
@@ -1,15 +1,158 @@
-from fastapi import APIRouter, HTTPException, Depends, status, Form
+from fastapi import APIRouter, HTTPException, Depends, status, Form, Query
 from sqlalchemy.orm import Session
 
-from src.schemas import TagIn, TagOut, UserOut
+from src.schemas import TagIn, TagOut, TagUsageOut, UserOut, PhotoPageOut
 from src.services.auth import auth_service
+from src.services.rate_limit import RateLimit
 from src.repository import tags as tags_repository
+from src.repository import photos as photos_repository
 from src.database.db import get_db
-from src.conf.constant import MAX_TAG_NAME_LENGTH
+from src.conf.constant import (
+    MAX_TAG_NAME_LENGTH,
+    TAG_SUGGEST_DEFAULT_LIMIT,
+    TAG_SUGGEST_MAX_LIMIT,
+    TAG_POPULAR_DEFAULT_LIMIT,
+    TAG_POPULAR_MAX_LIMIT,
+    PHOTO_SEARCH_ENUMS,
+    PHOTO_PAGE_DEFAULT_LIMIT,
+    PHOTO_PAGE_MAX_LIMIT,
+    MAX_TAGS_IN_QUERY,
+    TAG_MATCH_ENUMS,
+)
 
 router = APIRouter(prefix="/tags", tags=["tags"])
 
 
+@router.get("/suggest", response_model=list[TagUsageOut])
+async def suggest_tags(
+    prefix: str = Query(
+        ...,
+        min_length=1,
+        max_length=MAX_TAG_NAME_LENGTH,
+        description="Beginning of the tag name",
+    ),
+    limit: int = Query(TAG_SUGGEST_DEFAULT_LIMIT, ge=1, le=TAG_SUGGEST_MAX_LIMIT),
+    current_user: UserOut = Depends(auth_service.get_current_user),
+    db: Session = Depends(get_db),
+):
+    """
+    Suggest existing tags starting with the given prefix (autocomplete).
+
+    Args:
+        prefix (str): Beginning of the tag name (case-insensitive)
+        limit (int): Maximum number of suggestions
+        current_user (UserOut): Current user
+        db (Session): Database
+
+    Returns:
+        list[TagUsageOut]: List of the most used tags matching the prefix
+    """
+    return await tags_repository.suggest_tags(prefix, limit, db)
+
+
+@router.get("/popular", response_model=list[TagUsageOut])
+async def get_popular_tags(
+    limit: int = Query(TAG_POPULAR_DEFAULT_LIMIT, ge=1, le=TAG_POPULAR_MAX_LIMIT),
+    current_user: UserOut = Depends(auth_service.get_current_user),
+    db: Session = Depends(get_db),
+):
+    """
+    Get the most used tags with their usage counts (tag cloud).
+
+    Args:
+        limit (int): Maximum number of tags
+        current_user (UserOut): Current user
+        db (Session): Database
+
+    Returns:
+        list[TagUsageOut]: List of the most used tags
+    """
+    return await tags_repository.get_popular_tags(limit, db)
+
+
+@router.get(
+    "/photos",
+    response_model=PhotoPageOut,
+    dependencies=[Depends(RateLimit("search"))],
+)
+async def get_photos_by_tags(
+    tags: list[str] = Query(..., description="Tag names (exact, case-insensitive)"),
+    match: str = Query(
+        TAG_MATCH_ENUMS[0],
+        enum=TAG_MATCH_ENUMS,
+        description="'all' - photos with every tag, 'any' - photos with at least one tag",
+    ),
+    sort_by: str = Query(PHOTO_SEARCH_ENUMS[0], enum=PHOTO_SEARCH_ENUMS),
+    cursor: str | None = Query(None, description="next_cursor of the previous page"),
+    limit: int = Query(PHOTO_PAGE_DEFAULT_LIMIT, ge=1, le=PHOTO_PAGE_MAX_LIMIT),
+    current_user: UserOut = Depends(auth_service.get_current_user),
+    db: Session = Depends(get_db),
+):
+    """
+    Get a page of photos tagged with all or any of the given tags.
+
+    Args:
+        tags (list[str]): Tag names
+        match (str): 'all' or 'any'
+        sort_by (str): Sort by upload date or rating
+        cursor (str | None): Cursor of the page
+        limit (int): Page size
+        current_user (UserOut): Current user
+        db (Session): Database
+
+    Returns:
+        PhotoPageOut: Page of photos with the cursor of the next page
+
+    Raises:
+        HTTPException: If too many tags or invalid match option are provided.
+    """
+    if len(tags) > MAX_TAGS_IN_QUERY:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"You can search by max {MAX_TAGS_IN_QUERY} tags at once.",
+        )
+    if match not in TAG_MATCH_ENUMS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid match option: {match}",
+        )
+    return await photos_repository.get_photos_by_tags(
+        tags, match == "all", sort_by, cursor, limit, db
+    )
+
+
+@router.get(
+    "/{tag_name}/photos",
+    response_model=PhotoPageOut,
+    dependencies=[Depends(RateLimit("search"))],
+)
+async def get_photos_by_tag(
+    tag_name: str,
+    sort_by: str = Query(PHOTO_SEARCH_ENUMS[0], enum=PHOTO_SEARCH_ENUMS),
+    cursor: str | None = Query(None, description="next_cursor of the previous page"),
+    limit: int = Query(PHOTO_PAGE_DEFAULT_LIMIT, ge=1, le=PHOTO_PAGE_MAX_LIMIT),
+    current_user: UserOut = Depends(auth_service.get_current_user),
+    db: Session = Depends(get_db),
+):
+    """
+    Get a page of photos tagged with the tag.
+
+    Args:
+        tag_name (str): Tag name (exact, case-insensitive)
+        sort_by (str): Sort by upload date or rating
+        cursor (str | None): Cursor of the page
+        limit (int): Page size
+        current_user (UserOut): Current user
+        db (Session): Database
+
+    Returns:
+        PhotoPageOut: Page of photos with the cursor of the next page
+    """
+    return await photos_repository.get_photos_by_tags(
+        [tag_name], True, sort_by, cursor, limit, db
+    )
+
+
 @router.get("/{photo_id}", response_model=list[TagOut])
 async def get_tags(
     photo_id: int,
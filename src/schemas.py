@@ -7,6 +7,7 @@ from pydantic import BaseModel, Field, EmailStr, field_validator
 
 from src.conf.constant import (
     MAX_TAG_NAME_LENGTH,
+    MAX_PRESET_NAME_LENGTH,
     MAX_USERNAME_LENGTH,
 )
 
@@ -69,6 +70,53 @@ class UserOut(BaseModel):
         from_attributes = True
 
 
+class UsersFilter(BaseModel):
+    """
+    Data model for filtering the list of users.
+
+    Attributes:
+        role (UserRoleValid | None): Only users with this role.
+        is_active (bool | None): Only active (True) or baned (False) users.
+        confirmed (bool | None): Only users with confirmed (True) or not confirmed (False) email.
+        created_from (datetime | None): Only users created at or after this date.
+        created_to (datetime | None): Only users created before this date.
+    """
+
+    role: UserRoleValid | None = None
+    is_active: bool | None = None
+    confirmed: bool | None = None
+    created_from: datetime | None = None
+    created_to: datetime | None = None
+
+
+class UserExport(BaseModel):
+    """
+    Data model for exporting users (admin only).
+
+    Attributes:
+        id (int): The unique identifier of the user.
+        username (str): The username of the user.
+        email (str): The email address of the user.
+        role (UserRoleValid): The role of the user.
+        confirmed (bool): Whether the email address of the user is confirmed.
+        is_active (bool): Whether the user is active or baned.
+        created_at (datetime | None): The date the user account was created.
+        avatar (str | None): The avatar URL of the user.
+    """
+
+    id: int
+    username: str
+    email: str
+    role: UserRoleValid
+    confirmed: bool | None = None
+    is_active: bool | None = None
+    created_at: datetime | None = None
+    avatar: str | None = None
+
+    class Config:
+        from_attributes = True
+
+
 # class UserRedis(BaseModel):
 #     id: int
 #     username: str
@@ -127,6 +175,19 @@ class CommentOut(BaseModel):
         from_attributes = True
 
 
+class PhotoCommentsOut(BaseModel):
+    """
+    Data model for the latest comments of a single photo returned by a batch request.
+
+    Attributes:
+        photo_id (int): The ID of the photo.
+        comments (list[CommentOut]): The latest comments of the photo, newest first.
+    """
+
+    photo_id: int
+    comments: list[CommentOut] = []
+
+
 class UserPublicProfile(BaseModel):
     """
     Data model for user public profile.
@@ -179,6 +240,67 @@ class TransformationParameters(BaseModel):
     effects: list[str] = []
 
 
+class PhotoTransformationOut(BaseModel):
+    """
+    Data model for retrieving photo transformations.
+
+    Attributes:
+        id (int): The unique identifier of the transformation.
+        photo_id (int): The ID of the transformed photo.
+        param_hash (str): The hash of the canonical transformation parameters.
+        url (str): The url of the transformed photo.
+        params (list[dict]): The canonical transformation parameters.
+        created_at (datetime): The date the transformation was created.
+        status (str): "lazy" (rendered on first request), "pending", "ready" or "failed".
+    """
+
+    id: int
+    photo_id: int
+    param_hash: str
+    url: str
+    params: list[dict]
+    created_at: datetime
+    status: str = "lazy"
+
+    class Config:
+        from_attributes = True
+
+
+class TransformationPresetIn(BaseModel):
+    """
+    Data model for creating or updating transformation presets.
+
+    Attributes:
+        name (str): The unique name of the preset (letters, digits, "_" and "-").
+        params (TransformationParameters): The transformation parameters of the preset.
+    """
+
+    name: str = Field(
+        min_length=1, max_length=MAX_PRESET_NAME_LENGTH, pattern=r"^[\w-]+$"
+    )
+    params: TransformationParameters
+
+
+class TransformationPresetOut(BaseModel):
+    """
+    Data model for retrieving transformation presets.
+
+    Attributes:
+        id (int): The unique identifier of the preset.
+        name (str): The unique name of the preset.
+        params (list[dict]): The canonical transformation parameters.
+        param_hash (str): The hash of the canonical transformation parameters.
+    """
+
+    id: int
+    name: str
+    params: list[dict]
+    param_hash: str
+
+    class Config:
+        from_attributes = True
+
+
 class TagIn(BaseModel):
     """
     Data model for enter tags.
@@ -205,6 +327,18 @@ class TagOut(TagIn):
         from_attributes = True
 
 
+class TagUsageOut(TagOut):
+    """
+    Data model for tags with the number of photos using them (e.g. autocomplete suggestions).
+    Inherits from TagOut.
+
+    Attributes:
+        usage_count (int): The number of photos tagged with the tag.
+    """
+
+    usage_count: int
+
+
 class PhotoOut(BaseModel):
     """
     Data model for retrieving photos.
@@ -212,9 +346,17 @@ class PhotoOut(BaseModel):
     Attributes:
         id (int): The unique identifier of the photo.
         file_path (str): The url to the photo.
-        qr_path (str): The url to the qr code leading to the photo.
-        transformation (Dict[str, str]): The transformation of the photo.
+        qr_path (str): The url to the qr code leading to the photo (None until it is generated).
+        renditions (Dict[str, str]): The urls of smaller versions of the photo by their names.
         description (str): The description of the photo.
+        width (int): The width of the photo in pixels.
+        height (int): The height of the photo in pixels.
+        byte_size (int): The size of the photo file in bytes.
+        mime_type (str): The MIME type of the photo file.
+        camera (str): The make and model of the camera.
+        captured_at (datetime): The time the photo was taken.
+        latitude (float): The latitude of the place the photo was taken.
+        longitude (float): The longitude of the place the photo was taken.
         upload_date (datetime): The date the photo was uploaded.
         user_id (int): photo owner ID.
         average_rating (float): The average rating of the photo.
@@ -222,10 +364,18 @@ class PhotoOut(BaseModel):
 
     id: int
     file_path: str
-    qr_path: str
+    qr_path: str | None = None
     description: str
     tags: list[TagOut] = []
-    transformation: Dict[str, list] | None = None
+    renditions: Dict[str, str] | None = None
+    width: int | None = None
+    height: int | None = None
+    byte_size: int | None = None
+    mime_type: str | None = None
+    camera: str | None = None
+    captured_at: datetime | None = None
+    latitude: float | None = None
+    longitude: float | None = None
     upload_date: datetime
     user_id: int
     average_rating: float | None = None
@@ -241,18 +391,36 @@ class PhotoSearchOut(BaseModel):
     Attributes:
         id (int): The unique identifier of the photo.
         file_path (str): The url to the photo.
-        qr_path (str): The url to the qr code leading to the photo.
+        qr_path (str): The url to the qr code leading to the photo (None until it is generated).
         description (str): The description of the photo.
         tags (list[TagOut]): The tags of the photo.
+        renditions (Dict[str, str]): The urls of smaller versions of the photo by their names.
+        width (int): The width of the photo in pixels.
+        height (int): The height of the photo in pixels.
+        byte_size (int): The size of the photo file in bytes.
+        mime_type (str): The MIME type of the photo file.
+        camera (str): The make and model of the camera.
+        captured_at (datetime): The time the photo was taken.
+        latitude (float): The latitude of the place the photo was taken.
+        longitude (float): The longitude of the place the photo was taken.
         upload_date (datetime): The date the photo was uploaded.
         average_rating (float): The average rating of the photo.
     """
 
     id: int
     file_path: str
-    qr_path: str
+    qr_path: str | None = None
     description: str
     tags: list[TagOut]
+    renditions: Dict[str, str] | None = None
+    width: int | None = None
+    height: int | None = None
+    byte_size: int | None = None
+    mime_type: str | None = None
+    camera: str | None = None
+    captured_at: datetime | None = None
+    latitude: float | None = None
+    longitude: float | None = None
     upload_date: datetime
     average_rating: float | None = None
 
@@ -260,6 +428,108 @@ class PhotoSearchOut(BaseModel):
         from_attributes = True
 
 
+class SimilarPhotoOut(PhotoSearchOut):
+    """
+    Data model for returning a near-duplicate of a photo.
+
+    Attributes:
+        distance (int): The Hamming distance between perceptual hashes of the photos.
+    """
+
+    distance: int
+
+
+class SignedUploadOut(BaseModel):
+    """
+    Data model for parameters of a signed upload made by the client directly to Cloudinary.
+
+    Attributes:
+        upload_url (str): The Cloudinary endpoint the file has to be posted to.
+        api_key (str): The Cloudinary api key.
+        timestamp (int): The signed timestamp (Cloudinary rejects signatures older than one hour).
+        public_id (str): The public id the photo has to be uploaded with.
+        allowed_formats (str): The signed list of accepted image formats.
+        signature (str): The signature of the parameters.
+        expires_at (datetime): The time after which the parameters are no longer accepted.
+    """
+
+    upload_url: str
+    api_key: str
+    timestamp: int
+    public_id: str
+    allowed_formats: str
+    signature: str
+    expires_at: datetime
+
+
+class SignedUploadComplete(BaseModel):
+    """
+    Data model for finishing a signed upload.
+
+    Attributes:
+        public_id (str): The public id returned by Cloudinary.
+        version (int): The version returned by Cloudinary.
+        signature (str): The signature returned by Cloudinary.
+        description (str): The description of the photo.
+        tags (list[str]): The tags of the photo.
+    """
+
+    public_id: str
+    version: int
+    signature: str
+    description: str
+    tags: list[str] = []
+
+
+class ResumableUploadOut(BaseModel):
+    """
+    Data model for a resumable upload in progress.
+
+    Attributes:
+        id (str): The id of the upload.
+        offset (int): The number of bytes received so far.
+        length (int): The size of the whole file in bytes.
+        expires_at (datetime): The time after which an unfinished upload is removed.
+    """
+
+    id: str
+    offset: int
+    length: int
+    expires_at: datetime
+
+
+class PhotoBatchItemOut(BaseModel):
+    """
+    Data model for the result of uploading one file of a batch upload.
+
+    Attributes:
+        index (int): The position of the file in the request.
+        filename (str | None): The name of the uploaded file.
+        status (str): "created" if the photo was saved, "failed" otherwise.
+        photo (PhotoOut | None): The saved photo.
+        detail (str | None): The reason of the failure.
+    """
+
+    index: int
+    filename: str | None = None
+    status: str
+    photo: PhotoOut | None = None
+    detail: str | None = None
+
+
+class PhotoPageOut(BaseModel):
+    """
+    Data model for one page of photos returned with keyset (cursor) pagination.
+
+    Attributes:
+        items (list[PhotoSearchOut]): The photos on the page.
+        next_cursor (str | None): The cursor of the next page, None if this is the last page.
+    """
+
+    items: list[PhotoSearchOut]
+    next_cursor: str | None = None
+
+
 class RatingIn(BaseModel):
     score: int = Field(..., ge=1, le=5, description="The rating score from 1 to 5")
 
@@ -6,10 +6,11 @@ from jose import JWTError, jwt
 from fastapi import HTTPException, status, Depends
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.orm import Session
-from redis.asyncio import Redis
 import bcrypt
 
 from src.conf.config import settings
+from src.conf.redis_conf import redis_client
+from src.services.metrics import AUTH_CACHE_REQUESTS
 from src.database.db import get_db
 from src.database.models import User
 from src.repository import users as repository_users
@@ -24,7 +25,7 @@ class Auth:
         SECRET_KEY (str): Secret key used for JWT token generation.
         ALGORITHM (str): Algorithm used for JWT token generation.
         oauth2_scheme (OAuth2PasswordBearer): OAuth2 password bearer scheme.
-        r (Redis): Redis client for caching.
+        r (Redis): Redis client for caching (the shared application client).
 
     Methods:
         verify_password(plain_password, hashed_password): Verify if the plain password matches the hashed password.
@@ -41,12 +42,7 @@ class Auth:
     SECRET_KEY = settings.secret_key
     ALGORITHM = settings.algorithm
     oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/login")
-    r = Redis(
-        host=settings.redis_host,
-        port=settings.redis_port,
-        password=settings.redis_password,
-        db=0,
-    )
+    r = redis_client
 
     async def set_user_in_redis(self, email: str, user: User):
         await self.r.set(f"user:{email}", pickle.dumps(user))
@@ -139,6 +135,7 @@ class Auth:
         except JWTError as e:
             raise credentials_exception
         user = await self.r.get(f"user:{email}")
+        AUTH_CACHE_REQUESTS.labels("miss" if user is None else "hit").inc()
         if user is None:
             user = await repository_users.get_user_by_email(email, db)
             if user is None:
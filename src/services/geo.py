@@ -0,0 +1,176 @@
+import math
+
+from src.conf.constant import GEOHASH_PRECISION, MAX_GEOHASH_CELLS
+
+GEOHASH_ALPHABET = "0123456789bcdefghjkmnpqrstuvwxyz"
+EARTH_RADIUS = 6_371_000
+
+
+def encode_geohash(
+    latitude: float, longitude: float, precision: int = GEOHASH_PRECISION
+) -> str:
+    """
+    Encodes a location as a geohash, nearby locations share long prefixes.
+
+    Args:
+        latitude (float): Latitude in degrees.
+        longitude (float): Longitude in degrees.
+        precision (int): Number of characters of the geohash.
+
+    Returns:
+        str: The geohash.
+    """
+    lat_range, lon_range = [-90.0, 90.0], [-180.0, 180.0]
+    geohash = []
+    bits, value, even = 0, 0, True
+    while len(geohash) < precision:
+        coordinate, bounds = (longitude, lon_range) if even else (latitude, lat_range)
+        middle = (bounds[0] + bounds[1]) / 2
+        value <<= 1
+        if coordinate >= middle:
+            value |= 1
+            bounds[0] = middle
+        else:
+            bounds[1] = middle
+        even = not even
+        bits += 1
+        if bits == 5:
+            geohash.append(GEOHASH_ALPHABET[value])
+            bits, value = 0, 0
+    return "".join(geohash)
+
+
+def _cell_size(precision: int) -> tuple[float, float]:
+    """Height and width in degrees of a geohash cell of the given precision."""
+    lon_bits = math.ceil(5 * precision / 2)
+    lat_bits = 5 * precision - lon_bits
+    return 180 / 2**lat_bits, 360 / 2**lon_bits
+
+
+def geohash_cells(
+    min_lat: float,
+    min_lon: float,
+    max_lat: float,
+    max_lon: float,
+    max_cells: int = MAX_GEOHASH_CELLS,
+) -> list[str]:
+    """
+    Finds geohash prefixes of cells covering a bounding box.
+
+    The longest prefixes for which at most max_cells cells cover the box are used, so every
+    prefix is matched by an index range scan and few locations outside the box are read.
+    A box needing more than max_cells one-character cells would be a scan of the whole
+    table and is rejected.
+
+    Args:
+        min_lat (float): South edge of the box.
+        min_lon (float): West edge of the box.
+        max_lat (float): North edge of the box.
+        max_lon (float): East edge of the box.
+        max_cells (int): Maximum number of prefixes.
+
+    Returns:
+        list[str]: Sorted geohash prefixes.
+
+    Raises:
+        ValueError: If the box is too large to be covered by max_cells cells.
+    """
+    cells = []
+    for precision in range(1, GEOHASH_PRECISION + 1):
+        height, width = _cell_size(precision)
+        # 90° and 180° belong to the last row and column, not to a row or column beyond them
+        top = min(math.floor(max_lat / height), round(90 / height) - 1)
+        right = min(math.floor(max_lon / width), round(180 / width) - 1)
+        rows = top - math.floor(min_lat / height) + 1
+        columns = right - math.floor(min_lon / width) + 1
+        if rows * columns > max_cells:
+            if not cells:
+                raise ValueError("The box is too large")
+            break
+        cells = sorted(
+            {
+                encode_geohash(
+                    min(
+                        max((math.floor(min_lat / height) + row + 0.5) * height, -90),
+                        90,
+                    ),
+                    min(
+                        max((math.floor(min_lon / width) + column + 0.5) * width, -180),
+                        180,
+                    ),
+                    precision,
+                )
+                for row in range(rows)
+                for column in range(columns)
+            }
+        )
+    return cells
+
+
+def geohash_prefix_end(prefix: str) -> str | None:
+    """
+    The smallest geohash after all geohashes starting with the prefix.
+
+    Together with the prefix itself it bounds a range of the geohash index
+    (prefix <= geohash < end), which keeps the index order usable for sorting.
+
+    Args:
+        prefix (str): The geohash prefix.
+
+    Returns:
+        str | None: The end of the range, None if no geohash follows the prefix.
+    """
+    prefix = prefix.rstrip(GEOHASH_ALPHABET[-1])
+    if not prefix:
+        return None
+    return prefix[:-1] + GEOHASH_ALPHABET[GEOHASH_ALPHABET.index(prefix[-1]) + 1]
+
+
+def radius_bbox(
+    latitude: float, longitude: float, radius: float
+) -> tuple[float, float, float, float]:
+    """
+    Bounding box of a circle on the Earth's surface.
+
+    Args:
+        latitude (float): Latitude of the center in degrees.
+        longitude (float): Longitude of the center in degrees.
+        radius (float): Radius in meters.
+
+    Returns:
+        tuple[float, float, float, float]: min_lat, min_lon, max_lat, max_lon
+            (latitudes clipped to valid coordinates, all longitudes if the circle contains a pole).
+
+    Raises:
+        ValueError: If the circle crosses the antimeridian (the box would wrap around ±180°).
+    """
+    lat_delta = math.degrees(radius / EARTH_RADIUS)
+    min_lat, max_lat = latitude - lat_delta, latitude + lat_delta
+    if min_lat <= -90.0 or max_lat >= 90.0:
+        return max(min_lat, -90.0), -180.0, min(max_lat, 90.0), 180.0
+    lon_delta = math.degrees(radius / (EARTH_RADIUS * math.cos(math.radians(latitude))))
+    min_lon, max_lon = longitude - lon_delta, longitude + lon_delta
+    if min_lon < -180.0 or max_lon > 180.0:
+        raise ValueError("The circle crosses the antimeridian")
+    return min_lat, min_lon, max_lat, max_lon
+
+
+def distance(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """
+    Great-circle (haversine) distance of two locations.
+
+    Args:
+        lat1 (float): Latitude of the first location in degrees.
+        lon1 (float): Longitude of the first location in degrees.
+        lat2 (float): Latitude of the second location in degrees.
+        lon2 (float): Longitude of the second location in degrees.
+
+    Returns:
+        float: The distance in meters.
+    """
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    a = (
+        math.sin((phi2 - phi1) / 2) ** 2
+        + math.cos(phi1) * math.cos(phi2) * math.sin(math.radians(lon2 - lon1) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS * math.asin(math.sqrt(a))
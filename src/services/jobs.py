@@ -0,0 +1,380 @@
+import asyncio
+import json
+import logging
+import secrets
+import time
+from abc import ABC, abstractmethod
+from collections import deque
+from dataclasses import dataclass, field
+from threading import Lock
+from typing import Awaitable, Callable
+
+from redis.asyncio import Redis
+
+from src.conf.config import settings
+from src.conf.redis_conf import redis_client
+from src.conf.constant import (
+    JOB_MAX_ATTEMPTS,
+    JOB_POLL_INTERVAL,
+    JOB_QUEUE_NAME,
+    JOB_RETRY_DELAY,
+    JOB_VISIBILITY_TIMEOUT,
+)
+
+logger = logging.getLogger(__name__)
+
+handlers: dict[str, Callable[..., Awaitable]] = {}
+
+
+@dataclass
+class Job:
+    """
+    A unit of background work.
+
+    Attributes:
+        name (str): The name of the handler running the job.
+        payload (dict): Keyword arguments of the handler (JSON serializable).
+        id (str): Unique id of the job.
+        attempts (int): Number of failed runs so far.
+        error (str | None): The error of the last failed run.
+    """
+
+    name: str
+    payload: dict
+    id: str = field(default_factory=lambda: secrets.token_hex(8))
+    attempts: int = 0
+    error: str | None = None
+
+    def dumps(self) -> str:
+        return json.dumps(self.__dict__)
+
+    @classmethod
+    def loads(cls, raw: str | bytes) -> "Job":
+        return cls(**json.loads(raw))
+
+
+class JobQueue(ABC):
+    """
+    Queue of background jobs with retries and a dead-letter list.
+
+    A dequeued job stays invisible to other workers for `visibility_timeout` seconds and
+    returns to the queue if the worker does not acknowledge it in time (e.g. it crashed),
+    so jobs are run at least once and handlers must be idempotent. A failed job is retried
+    with an exponential delay, after `max_attempts` failures it is moved to the dead letters.
+
+    Attributes:
+        max_attempts (int): Number of runs after which a failing job is dead-lettered.
+        retry_delay (float): Delay of the first retry in seconds, doubled with every attempt.
+        visibility_timeout (float): Number of seconds a worker has to finish a job.
+
+    Methods:
+        enqueue(name, payload, delay): Add a job.
+        dequeue(): Take the next job ready to run.
+        ack(job): Mark a dequeued job as done.
+        fail(job, error, retry): Mark a dequeued job as failed.
+        dead_letters(limit): Get jobs which failed for good.
+    """
+
+    def __init__(
+        self,
+        max_attempts: int = JOB_MAX_ATTEMPTS,
+        retry_delay: float = JOB_RETRY_DELAY,
+        visibility_timeout: float = JOB_VISIBILITY_TIMEOUT,
+    ):
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self.visibility_timeout = visibility_timeout
+
+    @abstractmethod
+    async def _push(self, raw: str, run_at: float | None) -> None:
+        """Add a serialized job, to the delayed jobs if run_at (a timestamp) is given."""
+
+    @abstractmethod
+    async def _remove(self, raw: str) -> bool:
+        """Remove a dequeued job from the jobs in progress, False if it was not there."""
+
+    @abstractmethod
+    async def _bury(self, raw: str) -> None:
+        """Add a serialized job to the dead letters."""
+
+    async def enqueue(self, name: str, payload: dict, delay: float = 0) -> Job:
+        """
+        Add a job.
+
+        Args:
+            name (str): The name of the handler.
+            payload (dict): Keyword arguments of the handler.
+            delay (float): Number of seconds after which the job may run.
+
+        Returns:
+            Job: The new job.
+        """
+        job = Job(name=name, payload=payload)
+        await self._push(job.dumps(), time.time() + delay if delay else None)
+        return job
+
+    @abstractmethod
+    async def dequeue(self) -> Job | None:
+        """
+        Take the next job ready to run.
+
+        Returns:
+            Job | None: The job, None if no job is ready.
+        """
+
+    async def ack(self, job: Job) -> None:
+        """
+        Mark a dequeued job as done.
+
+        Args:
+            job (Job): The job.
+        """
+        await self._remove(job.dumps())
+
+    async def fail(self, job: Job, error: str, retry: bool = True) -> None:
+        """
+        Mark a dequeued job as failed, it is retried later or dead-lettered.
+
+        Args:
+            job (Job): The job.
+            error (str): Description of the failure.
+            retry (bool): False if retrying cannot help (e.g. unknown handler).
+        """
+        if not await self._remove(job.dumps()):
+            return
+        job.attempts += 1
+        job.error = error
+        if retry and job.attempts < self.max_attempts:
+            delay = self.retry_delay * 2 ** (job.attempts - 1)
+            await self._push(job.dumps(), time.time() + delay)
+        else:
+            await self._bury(job.dumps())
+
+    @abstractmethod
+    async def dead_letters(self, limit: int = 100) -> list[Job]:
+        """
+        Get jobs which failed for good, the most recent first.
+
+        Args:
+            limit (int): The maximum number of jobs.
+
+        Returns:
+            list[Job]: The jobs with their last errors.
+        """
+
+
+class RedisJobQueue(JobQueue):
+    """
+    Job queue kept in Redis, shared by the API processes and the workers.
+
+    Keys: "jobs:{<name>}:ready" (list), "jobs:{<name>}:delayed" and "jobs:{<name>}:processing"
+    (sorted sets scored by the time the job may run again) and "jobs:{<name>}:dead" (list).
+    The braces make all keys of a queue land in one Redis Cluster slot, as the script needs.
+    Moving due and timed out jobs back to the ready list and taking the next job
+    is a single Lua script, so concurrent workers never take the same job.
+    """
+
+    DEQUEUE_SCRIPT = """
+    local now = tonumber(ARGV[1])
+    for _, key in ipairs({KEYS[2], KEYS[3]}) do
+        local due = redis.call('ZRANGEBYSCORE', key, '-inf', now)
+        for _, job in ipairs(due) do
+            redis.call('ZREM', key, job)
+            redis.call('LPUSH', KEYS[1], job)
+        end
+    end
+    local job = redis.call('RPOP', KEYS[1])
+    if job then
+        redis.call('ZADD', KEYS[3], now + tonumber(ARGV[2]), job)
+    end
+    return job
+    """
+
+    def __init__(self, redis: Redis, name: str = JOB_QUEUE_NAME, **kwargs):
+        super().__init__(**kwargs)
+        self.redis = redis
+        self.ready_key = f"jobs:{{{name}}}:ready"
+        self.delayed_key = f"jobs:{{{name}}}:delayed"
+        self.processing_key = f"jobs:{{{name}}}:processing"
+        self.dead_key = f"jobs:{{{name}}}:dead"
+        self._dequeue = redis.register_script(self.DEQUEUE_SCRIPT)
+
+    async def _push(self, raw: str, run_at: float | None) -> None:
+        if run_at is None:
+            await self.redis.lpush(self.ready_key, raw)
+        else:
+            await self.redis.zadd(self.delayed_key, {raw: run_at})
+
+    async def _remove(self, raw: str) -> bool:
+        return bool(await self.redis.zrem(self.processing_key, raw))
+
+    async def _bury(self, raw: str) -> None:
+        await self.redis.lpush(self.dead_key, raw)
+
+    async def dequeue(self) -> Job | None:
+        raw = await self._dequeue(
+            keys=[self.ready_key, self.delayed_key, self.processing_key],
+            args=[time.time(), self.visibility_timeout],
+        )
+        return Job.loads(raw) if raw else None
+
+    async def dead_letters(self, limit: int = 100) -> list[Job]:
+        return [
+            Job.loads(raw)
+            for raw in await self.redis.lrange(self.dead_key, 0, limit - 1)
+        ]
+
+
+class InMemoryJobQueue(JobQueue):
+    """
+    Job queue kept in the memory of one process, for development and tests.
+    """
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self._ready: deque[str] = deque()
+        self._delayed: dict[str, float] = {}
+        self._processing: dict[str, float] = {}
+        self._dead: list[str] = []
+        self._lock = Lock()
+
+    async def _push(self, raw: str, run_at: float | None) -> None:
+        with self._lock:
+            if run_at is None:
+                self._ready.appendleft(raw)
+            else:
+                self._delayed[raw] = run_at
+
+    async def _remove(self, raw: str) -> bool:
+        with self._lock:
+            return self._processing.pop(raw, None) is not None
+
+    async def _bury(self, raw: str) -> None:
+        with self._lock:
+            self._dead.insert(0, raw)
+
+    async def dequeue(self) -> Job | None:
+        now = time.time()
+        with self._lock:
+            for jobs in (self._delayed, self._processing):
+                for raw, run_at in list(jobs.items()):
+                    if run_at <= now:
+                        del jobs[raw]
+                        self._ready.appendleft(raw)
+            if not self._ready:
+                return None
+            raw = self._ready.pop()
+            self._processing[raw] = now + self.visibility_timeout
+        return Job.loads(raw)
+
+    async def dead_letters(self, limit: int = 100) -> list[Job]:
+        with self._lock:
+            return [Job.loads(raw) for raw in self._dead[:limit]]
+
+
+def create_job_queue(backend: str = settings.job_queue_backend) -> JobQueue:
+    """
+    Create the job queue configured for the application.
+
+    Args:
+        backend (str): "redis" or "memory".
+
+    Returns:
+        JobQueue: The job queue.
+    """
+    if backend == "memory":
+        return InMemoryJobQueue()
+    return RedisJobQueue(redis_client)
+
+
+job_queue = create_job_queue()
+
+
+def job_handler(name: str) -> Callable:
+    """
+    Register an async function as the handler of jobs with the given name.
+
+    Args:
+        name (str): The name of the jobs.
+
+    Returns:
+        Callable: The decorator.
+    """
+
+    def register(function: Callable[..., Awaitable]) -> Callable[..., Awaitable]:
+        handlers[name] = function
+        return function
+
+    return register
+
+
+async def enqueue(name: str, **payload) -> Job:
+    """
+    Add a job to the application job queue.
+
+    Args:
+        name (str): The name of the handler.
+        **payload: Keyword arguments of the handler (JSON serializable).
+
+    Returns:
+        Job: The new job.
+    """
+    return await job_queue.enqueue(name, payload)
+
+
+async def run_job(queue: JobQueue, job: Job) -> bool:
+    """
+    Run a dequeued job and acknowledge it, or mark it as failed.
+
+    Args:
+        queue (JobQueue): The queue the job was taken from.
+        job (Job): The job.
+
+    Returns:
+        bool: True if the job succeeded.
+    """
+    handler = handlers.get(job.name)
+    if handler is None:
+        await queue.fail(job, f"Unknown job: {job.name}", retry=False)
+        return False
+    try:
+        await handler(**job.payload)
+    except Exception as e:
+        logger.exception("Job %s %s failed", job.name, job.id)
+        await queue.fail(job, repr(e))
+        return False
+    await queue.ack(job)
+    return True
+
+
+async def run_pending(queue: JobQueue | None = None) -> int:
+    """
+    Run jobs until no job is ready.
+
+    Args:
+        queue (JobQueue | None): The queue, the application job queue by default.
+
+    Returns:
+        int: The number of jobs run.
+    """
+    queue = queue or job_queue
+    count = 0
+    while job := await queue.dequeue():
+        await run_job(queue, job)
+        count += 1
+    return count
+
+
+async def run_worker(
+    queue: JobQueue | None = None, poll_interval: float = JOB_POLL_INTERVAL
+) -> None:
+    """
+    Run jobs forever, waiting poll_interval seconds whenever no job is ready.
+
+    Args:
+        queue (JobQueue | None): The queue, the application job queue by default.
+        poll_interval (float): Number of seconds to wait for new jobs.
+    """
+    while True:
+        if not await run_pending(queue):
+            await asyncio.sleep(poll_interval)
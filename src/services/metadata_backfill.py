@@ -0,0 +1,110 @@
+import argparse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from sqlalchemy.orm import Session
+
+from src.conf.constant import (
+    METADATA_BACKFILL_BATCH_SIZE,
+    METADATA_BACKFILL_WORKERS,
+    METADATA_PROBE_BYTES,
+)
+from src.database.db import SessionLocal
+from src.database.models import Photo
+from src.services.photos import read_image_metadata
+
+
+def fetch_image_header(
+    url: str, probe_bytes: int = METADATA_PROBE_BYTES
+) -> tuple[bytes, int]:
+    """
+    Downloads the beginning of a stored photo with an HTTP range request.
+
+    Args:
+        url (str): The url of the photo.
+        probe_bytes (int): Number of bytes to download.
+
+    Returns:
+        tuple[bytes, int]: The beginning of the photo and the size of the whole file.
+    """
+    request = urllib.request.Request(
+        url, headers={"Range": f"bytes=0-{probe_bytes - 1}"}
+    )
+    with urllib.request.urlopen(request, timeout=30) as response:
+        header = response.read(probe_bytes)
+        content_range = response.headers.get("Content-Range")
+        if content_range and "/" in content_range:
+            byte_size = int(content_range.rsplit("/", 1)[1])
+        else:
+            byte_size = int(response.headers.get("Content-Length") or len(header))
+    return header, byte_size
+
+
+def _photo_metadata(photo_id: int, url: str) -> tuple[int, dict | None]:
+    """
+    Reads metadata of a stored photo, None if the photo cannot be downloaded.
+    """
+    try:
+        header, byte_size = fetch_image_header(url)
+    except Exception:
+        return photo_id, None
+    return photo_id, read_image_metadata(header, byte_size)
+
+
+def backfill_metadata(
+    db: Session,
+    batch_size: int = METADATA_BACKFILL_BATCH_SIZE,
+    workers: int = METADATA_BACKFILL_WORKERS,
+) -> int:
+    """
+    Fills metadata columns of photos uploaded before they were introduced.
+
+    Photos without dimensions are processed in batches ordered by id, the headers of the
+    photos of a batch are downloaded in parallel threads and the batch is saved in one commit.
+    A photo which cannot be read is skipped, so the job always finishes and can be rerun.
+
+    Args:
+        db (Session): Database session.
+        batch_size (int): Number of photos processed in one batch.
+        workers (int): Number of photos downloaded at the same time.
+
+    Returns:
+        int: The number of updated photos.
+    """
+    updated = 0
+    last_id = 0
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        while True:
+            rows = (
+                db.query(Photo.id, Photo.file_path)
+                .filter(Photo.width.is_(None), Photo.id > last_id)
+                .order_by(Photo.id)
+                .limit(batch_size)
+                .all()
+            )
+            if not rows:
+                return updated
+            last_id = rows[-1].id
+            mappings = [
+                {"id": photo_id, **metadata}
+                for photo_id, metadata in executor.map(
+                    lambda row: _photo_metadata(*row), rows
+                )
+                if metadata and metadata["width"] is not None
+            ]
+            if mappings:
+                db.bulk_update_mappings(Photo, mappings)
+                db.commit()
+                updated += len(mappings)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Fill metadata of photos uploaded before it was extracted."
+    )
+    parser.add_argument("--batch-size", type=int, default=METADATA_BACKFILL_BATCH_SIZE)
+    parser.add_argument("--workers", type=int, default=METADATA_BACKFILL_WORKERS)
+    arguments = parser.parse_args()
+    with SessionLocal() as session:
+        count = backfill_metadata(session, arguments.batch_size, arguments.workers)
+    print(f"Updated metadata of {count} photos")
@@ -0,0 +1,225 @@
+import asyncio
+import secrets
+import time
+from contextvars import ContextVar
+from functools import wraps
+
+from fastapi import Request, Response
+from prometheus_client import CONTENT_TYPE_LATEST, Counter, Gauge, Histogram
+from prometheus_client import REGISTRY, generate_latest
+from prometheus_client.core import GaugeMetricFamily
+from prometheus_client.registry import Collector
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from src.conf.config import settings
+from src.conf.constant import EVENT_LOOP_LAG_INTERVAL, METRICS_PATH
+
+HTTP_REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds",
+    "Duration of HTTP requests by route",
+    ["method", "route"],
+)
+HTTP_REQUESTS = Counter(
+    "http_requests_total",
+    "HTTP requests by route and status code",
+    ["method", "route", "status"],
+)
+DB_STATEMENT_DURATION = Histogram(
+    "db_statement_duration_seconds",
+    "Duration of SQL statements",
+    ["database"],
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5),
+)
+DB_STATEMENTS_PER_REQUEST = Histogram(
+    "db_statements_per_request",
+    "Number of SQL statements run by an HTTP request",
+    ["route"],
+    buckets=(0, 1, 2, 5, 10, 20, 50, 100),
+)
+REDIS_COMMAND_DURATION = Histogram(
+    "redis_command_duration_seconds",
+    "Duration of Redis commands",
+    ["command"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1),
+)
+CLOUDINARY_CALL_DURATION = Histogram(
+    "cloudinary_call_duration_seconds",
+    "Duration of Cloudinary API calls",
+    ["operation"],
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60),
+)
+AUTH_CACHE_REQUESTS = Counter(
+    "auth_user_cache_requests_total",
+    "Lookups of authenticated users in the Redis cache",
+    ["result"],
+)
+EVENT_LOOP_LAG = Gauge(
+    "event_loop_lag_seconds",
+    "Delay of a timer on the event loop of the API process",
+)
+
+_request_statements: ContextVar[list[int] | None] = ContextVar(
+    "request_statements", default=None
+)
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware measuring the duration, status code and number of SQL statements of HTTP requests.
+
+    Requests are labelled with the path template of the matched route (e.g. "/api/photos/{photo_id}"),
+    so the number of series does not grow with ids, requests matching no route are labelled "unmatched".
+    Scrapes of the metrics themselves are not measured.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] == METRICS_PATH:
+            await self.app(scope, receive, send)
+            return
+        status_code = 500
+        statements = [0]
+        token = _request_statements.set(statements)
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            duration = time.perf_counter() - start
+            _request_statements.reset(token)
+            route = getattr(scope.get("route"), "path", "unmatched")
+            method = scope["method"]
+            HTTP_REQUEST_DURATION.labels(method, route).observe(duration)
+            HTTP_REQUESTS.labels(method, route, str(status_code)).inc()
+            DB_STATEMENTS_PER_REQUEST.labels(route).observe(statements[0])
+
+
+def instrument_engine(engine: Engine, database: str) -> None:
+    """
+    Measure the SQL statements of the engine and count them for the current HTTP request.
+
+    Args:
+        engine (Engine): The engine.
+        database (str): Label of the database ("primary" or "replica").
+    """
+    histogram = DB_STATEMENT_DURATION.labels(database)
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(
+        connection, cursor, statement, parameters, context, executemany
+    ):
+        connection.info["statement_start"] = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(
+        connection, cursor, statement, parameters, context, executemany
+    ):
+        histogram.observe(time.perf_counter() - connection.info.pop("statement_start"))
+        statements = _request_statements.get()
+        if statements is not None:
+            statements[0] += 1
+
+
+def instrument_redis(client) -> None:
+    """
+    Measure the commands of the Redis client (including the Lua scripts of the limiter and the job queue).
+
+    Args:
+        client (Redis | RedisCluster): The client.
+    """
+    execute_command = client.execute_command
+
+    @wraps(execute_command)
+    async def timed_execute_command(*args, **options):
+        start = time.perf_counter()
+        try:
+            return await execute_command(*args, **options)
+        finally:
+            REDIS_COMMAND_DURATION.labels(str(args[0]).upper()).observe(
+                time.perf_counter() - start
+            )
+
+    client.execute_command = timed_execute_command
+
+
+def cloudinary_timer(operation: str):
+    """
+    Context manager measuring a Cloudinary call.
+
+    Args:
+        operation (str): Label of the call, e.g. "upload".
+
+    Returns:
+        The timer of the histogram of the operation.
+    """
+    return CLOUDINARY_CALL_DURATION.labels(operation).time()
+
+
+class PoolCollector(Collector):
+    """Exposes the usage of the database and Redis connection pools, read when metrics are scraped."""
+
+    def __init__(self, db_pool_stats, redis_pool_stats):
+        self.db_pool_stats = db_pool_stats
+        self.redis_pool_stats = redis_pool_stats
+
+    def collect(self):
+        db_stats = self.db_pool_stats()
+        for name in ("size", "in_use", "available", "overflow"):
+            yield GaugeMetricFamily(
+                f"db_pool_{name}", f"Database pool connections: {name}", db_stats[name]
+            )
+        yield GaugeMetricFamily(
+            "db_pool_checkout_wait_max_seconds",
+            "The longest wait for a database connection",
+            db_stats["wait_max"],
+        )
+        for name, value in self.redis_pool_stats().items():
+            yield GaugeMetricFamily(
+                f"redis_pool_{name}", f"Redis pool connections: {name}", value
+            )
+
+
+async def monitor_event_loop_lag(interval: float = EVENT_LOOP_LAG_INTERVAL) -> None:
+    """
+    Measure how late a timer fires on the event loop, i.e. how long blocking code holds the loop.
+
+    Args:
+        interval (float): Seconds between measurements.
+    """
+    loop = asyncio.get_running_loop()
+    while True:
+        start = loop.time()
+        await asyncio.sleep(interval)
+        EVENT_LOOP_LAG.set(max(loop.time() - start - interval, 0))
+
+
+async def metrics(request: Request) -> Response:
+    """
+    Returns the metrics of the process in the Prometheus text format.
+
+    The scraper must send the configured metrics_token as a bearer token, without a configured
+    token the metrics are not exposed at all.
+
+    Args:
+        request (Request): The request.
+
+    Returns:
+        Response: The metrics, 404 if no token is configured, 401 if the token is wrong.
+    """
+    if not settings.metrics_token:
+        return Response(status_code=404)
+    scheme, _, token = request.headers.get("Authorization", "").partition(" ")
+    if scheme.lower() != "bearer" or not secrets.compare_digest(
+        token.encode(), settings.metrics_token.encode()
+    ):
+        return Response(status_code=401, headers={"WWW-Authenticate": "Bearer"})
+    return Response(generate_latest(REGISTRY), media_type=CONTENT_TYPE_LATEST)
@@ -1,74 +1,1004 @@
+import asyncio
+import hashlib
+import json
+import logging
+import secrets
+import time
+import urllib.request
+from collections import OrderedDict
+from datetime import datetime, timezone
+from concurrent.futures import ProcessPoolExecutor
 from io import BytesIO
+from typing import AsyncIterator
 
 import qrcode
 from fastapi import HTTPException, status, File
+from sqlalchemy.orm import Session
+from PIL import ExifTags, Image, ImageOps
 import cloudinary
+import cloudinary.api
+import cloudinary.exceptions
 import cloudinary.uploader
+import cloudinary.utils
 
 from src.conf.cloudinary_conf import CLOUDINARY_CONFIG, CLOUDINARY_PARAMS
-from src.schemas import PhotoOut, TransformationParameters
+from src.database.db import SessionLocal
+from src.services.geo import encode_geohash
+from src.services.jobs import enqueue, job_handler
+from src.services.metrics import cloudinary_timer
+from src.repository import photos as photos_repository
+from src.repository import presets as presets_repository
+from src.conf.constant import (
+    BATCH_UPLOAD_WORKERS,
+    CONTENT_HASH_CHUNK_BYTES,
+    DHASH_SIZE,
+    EXIF_DATETIME_FORMAT,
+    MAX_CAMERA_LENGTH,
+    IMAGE_HEADER_PROBE_BYTES,
+    MAX_IMAGE_PIXELS,
+    MAX_UPLOAD_BYTES,
+    RENDITION_FORMAT,
+    RENDITION_QUALITY,
+    RENDITION_WIDTHS,
+    RENDITION_WORKERS,
+    SIGNED_UPLOAD_FORMATS,
+    SIGNED_UPLOAD_TTL,
+    TRANSFORMATION_URL_CACHE_SIZE,
+)
+from src.schemas import (
+    PhotoOut,
+    SignedUploadComplete,
+    SignedUploadOut,
+    TransformationParameters,
+)
+
+logger = logging.getLogger(__name__)
+
+_rendition_executor: ProcessPoolExecutor | None = None
+
+IMAGE_SIGNATURES = {
+    b"\xff\xd8\xff": "JPEG",
+    b"\x89PNG\r\n\x1a\n": "PNG",
+    b"GIF87a": "GIF",
+    b"GIF89a": "GIF",
+}
+PHOTO_CONTENT_COLUMNS = (
+    "dhash",
+    "width",
+    "height",
+    "byte_size",
+    "mime_type",
+    "camera",
+    "captured_at",
+    "latitude",
+    "longitude",
+    "geohash",
+)
 
 
 async def _get_cloudinary_public_ip(url: str) -> str:
     return url.split("/")[-1].split(".")[0]
 
 
-async def upload_photo(file: File) -> str:
+def _upload_to_cloudinary(file_object, public_id_prefix: str) -> str:
+    """
+    Uploads a file-like object to Cloudinary (blocking call).
+
+    Args:
+        file_object: File-like object (or bytes) to be uploaded.
+        public_id_prefix (str): Cloudinary public id prefix (folder).
+
+    Returns:
+        str: URL of the uploaded file.
+    """
+    with cloudinary_timer("upload"):
+        upload_result = cloudinary.uploader.upload(
+            file_object,
+            public_id_prefix=public_id_prefix,
+            overwrite=True,
+        )
+    return upload_result["url"]
+
+
+def _make_qr_code(photo_url: str) -> BytesIO:
+    """
+    Renders a PNG QR code leading to the photo.
+
+    Args:
+        photo_url (str): URL of the photo.
+
+    Returns:
+        BytesIO: PNG image of the QR code.
+    """
+    qr = qrcode.QRCode(
+        version=1,
+        error_correction=qrcode.constants.ERROR_CORRECT_L,
+        box_size=10,
+        border=4,
+    )
+    qr.add_data(photo_url)
+    qr.make(fit=True)
+    qr_img = qr.make_image(fill_color="black", back_color="white")
+    qr_buffer = BytesIO()
+    qr_img.save(qr_buffer, format="PNG")
+    qr_buffer.seek(0)
+    return qr_buffer
+
+
+def _render_renditions(
+    data: bytes, widths: dict[str, int], image_format: str, quality: int
+) -> dict[str, bytes]:
+    """
+    Renders smaller versions of a photo (CPU bound, run in a worker process).
+
+    Photos are never upscaled, a photo narrower than the rendition width is only re-encoded.
+
+    Args:
+        data (bytes): The original photo.
+        widths (dict[str, int]): Maximum width of every rendition by its name.
+        image_format (str): Pillow format of the renditions (e.g. "WEBP" or "JPEG").
+        quality (int): Encoder quality of the renditions.
+
+    Returns:
+        dict[str, bytes]: Encoded renditions by their names.
+    """
+    renditions = {}
+    with Image.open(BytesIO(data)) as original:
+        largest = max(widths.values())
+        original.draft("RGB", (largest, largest))
+        image = ImageOps.exif_transpose(original)
+        if image_format == "JPEG" or image.mode not in ("RGB", "RGBA"):
+            image = image.convert("RGB")
+        for name, width in sorted(widths.items(), key=lambda item: -item[1]):
+            if image.width > width:
+                image = image.resize(
+                    (width, max(1, image.height * width // image.width)),
+                    Image.Resampling.LANCZOS,
+                    reducing_gap=2.0,
+                )
+            buffer = BytesIO()
+            image.save(buffer, format=image_format, quality=quality)
+            renditions[name] = buffer.getvalue()
+    return renditions
+
+
+def _get_rendition_executor() -> ProcessPoolExecutor:
+    """
+    Returns the process pool rendering renditions, it is created on first use.
+
+    Returns:
+        ProcessPoolExecutor: The process pool.
+    """
+    global _rendition_executor
+    if _rendition_executor is None:
+        _rendition_executor = ProcessPoolExecutor(max_workers=RENDITION_WORKERS)
+    return _rendition_executor
+
+
+async def create_renditions(data: bytes) -> dict[str, str]:
+    """
+    Renders renditions of a photo in the process pool and uploads them to Cloudinary.
+
+    Until renditions are created clients fall back to the original file_path.
+
+    Args:
+        data (bytes): The original photo.
+
+    Returns:
+        dict[str, str]: URLs of the renditions by their names.
+
+    Raises:
+        Exception: If the photo cannot be rendered or uploaded (the job creating them is retried),
+            the renditions uploaded before the failure are deleted.
+    """
+    rendered = await asyncio.get_running_loop().run_in_executor(
+        _get_rendition_executor(),
+        _render_renditions,
+        data,
+        RENDITION_WIDTHS,
+        RENDITION_FORMAT,
+        RENDITION_QUALITY,
+    )
+    urls = await asyncio.gather(
+        *(
+            asyncio.to_thread(
+                _upload_to_cloudinary,
+                BytesIO(rendition),
+                CLOUDINARY_PARAMS["rendition_public_id_prefix"],
+            )
+            for rendition in rendered.values()
+        ),
+        return_exceptions=True,
+    )
+    errors = [url for url in urls if isinstance(url, BaseException)]
+    if errors:
+        await _destroy_renditions([url for url in urls if isinstance(url, str)])
+        raise errors[0]
+    return dict(zip(rendered, urls))
+
+
+async def _destroy_renditions(urls: list[str]) -> None:
+    """
+    Deletes renditions uploaded as separate Cloudinary files.
+
+    Renditions built as transformations of the original (see cloudinary_renditions) are not
+    separate files and are skipped. Failed deletions are logged, they only leave unused files behind.
+
+    Args:
+        urls (list[str]): URLs of the renditions.
+    """
+    prefix = CLOUDINARY_PARAMS["rendition_public_id_prefix"]
+    for url in urls:
+        if f"{prefix}/" not in url:
+            continue
+        public_id = f"{prefix}/{await _get_cloudinary_public_ip(url)}"
+        try:
+            with cloudinary_timer("destroy"):
+                await asyncio.to_thread(
+                    cloudinary.uploader.destroy, public_id, invalidate=True
+                )
+        except Exception:
+            logger.exception("Rendition %s could not be deleted", url)
+
+
+def _dhash(data: bytes, size: int) -> int:
+    """
+    Computes the difference hash of a photo (CPU bound, run in a worker process).
+
+    The photo is reduced to a (size + 1) x size grayscale image and every bit of the hash
+    tells whether a pixel is brighter than its right neighbour, so re-encoded, resized
+    or slightly edited copies of a photo get the same or a close hash.
+
+    Args:
+        data (bytes): The photo.
+        size (int): Number of rows and bits per row of the hash.
+
+    Returns:
+        int: The hash as a signed 64-bit integer (for size 8), ready to be stored in a BIGINT column.
+    """
+    with Image.open(BytesIO(data)) as original:
+        original.draft("L", (size * 4, size * 4))
+        image = ImageOps.exif_transpose(original).convert("L")
+        pixels = list(
+            image.resize((size + 1, size), Image.Resampling.LANCZOS).getdata()
+        )
+    value = 0
+    for row in range(size):
+        for column in range(size):
+            left = pixels[row * (size + 1) + column]
+            value = (value << 1) | (left > pixels[row * (size + 1) + column + 1])
+    bits = size * size
+    return value - (1 << bits) if value >= 1 << (bits - 1) else value
+
+
+async def compute_dhash(data: bytes) -> int | None:
+    """
+    Computes the perceptual (difference) hash of a photo in the process pool.
+
+    Args:
+        data (bytes): The photo.
+
+    Returns:
+        int | None: The hash, or None if the photo cannot be decoded.
+    """
+    try:
+        return await asyncio.get_running_loop().run_in_executor(
+            _get_rendition_executor(), _dhash, data, DHASH_SIZE
+        )
+    except Exception:
+        return None
+
+
+def cloudinary_renditions(public_id: str) -> dict[str, str]:
+    """
+    Builds URLs of renditions of a photo stored in Cloudinary as Cloudinary transformations
+    (for photos uploaded directly to Cloudinary, whose bytes never reach the API).
+
+    Args:
+        public_id (str): The public id of the photo.
+
+    Returns:
+        dict[str, str]: URLs of the renditions by their names.
+    """
+    return {
+        name: cloudinary.CloudinaryImage(public_id).build_url(
+            width=width,
+            crop="limit",
+            quality=RENDITION_QUALITY,
+            format=RENDITION_FORMAT.lower(),
+        )
+        for name, width in RENDITION_WIDTHS.items()
+    }
+
+
+async def store_photo(file_object) -> str:
     """
-    Uploads a photo to Cloudinary.
+    Uploads a photo to Cloudinary without blocking the event loop.
+
+    Only the original is stored during the upload, its QR code, renditions and metadata
+    are created by the create_qr_code and process_photo_content background jobs.
 
     Args:
-        file (File): File to be uploaded.
+        file_object: File-like object of the photo.
 
     Returns:
         str: URL of the uploaded photo.
     """
-    upload_result = cloudinary.uploader.upload(
-        file.file,
-        public_id_prefix=CLOUDINARY_PARAMS["photo_public_id_prefix"],
-        overwrite=True,
+    return await asyncio.to_thread(
+        _upload_to_cloudinary, file_object, CLOUDINARY_PARAMS["photo_public_id_prefix"]
     )
-    return upload_result["url"]
+
+
+def _read_and_hash(file_object) -> tuple[bytes, str]:
+    """
+    Reads a file in chunks, computing the SHA-256 hash of its content on the way.
+
+    Args:
+        file_object: File-like object of the photo.
+
+    Returns:
+        tuple[bytes, str]: The content of the file and its SHA-256 hash.
+    """
+    hasher = hashlib.sha256()
+    chunks = []
+    for chunk in iter(lambda: file_object.read(CONTENT_HASH_CHUNK_BYTES), b""):
+        hasher.update(chunk)
+        chunks.append(chunk)
+    return b"".join(chunks), hasher.hexdigest()
+
+
+def _exif_datetime(value) -> datetime | None:
+    """
+    Parses an EXIF date ("YYYY:MM:DD HH:MM:SS"), None if it is missing or invalid.
+    """
+    try:
+        return datetime.strptime(str(value).strip("\x00 "), EXIF_DATETIME_FORMAT)
+    except ValueError:
+        return None
+
+
+def _gps_coordinate(value, reference) -> float | None:
+    """
+    Converts an EXIF GPS coordinate (degrees, minutes, seconds and N/S/E/W reference)
+    to degrees, None if it is missing or invalid.
+    """
+    try:
+        degrees, minutes, seconds = (float(part) for part in value)
+    except (TypeError, ValueError, ZeroDivisionError):
+        return None
+    coordinate = degrees + minutes / 60 + seconds / 3600
+    if str(reference).strip("\x00 ").upper() in ("S", "W"):
+        coordinate = -coordinate
+    return coordinate
+
+
+def read_image_metadata(header: bytes, byte_size: int) -> dict:
+    """
+    Reads dimensions, format, camera and capture time of a photo from its headers.
+
+    Pixel data is never decoded, EXIF is taken only from the headers parsed when the file
+    is opened, so the beginning of the file is enough for most photos. Dimensions are
+    reported as displayed, i.e. after the EXIF orientation is applied.
+
+    Args:
+        header (bytes): The photo or its beginning.
+        byte_size (int): The size of the whole photo file in bytes.
+
+    Returns:
+        dict: Values of the width, height, byte_size, mime_type, camera, captured_at,
+            latitude, longitude and geohash columns (None when unknown).
+    """
+    metadata = {
+        "width": None,
+        "height": None,
+        "byte_size": byte_size,
+        "mime_type": None,
+        "camera": None,
+        "captured_at": None,
+        "latitude": None,
+        "longitude": None,
+        "geohash": None,
+    }
+    try:
+        with Image.open(BytesIO(header)) as image:
+            width, height = image.size
+            metadata["mime_type"] = Image.MIME.get(image.format)
+            exif = Image.Exif()
+            if image.info.get("exif"):
+                exif.load(image.info["exif"])
+    except Exception:
+        return metadata
+    if exif.get(ExifTags.Base.Orientation) in (5, 6, 7, 8):
+        width, height = height, width
+    metadata["width"], metadata["height"] = width, height
+    camera = " ".join(
+        str(exif.get(tag, "")).strip("\x00 ")
+        for tag in (ExifTags.Base.Make, ExifTags.Base.Model)
+    ).strip()
+    metadata["camera"] = camera[:MAX_CAMERA_LENGTH] or None
+    metadata["captured_at"] = _exif_datetime(
+        exif.get_ifd(ExifTags.IFD.Exif).get(ExifTags.Base.DateTimeOriginal)
+    ) or _exif_datetime(exif.get(ExifTags.Base.DateTime))
+    gps = exif.get_ifd(ExifTags.IFD.GPSInfo)
+    latitude = _gps_coordinate(
+        gps.get(ExifTags.GPS.GPSLatitude), gps.get(ExifTags.GPS.GPSLatitudeRef)
+    )
+    longitude = _gps_coordinate(
+        gps.get(ExifTags.GPS.GPSLongitude), gps.get(ExifTags.GPS.GPSLongitudeRef)
+    )
+    if (
+        latitude is not None
+        and longitude is not None
+        and -90 <= latitude <= 90
+        and -180 <= longitude <= 180
+    ):
+        metadata["latitude"], metadata["longitude"] = latitude, longitude
+        metadata["geohash"] = encode_geohash(latitude, longitude)
+    return metadata
+
+
+async def store_unique_photo(
+    file_object, db: Session
+) -> tuple[str, str | None, dict[str, str], dict]:
+    """
+    Stores a photo unless a photo with the same content is already stored.
+
+    The file is hashed while it is read, a duplicate costs the hash computation only
+    and reuses the stored photo, its QR code and its renditions. A new photo is stored
+    without them, they are created by background jobs.
+
+    Args:
+        file_object: File-like object of the photo.
+        db (Session): Database session.
+
+    Returns:
+        tuple[str, str | None, dict[str, str], dict]: URL of the photo, URL of its QR code
+            (None until it is created), URLs of its renditions and its metadata
+            (SHA-256 hash of the content).
+    """
+    data, content_hash = await asyncio.to_thread(_read_and_hash, file_object)
+    metadata = {"content_hash": content_hash}
+    assets = await photos_repository.get_photo_assets([content_hash], db)
+    if content_hash in assets:
+        asset = assets[content_hash]
+        return asset.file_path, asset.qr_path, asset.renditions or {}, metadata
+    return await store_photo(BytesIO(data)), None, {}, metadata
+
+
+def _sniff_image_format(header: bytes) -> str | None:
+    """
+    Recognizes the image format by the magic bytes at the beginning of the file.
+
+    Args:
+        header (bytes): First bytes of the file.
+
+    Returns:
+        str | None: Pillow format name or None if the file is not a supported image.
+    """
+    if header[:4] == b"RIFF" and header[8:12] == b"WEBP":
+        return "WEBP"
+    for signature, image_format in IMAGE_SIGNATURES.items():
+        if header.startswith(signature):
+            return image_format
+    return None
+
+
+def _probe_image_size(header: bytes) -> tuple[int, int] | None:
+    """
+    Reads image dimensions from the image header, pixel data is not decoded.
+
+    Args:
+        header (bytes): Beginning of the image file.
+
+    Returns:
+        tuple[int, int] | None: Width and height, None if the header is not complete yet.
+
+    Raises:
+        Image.DecompressionBombError: If the header declares an image too large for Pillow to open.
+    """
+    try:
+        with Image.open(BytesIO(header)) as image:
+            return image.size
+    except Image.DecompressionBombError:
+        raise
+    except Exception:
+        return None
+
+
+def check_image_header(
+    header: bytes, max_pixels: int = MAX_IMAGE_PIXELS
+) -> tuple[int, int] | None:
+    """
+    Validates the beginning of an uploaded image.
+
+    Args:
+        header (bytes): First bytes of the file (up to IMAGE_HEADER_PROBE_BYTES are used).
+        max_pixels (int): Maximum number of pixels (width * height) of the image.
+
+    Returns:
+        tuple[int, int] | None: Width and height of the image, None if more bytes are needed.
+
+    Raises:
+        HTTPException: 415 if the file is not a supported image, 400 if its header is invalid,
+            413 if its dimensions are too large.
+    """
+    header = header[:IMAGE_HEADER_PROBE_BYTES]
+    if len(header) < 12:
+        return None
+    if _sniff_image_format(header) is None:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail="Only JPEG, PNG, GIF and WEBP images are supported",
+        )
+    try:
+        size = _probe_image_size(header)
+    except Image.DecompressionBombError:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Photo must have less than {max_pixels} pixels",
+        )
+    if size is None:
+        if len(header) >= IMAGE_HEADER_PROBE_BYTES:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid image header",
+            )
+        return None
+    if size[0] * size[1] > max_pixels:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Photo must have less than {max_pixels} pixels",
+        )
+    return size
+
+
+async def read_image_stream(
+    chunks: AsyncIterator[bytes],
+    max_bytes: int = MAX_UPLOAD_BYTES,
+    max_pixels: int = MAX_IMAGE_PIXELS,
+) -> BytesIO:
+    """
+    Reads an uploaded image from a stream of chunks, validating it as the chunks arrive.
+
+    The upload is rejected as soon as it exceeds the size limit, when its first bytes are not
+    a supported image or when its header declares too large dimensions, so no storage traffic
+    is made for bad files. Accepted chunks are collected in memory (bounded by max_bytes).
+
+    Args:
+        chunks (AsyncIterator[bytes]): Chunks of the request body.
+        max_bytes (int): Maximum size of the image in bytes.
+        max_pixels (int): Maximum number of pixels (width * height) of the image.
+
+    Returns:
+        BytesIO: The image, ready to be uploaded.
+
+    Raises:
+        HTTPException: 413 if the image is too large, 415 if it is not a supported image,
+            400 if its header is invalid.
+    """
+    buffer = BytesIO()
+    size = None
+    async for chunk in chunks:
+        if buffer.tell() + len(chunk) > max_bytes:
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail=f"Photo must be smaller than {max_bytes} bytes",
+            )
+        buffer.write(chunk)
+        if size is None:
+            size = check_image_header(
+                buffer.getbuffer()[:IMAGE_HEADER_PROBE_BYTES].tobytes(), max_pixels
+            )
+    if size is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid image",
+        )
+    buffer.seek(0)
+    return buffer
+
+
+async def store_photos(
+    files: list[File], db: Session, workers: int = BATCH_UPLOAD_WORKERS
+) -> list[tuple[str, str | None, dict[str, str], dict] | Exception]:
+    """
+    Uploads many photos to Cloudinary concurrently.
+
+    Every file is hashed first, a content which is already stored or repeated in the batch
+    is uploaded at most once. Blocking work runs in threads, at most `workers` files
+    are processed at the same time. A file which cannot be read or uploaded does not stop the others.
+
+    Args:
+        files (list[File]): Files to be uploaded.
+        db (Session): Database session.
+        workers (int): Maximum number of concurrent uploads.
+
+    Returns:
+        list[tuple[str, str | None, dict[str, str], dict] | Exception]: For every file (in the same order)
+            URL of the photo, URL of its QR code, URLs of its renditions and its metadata
+            (as returned by store_unique_photo), or the exception raised while reading or uploading it.
+    """
+    semaphore = asyncio.Semaphore(workers)
+
+    async def read(file: File) -> tuple[bytes, str]:
+        async with semaphore:
+            return await asyncio.to_thread(_read_and_hash, file.file)
+
+    async def store(data: bytes) -> tuple[str, None, dict[str, str]]:
+        async with semaphore:
+            return await store_photo(BytesIO(data)), None, {}
+
+    contents = await asyncio.gather(
+        *(read(file) for file in files), return_exceptions=True
+    )
+    unique_contents = {
+        content[1]: content[0]
+        for content in contents
+        if not isinstance(content, Exception)
+    }
+    assets = await photos_repository.get_photo_assets(list(unique_contents), db)
+    stored = {
+        content_hash: (asset.file_path, asset.qr_path, asset.renditions or {})
+        for content_hash, asset in assets.items()
+    }
+    new_contents = {
+        content_hash: data
+        for content_hash, data in unique_contents.items()
+        if content_hash not in stored
+    }
+    results = await asyncio.gather(
+        *(store(data) for data in new_contents.values()), return_exceptions=True
+    )
+    stored.update(zip(new_contents, results))
+    results = []
+    for content in contents:
+        if isinstance(content, Exception):
+            results.append(content)
+            continue
+        result = stored[content[1]]
+        results.append(
+            result
+            if isinstance(result, Exception)
+            else (*result, {"content_hash": content[1]})
+        )
+    return results
 
 
 async def delete_from_cloudinary(photo: PhotoOut):
     photo_public_id = f"{CLOUDINARY_PARAMS['photo_public_id_prefix']}/{await _get_cloudinary_public_ip(photo.file_path)}"
-    cloudinary.uploader.destroy(photo_public_id, invalidate=True)
-    qrcode_public_id = f"{CLOUDINARY_PARAMS['qr_public_id_prefix']}/{await _get_cloudinary_public_ip(photo.qr_path)}"
-    cloudinary.uploader.destroy(qrcode_public_id, invalidate=True)
+    with cloudinary_timer("destroy"):
+        cloudinary.uploader.destroy(photo_public_id, invalidate=True)
+    if photo.qr_path:
+        qrcode_public_id = f"{CLOUDINARY_PARAMS['qr_public_id_prefix']}/{await _get_cloudinary_public_ip(photo.qr_path)}"
+        with cloudinary_timer("destroy"):
+            cloudinary.uploader.destroy(qrcode_public_id, invalidate=True)
+    await _destroy_renditions(list((photo.renditions or {}).values()))
+
 
+async def discard_unsaved_uploads(
+    photos: list[tuple[str, str | None, dict[str, str], dict]], db: Session
+) -> None:
+    """
+    Deletes from Cloudinary the files uploaded for photos which could not be saved.
 
-async def create_qr_code(photo_url: str) -> str:
+    Files of stored assets reused by the photos are kept. Must be called after the failed
+    transaction is rolled back, so only the assets committed before remain. Failed deletions
+    are logged, they only leave unused files behind.
+
+    Args:
+        photos (list[tuple[str, str | None, dict[str, str], dict]]): URL of the photo, URL of its QR code,
+            URLs of its renditions and its metadata (as returned by store_photos).
+        db (Session): Database session.
+    """
+    assets = await photos_repository.get_photo_assets(
+        [
+            metadata["content_hash"]
+            for *_, metadata in photos
+            if metadata and metadata.get("content_hash")
+        ],
+        db,
+    )
+    kept = {asset.file_path for asset in assets.values()}
+    for file_path in dict.fromkeys(photo[0] for photo in photos):
+        if file_path in kept:
+            continue
+        public_id = f"{CLOUDINARY_PARAMS['photo_public_id_prefix']}/{await _get_cloudinary_public_ip(file_path)}"
+        try:
+            with cloudinary_timer("destroy"):
+                await asyncio.to_thread(
+                    cloudinary.uploader.destroy, public_id, invalidate=True
+                )
+        except Exception:
+            logger.exception("Unsaved upload %s could not be deleted", file_path)
+
+
+def create_signed_upload(user_id: int) -> SignedUploadOut:
+    """
+    Creates signed parameters the client uses to upload a photo directly to Cloudinary.
+
+    The public id is bound to the user, so only the user can finish the upload.
+
+    Args:
+        user_id (int): The id of the uploading user.
+
+    Returns:
+        SignedUploadOut: Parameters of the upload.
+    """
+    timestamp = int(time.time())
+    params = {
+        "timestamp": timestamp,
+        "public_id": f"{CLOUDINARY_PARAMS['photo_public_id_prefix']}/{user_id}_{secrets.token_urlsafe(16)}",
+        "allowed_formats": ",".join(SIGNED_UPLOAD_FORMATS),
+    }
+    config = cloudinary.config()
+    return SignedUploadOut(
+        upload_url=cloudinary.utils.cloudinary_api_url("upload"),
+        api_key=config.api_key,
+        signature=cloudinary.utils.api_sign_request(params, config.api_secret),
+        expires_at=datetime.fromtimestamp(timestamp + SIGNED_UPLOAD_TTL, timezone.utc),
+        **params,
+    )
+
+
+async def verify_signed_upload(upload: SignedUploadComplete, user_id: int) -> str:
+    """
+    Verifies a photo uploaded directly to Cloudinary with create_signed_upload parameters.
+
+    Args:
+        upload (SignedUploadComplete): Data returned by Cloudinary after the upload.
+        user_id (int): The id of the user finishing the upload.
+
+    Returns:
+        str: URL of the uploaded photo.
+
+    Raises:
+        HTTPException: 400 if the signature is invalid, 403 if the upload was issued for another user,
+            404 if the asset does not exist, 413/415 if it is too large or not a supported image.
+    """
+    if not cloudinary.utils.verify_api_response_signature(
+        upload.public_id, upload.version, upload.signature
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid upload signature"
+        )
+    if not upload.public_id.startswith(
+        f"{CLOUDINARY_PARAMS['photo_public_id_prefix']}/{user_id}_"
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="This upload belongs to another user",
+        )
     try:
-        qr = qrcode.QRCode(
-            version=1,
-            error_correction=qrcode.constants.ERROR_CORRECT_L,
-            box_size=10,
-            border=4,
-        )
-        qr.add_data(photo_url)
-        qr.make(fit=True)
-        qr_img = qr.make_image(fill_color="black", back_color="white")
-        qr_buffer = BytesIO()
-        qr_img.save(qr_buffer, format="PNG")
-        qr_buffer.seek(0)
-
-        qr_upload = cloudinary.uploader.upload(
-            qr_buffer,
-            public_id_prefix=CLOUDINARY_PARAMS["qr_public_id_prefix"],
-            overwrite=True,
+        with cloudinary_timer("resource"):
+            resource = await asyncio.to_thread(
+                cloudinary.api.resource, upload.public_id
+            )
+    except cloudinary.exceptions.NotFound:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Uploaded photo not found"
         )
-        qr_url = qr_upload["url"]
-        return qr_url
-    except Exception as e:
+    if resource["format"] not in SIGNED_UPLOAD_FORMATS:
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e)
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail="Only JPEG, PNG, GIF and WEBP images are supported",
+        )
+    if resource["bytes"] > MAX_UPLOAD_BYTES:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Photo must be smaller than {MAX_UPLOAD_BYTES} bytes",
+        )
+    return resource["url"]
+
+
+def _download_photo(url: str) -> bytes:
+    """
+    Downloads a stored photo (blocking call).
+
+    Args:
+        url (str): The url of the photo.
+
+    Returns:
+        bytes: The photo.
+    """
+    with cloudinary_timer("download"):
+        with urllib.request.urlopen(url, timeout=60) as response:
+            return response.read(MAX_UPLOAD_BYTES + 1)
+
+
+async def enqueue_unprocessed_photos() -> int:
+    """
+    Queues the processing of stored photos which still lack a QR code or metadata,
+    e.g. because the queue was unavailable when they were uploaded. Run when the worker starts,
+    the jobs do nothing for photos processed in the meantime.
+
+    Returns:
+        int: The number of queued jobs.
+    """
+    db = SessionLocal()
+    try:
+        without_qr_code, without_metadata = (
+            await photos_repository.get_unprocessed_file_paths(db)
         )
+    finally:
+        db.close()
+    for file_path in without_qr_code:
+        await enqueue("create_qr_code", file_path=file_path)
+    for file_path in without_metadata:
+        await enqueue("process_photo_content", file_path=file_path)
+    return len(without_qr_code) + len(without_metadata)
+
+
+@job_handler("create_qr_code")
+async def create_qr_code(file_path: str) -> None:
+    """
+    Background job creating the QR code of a stored photo, saved to all photos using it.
+    Nothing is done if every photo already has its QR code (e.g. the job was run twice).
+
+    Args:
+         file_path (str): URL of the photo.
+    """
+    db = SessionLocal()
+    try:
+        photos = await photos_repository.get_photos_by_file_path(file_path, db)
+        if all(photo.qr_path for photo in photos):
+            return
+        qr_code_url = next(
+            (photo.qr_path for photo in photos if photo.qr_path), None
+        ) or await asyncio.to_thread(
+            _upload_to_cloudinary,
+            _make_qr_code(file_path),
+            CLOUDINARY_PARAMS["qr_public_id_prefix"],
+        )
+        await photos_repository.set_photo_qr_code(file_path, qr_code_url, db)
+    finally:
+        db.close()
+
+
+@job_handler("process_photo_content")
+async def process_photo_content(file_path: str) -> None:
+    """
+    Background job creating renditions of a stored photo and reading its perceptual hash
+    and metadata, saved to all photos using it.
+
+    Values already known for another photo with the same file (a duplicate) are copied,
+    the photo is downloaded only when something has to be computed.
+
+    Args:
+         file_path (str): URL of the photo.
+    """
+    db = SessionLocal()
+    try:
+        photos = await photos_repository.get_photos_by_file_path(file_path, db)
+        renditions = next(
+            (photo.renditions for photo in photos if photo.renditions), None
+        )
+        processed = [
+            photo
+            for photo in photos
+            if photo.dhash is not None and photo.width is not None
+        ]
+        if not photos or renditions and len(processed) == len(photos):
+            return
+        values = {}
+        if processed:
+            values = {
+                column: getattr(processed[0], column)
+                for column in PHOTO_CONTENT_COLUMNS
+            }
+        if not renditions or not processed:
+            data = await asyncio.to_thread(_download_photo, file_path)
+            if not processed:
+                values = {
+                    "dhash": await compute_dhash(data),
+                    **read_image_metadata(data, len(data)),
+                }
+            if not renditions:
+                renditions = await create_renditions(data)
+        await photos_repository.set_photo_content(file_path, renditions, values, db)
+    finally:
+        db.close()
+
+
+def canonical_transformation(
+    transformation_params: TransformationParameters,
+) -> list[dict]:
+    """
+    Builds the canonical list of Cloudinary transformation parameters.
+
+    Values are stripped and lowercased, the angle is normalized to 0-359 degrees and empty
+    or repeated effects are dropped (the order of the remaining effects is kept, as effects
+    are applied one after another), so equal transformations always give the same list.
+
+    Args:
+         transformation_params (TransformationParameters): Transformation parameters.
+
+    Returns:
+        list[dict]: Transformation parameters in Cloudinary format.
+    """
+    params = []
+    background = transformation_params.background.strip().lower()
+    if background:
+        params.append({"background": background})
+    angle = transformation_params.angle % 360
+    if angle:
+        params.append({"angle": angle})
+    if transformation_params.width and transformation_params.width > 0:
+        params.append({"width": transformation_params.width})
+    if transformation_params.height and transformation_params.height > 0:
+        params.append({"height": transformation_params.height})
+    crop = transformation_params.crop.strip().lower()
+    if crop:
+        params.append({"crop": crop})
+    effects = [effect.strip().lower() for effect in transformation_params.effects]
+    for effect in dict.fromkeys(effect for effect in effects if effect):
+        params.append({"effect": effect})
+    return params
+
+
+def transformation_hash(params: list[dict]) -> str:
+    """
+    Hashes canonical transformation parameters.
+
+    Args:
+         params (list[dict]): Canonical transformation parameters.
+
+    Returns:
+        str: SHA-256 hex digest of the parameters.
+    """
+    return hashlib.sha256(
+        json.dumps(params, sort_keys=True, separators=(",", ":")).encode()
+    ).hexdigest()
+
+
+_transformation_urls: OrderedDict[tuple[str, str], str] = OrderedDict()
+
+
+def _transformation_url(public_id: str, params: list[dict], param_hash: str) -> str:
+    """
+    Builds the URL of a transformed photo, cached by (public_id, param_hash).
+
+    The parameters are not part of the key, they are determined by their hash. The least
+    recently used URLs are dropped above TRANSFORMATION_URL_CACHE_SIZE.
+
+    Args:
+         public_id (str): Cloudinary public id of the photo.
+         params (list[dict]): Canonical transformation parameters.
+         param_hash (str): Hash of the parameters.
+
+    Returns:
+        str: URL of the transformed photo.
+    """
+    key = (public_id, param_hash)
+    url = _transformation_urls.pop(key, None)
+    if url is None:
+        url = cloudinary.utils.cloudinary_url(public_id, transformation=params)[0]
+    _transformation_urls[key] = url
+    if len(_transformation_urls) > TRANSFORMATION_URL_CACHE_SIZE:
+        _transformation_urls.popitem(last=False)
+    return url
+
+
+async def transformation_url(
+    photo_url: str, params: list[dict], param_hash: str
+) -> str:
+    """
+    Function to get the URL of a transformed photo.
+
+    Args:
+         photo_url (str): URL of the photo.
+         params (list[dict]): Canonical transformation parameters.
+         param_hash (str): Hash of the parameters.
+
+    Returns:
+        str: URL of the transformed photo.
+    """
+    photo_public_id = f"{CLOUDINARY_PARAMS['photo_public_id_prefix']}/{await _get_cloudinary_public_ip(photo_url)}"
+    return _transformation_url(photo_public_id, params, param_hash)
 
 
 async def transform_photo(
     photo: PhotoOut, transformation_params: TransformationParameters
-) -> (str, list[str]):
+) -> (str, list[dict], str):
     """
     Function to perform transformations on a photo.
 
@@ -77,34 +1007,92 @@ async def transform_photo(
          transformation_params (TransformationParameters): Transformation parameters.
 
     Returns:
-        tuple (str, list[dict]): URL of the transformed photo.
+        tuple (str, list[dict], str): URL of the transformed photo, canonical transformation parameters
+            and their hash.
     """
     # validate_transformation_params(transformation_params)
 
-    params = []
-    if transformation_params.background:
-        params.append({"background": transformation_params.background})
-    if transformation_params.angle:
-        params.append({"angle": transformation_params.angle})
-    if transformation_params.width and transformation_params.width > 0:
-        params.append({"width": transformation_params.width})
-    if transformation_params.height and transformation_params.height > 0:
-        params.append({"height": transformation_params.height})
-    if transformation_params.crop:
-        params.append({"crop": transformation_params.crop})
-    if transformation_params.effects:
-        for effect in transformation_params.effects:
-            params.append({"effect": effect})
+    params = canonical_transformation(transformation_params)
     if not params:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="No valid transformations were provided.",
         )
-    photo_public_id = f"{CLOUDINARY_PARAMS['photo_public_id_prefix']}/{await _get_cloudinary_public_ip(photo.file_path)}"
-    transform_photo_url = cloudinary.utils.cloudinary_url(
-        photo_public_id, transformation=params
-    )[0]
-    return transform_photo_url, params
+    param_hash = transformation_hash(params)
+    transform_photo_url = await transformation_url(photo.file_path, params, param_hash)
+    return transform_photo_url, params, param_hash
+
+
+async def generate_transformations(
+    transformation_ids: list[int], photo_url: str, params: list[list[dict]]
+) -> None:
+    """
+    Background job asking Cloudinary to render transformations eagerly (one explicit call with eager),
+    so the first viewer does not wait for the lazy rendering. The result is saved
+    as the status of the transformations ("ready" or "failed").
+
+    Args:
+         transformation_ids (list[int]): The IDs of the transformations.
+         photo_url (str): URL of the transformed photo.
+         params (list[list[dict]]): Canonical parameters of every transformation.
+    """
+    photo_public_id = f"{CLOUDINARY_PARAMS['photo_public_id_prefix']}/{await _get_cloudinary_public_ip(photo_url)}"
+    try:
+        with cloudinary_timer("explicit"):
+            await asyncio.to_thread(
+                cloudinary.uploader.explicit,
+                photo_public_id,
+                type="upload",
+                eager=params,
+            )
+        transformation_status = "ready"
+    except Exception:
+        transformation_status = "failed"
+    db = SessionLocal()
+    try:
+        await photos_repository.set_transformation_status(
+            transformation_ids, transformation_status, db
+        )
+    finally:
+        db.close()
+
+
+@job_handler("apply_presets")
+async def apply_presets(photo_id: int, photo_url: str) -> None:
+    """
+    Background job precomputing preset transformations of a new photo, so their URLs
+    are available shortly after the upload. The transformations are saved and rendered eagerly,
+    presets already applied (e.g. by a previous run of the job) are skipped.
+
+    Args:
+         photo_id (int): The ID of the photo.
+         photo_url (str): URL of the photo.
+    """
+    db = SessionLocal()
+    try:
+        try:
+            await photos_repository.get_photo_by_id(photo_id, db)
+        except HTTPException:
+            return
+        transformations = [
+            (
+                await transformation_url(photo_url, preset.params, preset.param_hash),
+                preset.params,
+                preset.param_hash,
+            )
+            for preset in await presets_repository.get_presets(db)
+        ]
+        created = await photos_repository.add_transformations(
+            photo_id, transformations, "pending", db
+        )
+    finally:
+        db.close()
+    if created:
+        await generate_transformations(
+            [transformation.id for transformation in created],
+            photo_url,
+            [transformation.params for transformation in created],
+        )
 
 
 def validate_transformation_params(
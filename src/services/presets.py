@@ -0,0 +1,70 @@
+import time
+
+from src.conf.constant import PRESET_CACHE_TTL
+from src.schemas import TransformationPresetOut
+
+
+class TransformationPresetCache:
+    """
+    In-process cache of transformation presets.
+
+    There are only a handful of presets, so all of them are loaded at once. The cache is
+    cleared on every change made through this process, other processes see the change
+    after at most `ttl` seconds.
+
+    Attributes:
+        ttl (int): Number of seconds after which the cache should be reloaded from the database.
+
+    Methods:
+        is_fresh(): Check if the cache is loaded and not older than ttl.
+        load(presets): Replace the cache content.
+        clear(): Drop the cache content, it will be reloaded on the next request.
+        get(name): Get a preset by its name.
+        all(): Get all presets.
+    """
+
+    def __init__(self, ttl: int = PRESET_CACHE_TTL):
+        self.ttl = ttl
+        self._presets: dict[str, TransformationPresetOut] = {}
+        self._loaded_at: float | None = None
+
+    def is_fresh(self) -> bool:
+        """Check if the cache is loaded and not older than ttl."""
+        return (
+            self._loaded_at is not None
+            and time.monotonic() - self._loaded_at < self.ttl
+        )
+
+    def load(self, presets: list[TransformationPresetOut]) -> None:
+        """
+        Replace the cache content.
+
+        Args:
+            presets (list[TransformationPresetOut]): All presets from the database.
+        """
+        self._presets = {preset.name: preset for preset in presets}
+        self._loaded_at = time.monotonic()
+
+    def clear(self) -> None:
+        """Drop the cache content, it will be reloaded on the next request."""
+        self._presets = {}
+        self._loaded_at = None
+
+    def get(self, name: str) -> TransformationPresetOut | None:
+        """
+        Get a preset by its name.
+
+        Args:
+            name (str): The name of the preset.
+
+        Returns:
+            TransformationPresetOut | None: The preset or None if it does not exist.
+        """
+        return self._presets.get(name)
+
+    def all(self) -> list[TransformationPresetOut]:
+        """Get all presets sorted by name."""
+        return sorted(self._presets.values(), key=lambda preset: preset.name)
+
+
+preset_cache = TransformationPresetCache()
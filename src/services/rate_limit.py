@@ -0,0 +1,276 @@
+import logging
+import math
+import secrets
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from threading import Lock
+
+from fastapi import HTTPException, Request, Response, status
+from jose import JWTError, jwt
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+
+from src.conf.config import settings
+from src.conf.redis_conf import redis_client
+from src.conf.constant import (
+    RATE_LIMIT_LOCAL_MAX_KEYS,
+    RATE_LIMIT_REDIS_RETRY,
+    RATE_LIMITS,
+)
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class RateLimitResult:
+    """
+    The outcome of counting a request against a limit.
+
+    Attributes:
+        allowed (bool): Whether the request may be handled.
+        limit (int): Number of requests allowed in the window.
+        remaining (int): Number of requests left in the current window.
+        reset (float): Number of seconds until the quota is restored
+            (until the next request is allowed if this one was rejected).
+        window (int): Length of the window in seconds.
+    """
+
+    allowed: bool
+    limit: int
+    remaining: int
+    reset: float
+    window: int
+
+    def headers(self) -> dict[str, str]:
+        """RateLimit-* response headers describing the result."""
+        return {
+            "RateLimit-Limit": str(self.limit),
+            "RateLimit-Remaining": str(max(self.remaining, 0)),
+            "RateLimit-Reset": str(max(math.ceil(self.reset), 0)),
+            "RateLimit-Policy": f"{self.limit};w={self.window}",
+        }
+
+
+class TokenBucketLimiter:
+    """
+    In-process token buckets, used with a single API process, in tests and while Redis is unavailable.
+
+    Every key has a bucket of `limit` tokens refilled at `limit / window` tokens per second,
+    a request takes one token. The least recently used buckets are dropped above `max_keys`.
+
+    Methods:
+        hit(key, limit, window): Count a request of the key.
+        clear(): Drop all buckets.
+    """
+
+    def __init__(self, max_keys: int = RATE_LIMIT_LOCAL_MAX_KEYS):
+        self.max_keys = max_keys
+        self._buckets: OrderedDict[str, tuple[float, float]] = OrderedDict()
+        self._lock = Lock()
+
+    def hit(self, key: str, limit: int, window: int) -> RateLimitResult:
+        """
+        Count a request of the key.
+
+        Args:
+            key (str): The key of the bucket.
+            limit (int): Number of requests allowed in the window.
+            window (int): Length of the window in seconds.
+
+        Returns:
+            RateLimitResult: The result.
+        """
+        rate = limit / window
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.pop(key, (limit, now))
+            tokens = min(limit, tokens + (now - updated) * rate)
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            self._buckets[key] = (tokens, now)
+            if len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        reset = (limit - tokens) / rate if allowed else (1 - tokens) / rate
+        return RateLimitResult(allowed, limit, math.floor(tokens), reset, window)
+
+    def clear(self) -> None:
+        """Drop all buckets."""
+        with self._lock:
+            self._buckets.clear()
+
+
+class RateLimiter:
+    """
+    Counts requests of route groups per client.
+
+    With Redis the limit is a sliding window shared by all API processes: the timestamps
+    of the requests of every key are kept in a sorted set, and dropping the old ones,
+    counting and adding the new one is a single Lua script using the Redis clock, so the
+    check is atomic and exact. When Redis fails the local token buckets are used for
+    `redis_retry` seconds before Redis is tried again.
+
+    Attributes:
+        limits (dict[str, tuple[int, int]]): Number of requests and window length in seconds
+            by route group.
+        redis_retry (int): Number of seconds to use local buckets after a Redis failure.
+
+    Methods:
+        hit(name, key): Count a request of the client against the limit of the route group.
+    """
+
+    SLIDING_WINDOW_SCRIPT = """
+    local time = redis.call('TIME')
+    local now = tonumber(time[1]) + tonumber(time[2]) / 1000000
+    local window = tonumber(ARGV[1])
+    local limit = tonumber(ARGV[2])
+    redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', now - window)
+    local count = redis.call('ZCARD', KEYS[1])
+    local allowed = 0
+    if count < limit then
+        redis.call('ZADD', KEYS[1], now, ARGV[3])
+        count = count + 1
+        allowed = 1
+    end
+    redis.call('EXPIRE', KEYS[1], math.ceil(window))
+    local oldest = redis.call('ZRANGE', KEYS[1], 0, 0, 'WITHSCORES')
+    local reset = window
+    if oldest[2] then
+        reset = tonumber(oldest[2]) + window - now
+    end
+    return {allowed, limit - count, tostring(reset)}
+    """
+
+    def __init__(
+        self,
+        redis: Redis | None,
+        limits: dict[str, tuple[int, int]],
+        redis_retry: int = RATE_LIMIT_REDIS_RETRY,
+    ):
+        self.limits = limits
+        self.redis_retry = redis_retry
+        self.local = TokenBucketLimiter()
+        self._redis = redis
+        self._sliding_window = (
+            redis.register_script(self.SLIDING_WINDOW_SCRIPT) if redis else None
+        )
+        self._redis_failed_at: float | None = None
+
+    def _use_redis(self) -> bool:
+        return self._redis is not None and (
+            self._redis_failed_at is None
+            or time.monotonic() - self._redis_failed_at > self.redis_retry
+        )
+
+    async def hit(self, name: str, key: str) -> RateLimitResult:
+        """
+        Count a request of the client against the limit of the route group.
+
+        Args:
+            name (str): The route group.
+            key (str): The client (user or address).
+
+        Returns:
+            RateLimitResult: The result.
+        """
+        limit, window = self.limits[name]
+        key = f"rate_limit:{name}:{key}"
+        if self._use_redis():
+            try:
+                allowed, remaining, reset = await self._sliding_window(
+                    keys=[key], args=[window, limit, secrets.token_hex(8)]
+                )
+            except (RedisError, OSError):
+                logger.warning("Redis is unavailable, using local rate limits")
+                self._redis_failed_at = time.monotonic()
+            else:
+                self._redis_failed_at = None
+                return RateLimitResult(
+                    bool(allowed), limit, int(remaining), float(reset), window
+                )
+        return self.local.hit(key, limit, window)
+
+
+def parse_limits(overrides: dict[str, str]) -> dict[str, tuple[int, int]]:
+    """
+    Merge limits configured as "requests/seconds" into the default limits.
+
+    Args:
+        overrides (dict[str, str]): Limits by route group, e.g. {"upload": "10/60"}.
+
+    Returns:
+        dict[str, tuple[int, int]]: Number of requests and window length by route group.
+    """
+    limits = dict(RATE_LIMITS)
+    for name, value in overrides.items():
+        requests, _, seconds = value.partition("/")
+        limits[name] = (int(requests), int(seconds or 1))
+    return limits
+
+
+def create_rate_limiter(backend: str = settings.rate_limit_backend) -> RateLimiter:
+    """
+    Create the rate limiter configured for the application.
+
+    Args:
+        backend (str): "redis" or "memory".
+
+    Returns:
+        RateLimiter: The rate limiter.
+    """
+    return RateLimiter(
+        None if backend == "memory" else redis_client,
+        parse_limits(settings.rate_limits),
+    )
+
+
+limiter = create_rate_limiter()
+
+
+def client_key(request: Request) -> str:
+    """
+    Identify the client of a request: the user of a valid bearer token or the client address.
+
+    Args:
+        request (Request): The request.
+
+    Returns:
+        str: "user:<email>" or "ip:<address>".
+    """
+    scheme, _, token = request.headers.get("Authorization", "").partition(" ")
+    if scheme.lower() == "bearer" and token:
+        try:
+            payload = jwt.decode(
+                token, settings.secret_key, algorithms=[settings.algorithm]
+            )
+            if payload.get("scope") == "access_token" and payload.get("sub"):
+                return f"user:{payload['sub']}"
+        except JWTError:
+            pass
+    return f"ip:{request.client.host if request.client else 'unknown'}"
+
+
+class RateLimit:
+    """
+    Route dependency limiting requests of a route group per user (per address for anonymous clients).
+
+    Allowed responses get RateLimit-* headers, rejected requests get 429 with Retry-After.
+
+    Attributes:
+        name (str): The route group, a key of the configured limits.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+
+    async def __call__(self, request: Request, response: Response) -> None:
+        result = await limiter.hit(self.name, client_key(request))
+        headers = result.headers()
+        if not result.allowed:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Too many requests",
+                headers={**headers, "Retry-After": headers["RateLimit-Reset"]},
+            )
+        response.headers.update(headers)
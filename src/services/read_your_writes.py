@@ -0,0 +1,122 @@
+import logging
+import time
+from collections import OrderedDict
+from threading import Lock
+
+from fastapi import Request
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+
+from src.conf.config import settings
+from src.conf.constant import RATE_LIMIT_LOCAL_MAX_KEYS, READ_ONLY_METHODS
+from src.conf.redis_conf import redis_client
+from src.services.rate_limit import client_key
+
+logger = logging.getLogger(__name__)
+
+
+class WriteTracker:
+    """
+    Remembers which clients wrote to the database in the last `window` seconds.
+
+    The marks are kept in Redis, so they are seen by all API processes. Without Redis (or when
+    it fails) they are kept in the memory of the process, and a client whose mark cannot be
+    read is treated as a recent writer, so it never reads stale data from a replica.
+
+    Attributes:
+        window (int): Number of seconds the reads of a client go to the primary after its write.
+
+    Methods:
+        mark(key): Remember a write of the client.
+        wrote_recently(key): Check if the client wrote in the last `window` seconds.
+    """
+
+    def __init__(
+        self,
+        redis: Redis | None,
+        window: int,
+        max_keys: int = RATE_LIMIT_LOCAL_MAX_KEYS,
+    ):
+        self.window = window
+        self.max_keys = max_keys
+        self._redis = redis
+        self._local: OrderedDict[str, float] = OrderedDict()
+        self._lock = Lock()
+
+    def _mark_local(self, key: str) -> None:
+        with self._lock:
+            self._local.pop(key, None)
+            self._local[key] = time.monotonic() + self.window
+            if len(self._local) > self.max_keys:
+                self._local.popitem(last=False)
+
+    def _wrote_recently_local(self, key: str) -> bool:
+        with self._lock:
+            return self._local.get(key, 0) > time.monotonic()
+
+    async def mark(self, key: str) -> None:
+        """
+        Remember a write of the client.
+
+        Args:
+            key (str): The client (user or address).
+        """
+        self._mark_local(key)
+        if self._redis is not None:
+            try:
+                await self._redis.set(f"recent_write:{key}", 1, ex=self.window)
+            except (RedisError, OSError):
+                logger.warning("Redis is unavailable, a write is remembered locally")
+
+    async def wrote_recently(self, key: str) -> bool:
+        """
+        Check if the client wrote in the last `window` seconds.
+
+        Args:
+            key (str): The client (user or address).
+
+        Returns:
+            bool: True if the reads of the client should go to the primary database.
+        """
+        if self._wrote_recently_local(key):
+            return True
+        if self._redis is None:
+            return False
+        try:
+            return bool(await self._redis.exists(f"recent_write:{key}"))
+        except (RedisError, OSError):
+            logger.warning("Redis is unavailable, reading from the primary database")
+            return True
+
+
+write_tracker = WriteTracker(redis_client, settings.db_read_your_writes_window)
+
+
+async def route_reads(request: Request, call_next):
+    """
+    HTTP middleware giving clients read-your-writes consistency with read replicas.
+
+    A successful write request, or a read-only one whose session wrote to the primary
+    (request.state.wrote, set by get_db), marks its client, and the read-only requests of
+    a marked client are handled with the primary database (request.state.use_primary,
+    read by get_db). Does nothing if no replicas are configured.
+
+    Args:
+        request (Request): The request.
+        call_next: The next handler of the request.
+
+    Returns:
+        Response: The response.
+    """
+    if not settings.db_replica_urls:
+        return await call_next(request)
+    key = client_key(request)
+    read_only = request.method in READ_ONLY_METHODS
+    if read_only:
+        request.state.use_primary = await write_tracker.wrote_recently(key)
+    response = await call_next(request)
+    if response.status_code < 400 and (
+        not read_only or getattr(request.state, "wrote", False)
+    ):
+        await write_tracker.mark(key)
+    return response
@@ -0,0 +1,160 @@
+import time
+from threading import Lock
+from typing import Iterable
+
+from src.conf.constant import SIMILAR_INDEX_TTL
+
+HASH_MASK = (1 << 64) - 1
+
+
+def hamming_distance(first: int, second: int) -> int:
+    """
+    Number of different bits of two 64-bit hashes (signed or unsigned).
+
+    Args:
+        first (int): The first hash.
+        second (int): The second hash.
+
+    Returns:
+        int: The Hamming distance of the hashes.
+    """
+    return ((first ^ second) & HASH_MASK).bit_count()
+
+
+class PhotoHashIndex:
+    """
+    In-process BK-tree of perceptual hashes of photos used to find near-duplicates.
+
+    Every node holds one distinct hash with the ids of all photos having it, and its children
+    by their Hamming distance from the node. The triangle inequality lets a search for hashes
+    within `max_distance` skip every subtree whose edge distance differs from the distance
+    to the node by more than `max_distance`, so a query visits a small part of the tree.
+    Removed photos only leave their node empty, the tree is rebuilt on the next reload.
+
+    Attributes:
+        ttl (int): Number of seconds after which the index should be reloaded from the database.
+
+    Methods:
+        is_fresh(): Check if the index is loaded and not older than ttl.
+        load(rows): Rebuild the index from (photo_id, hash) rows.
+        clear(): Drop the index content, it will be reloaded on the next request.
+        add(photo_id, photo_hash): Add a photo to the index.
+        remove(photo_id, photo_hash): Remove a photo from the index.
+        search(photo_hash, max_distance): Find photos with hashes within max_distance.
+    """
+
+    def __init__(self, ttl: int = SIMILAR_INDEX_TTL):
+        self.ttl = ttl
+        self._root: list | None = None
+        self._size = 0
+        self._loaded_at: float | None = None
+        self._lock = Lock()
+
+    def __len__(self) -> int:
+        return self._size
+
+    def is_fresh(self) -> bool:
+        """Check if the index is loaded and not older than ttl."""
+        return (
+            self._loaded_at is not None
+            and time.monotonic() - self._loaded_at < self.ttl
+        )
+
+    def load(self, rows: Iterable[tuple[int, int]]) -> None:
+        """
+        Rebuild the index.
+
+        Args:
+            rows (Iterable[tuple[int, int]]): (photo_id, hash) of all hashed photos.
+        """
+        with self._lock:
+            self._root = None
+            self._size = 0
+            for photo_id, photo_hash in rows:
+                self._insert(photo_id, photo_hash)
+            self._loaded_at = time.monotonic()
+
+    def clear(self) -> None:
+        """Drop the index content, it will be reloaded on the next request."""
+        with self._lock:
+            self._root = None
+            self._size = 0
+            self._loaded_at = None
+
+    def _insert(self, photo_id: int, photo_hash: int) -> None:
+        if self._root is None:
+            self._root = [photo_hash, {photo_id}, {}]
+            self._size = 1
+            return
+        node = self._root
+        while True:
+            distance = hamming_distance(photo_hash, node[0])
+            if distance == 0:
+                if photo_id not in node[1]:
+                    node[1].add(photo_id)
+                    self._size += 1
+                return
+            child = node[2].get(distance)
+            if child is None:
+                node[2][distance] = [photo_hash, {photo_id}, {}]
+                self._size += 1
+                return
+            node = child
+
+    def add(self, photo_id: int, photo_hash: int) -> None:
+        """
+        Add a photo to a loaded index, nothing is done while the index is not loaded.
+
+        Args:
+            photo_id (int): The id of the photo.
+            photo_hash (int): The perceptual hash of the photo.
+        """
+        with self._lock:
+            if self._loaded_at is not None:
+                self._insert(photo_id, photo_hash)
+
+    def remove(self, photo_id: int, photo_hash: int) -> None:
+        """
+        Remove a photo from the index.
+
+        Args:
+            photo_id (int): The id of the photo.
+            photo_hash (int): The perceptual hash of the photo.
+        """
+        with self._lock:
+            node = self._root
+            while node is not None:
+                distance = hamming_distance(photo_hash, node[0])
+                if distance == 0:
+                    if photo_id in node[1]:
+                        node[1].discard(photo_id)
+                        self._size -= 1
+                    return
+                node = node[2].get(distance)
+
+    def search(self, photo_hash: int, max_distance: int) -> list[tuple[int, int]]:
+        """
+        Find photos with hashes within max_distance from photo_hash.
+
+        Args:
+            photo_hash (int): The perceptual hash to search for.
+            max_distance (int): The maximum Hamming distance.
+
+        Returns:
+            list[tuple[int, int]]: (photo_id, distance) pairs sorted by distance and photo id.
+        """
+        found = []
+        with self._lock:
+            stack = [self._root] if self._root is not None else []
+            while stack:
+                node_hash, photo_ids, children = stack.pop()
+                distance = hamming_distance(photo_hash, node_hash)
+                if distance <= max_distance:
+                    found.extend((photo_id, distance) for photo_id in photo_ids)
+                for edge, child in children.items():
+                    if distance - max_distance <= edge <= distance + max_distance:
+                        stack.append(child)
+        return sorted(found, key=lambda item: (item[1], item[0]))
+
+
+photo_hash_index = PhotoHashIndex()
@@ -0,0 +1,164 @@
+import time
+from bisect import bisect_left
+from heapq import nlargest
+from threading import Lock
+
+from src.conf.constant import TAG_SUGGEST_CACHE_SIZE, TAG_SUGGEST_CACHE_TTL
+
+
+class TagSuggestionCache:
+    """
+    In-process cache of the most popular tags used to answer autocomplete requests.
+
+    Tag names are kept in a list sorted by their lowercased form, so all tags starting
+    with a given prefix form one contiguous slice located with binary search.
+    The cache holds at most `max_size` most used tags. Every tag missing from a truncated
+    cache is used less often than any cached one, so the cache can answer a prefix query
+    on its own whenever it finds at least `limit` matching tags.
+
+    Attributes:
+        max_size (int): Maximum number of tags kept in the cache.
+        ttl (int): Number of seconds after which the cache should be reloaded from the database.
+
+    Methods:
+        is_fresh(): Check if the cache is loaded and not older than ttl.
+        load(rows, complete): Replace the cache content with (id, tag_name, usage_count) rows.
+        clear(): Drop the cache content, it will be reloaded on the next request.
+        suggest(prefix, limit): Get the most used tags starting with prefix.
+        popular(limit): Get the most used tags.
+        change_usage(tag_id, tag_name, delta): Incrementally update usage count of a tag.
+        remove(tag_name): Remove a deleted tag from the cache.
+    """
+
+    def __init__(
+        self, max_size: int = TAG_SUGGEST_CACHE_SIZE, ttl: int = TAG_SUGGEST_CACHE_TTL
+    ):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._keys: list[tuple[str, str]] = []
+        self._tags: dict[str, list] = {}
+        self._complete = False
+        self._popular: list[tuple[int, str, int]] | None = None
+        self._loaded_at: float | None = None
+        self._lock = Lock()
+
+    def is_fresh(self) -> bool:
+        """Check if the cache is loaded and not older than ttl."""
+        return (
+            self._loaded_at is not None
+            and time.monotonic() - self._loaded_at < self.ttl
+        )
+
+    def load(self, rows: list[tuple[int, str, int]], complete: bool) -> None:
+        """
+        Replace the cache content.
+
+        Args:
+            rows (list[tuple[int, str, int]]): (id, tag_name, usage_count) of the most used tags.
+            complete (bool): True if rows contain all tags from the database.
+        """
+        tags = {tag_name: [tag_id, tag_name, usage] for tag_id, tag_name, usage in rows}
+        keys = sorted((tag_name.lower(), tag_name) for tag_name in tags)
+        with self._lock:
+            self._tags = tags
+            self._keys = keys
+            self._complete = complete
+            self._popular = None
+            self._loaded_at = time.monotonic()
+
+    def clear(self) -> None:
+        """Drop the cache content, it will be reloaded on the next request."""
+        with self._lock:
+            self._tags = {}
+            self._keys = []
+            self._complete = False
+            self._popular = None
+            self._loaded_at = None
+
+    def suggest(self, prefix: str, limit: int) -> list[tuple[int, str, int]] | None:
+        """
+        Get the most used tags starting with prefix.
+
+        Args:
+            prefix (str): Lowercased beginning of the tag name.
+            limit (int): Maximum number of returned tags.
+
+        Returns:
+            list[tuple[int, str, int]] | None: (id, tag_name, usage_count) sorted by usage count
+                (ties in alphabetical order), or None if the cache cannot answer the query
+                and the database has to be asked.
+        """
+        with self._lock:
+            index = bisect_left(self._keys, (prefix, ""))
+            matches = []
+            while index < len(self._keys) and self._keys[index][0].startswith(prefix):
+                matches.append(tuple(self._tags[self._keys[index][1]]))
+                index += 1
+            complete = self._complete
+        if len(matches) < limit and not complete:
+            return None
+        return nlargest(limit, matches, key=lambda tag: tag[2])
+
+    def popular(self, limit: int) -> list[tuple[int, str, int]] | None:
+        """
+        Get the most used tags. The sorted list is memoized until the next write.
+
+        Args:
+            limit (int): Maximum number of returned tags.
+
+        Returns:
+            list[tuple[int, str, int]] | None: (id, tag_name, usage_count) sorted by usage count
+                (ties in alphabetical order), or None if the cache holds fewer tags than requested
+                and the database has to be asked.
+        """
+        with self._lock:
+            if limit > len(self._tags) and not self._complete:
+                return None
+            if self._popular is None:
+                self._popular = sorted(
+                    (tuple(self._tags[tag_name]) for _, tag_name in self._keys),
+                    key=lambda tag: tag[2],
+                    reverse=True,
+                )
+            return self._popular[:limit]
+
+    def change_usage(self, tag_id: int, tag_name: str, delta: int) -> None:
+        """
+        Incrementally update usage count of a tag after a write.
+
+        Tags unknown to a truncated cache are skipped, they will be picked up by the next reload.
+
+        Args:
+            tag_id (int): The id of the tag.
+            tag_name (str): The name of the tag.
+            delta (int): Change of the number of photos using the tag.
+        """
+        if self._loaded_at is None:
+            return
+        with self._lock:
+            self._popular = None
+            tag = self._tags.get(tag_name)
+            if tag:
+                tag[2] = max(tag[2] + delta, 0)
+            elif self._complete:
+                self._tags[tag_name] = [tag_id, tag_name, max(delta, 0)]
+                key = (tag_name.lower(), tag_name)
+                self._keys.insert(bisect_left(self._keys, key), key)
+
+    def remove(self, tag_name: str) -> None:
+        """
+        Remove a deleted tag from the cache.
+
+        Args:
+            tag_name (str): The name of the deleted tag.
+        """
+        with self._lock:
+            self._popular = None
+            if self._tags.pop(tag_name, None) is not None:
+                key = (tag_name.lower(), tag_name)
+                index = bisect_left(self._keys, key)
+                if index < len(self._keys) and self._keys[index] == key:
+                    del self._keys[index]
+
+
+tag_cache = TagSuggestionCache()
@@ -0,0 +1,328 @@
+import fcntl
+import json
+import os
+import secrets
+import time
+from contextlib import contextmanager, nullcontext
+from datetime import datetime, timezone
+from typing import AsyncIterator, BinaryIO, Iterator
+
+from fastapi import HTTPException, status
+
+from src.conf.config import settings
+from src.conf.constant import (
+    IMAGE_HEADER_PROBE_BYTES,
+    MAX_UPLOAD_BYTES,
+    RESUMABLE_UPLOAD_TTL,
+)
+from src.schemas import ResumableUploadOut
+from src.services.photos import check_image_header
+
+
+class ResumableUploadStore:
+    """
+    Staging area of resumable (tus-style) photo uploads.
+
+    Every upload is kept as two files in the staging directory: "<id>.part" with the bytes
+    received so far and "<id>.json" with its metadata (owner, declared length, description,
+    tags, expiry). The size of the part file is the current offset, so an upload can be
+    resumed after a broken connection or a restart of the server. Chunks must be sent
+    in order, starting at the current offset.
+
+    A request writing an upload holds an exclusive lock of its part file, so the API processes
+    sharing the staging directory never write the same upload at once. The request receiving
+    the last chunk marks the upload as completing, it is refused to later requests until
+    the photo is stored (and the upload removed) or storing it fails.
+
+    Attributes:
+        staging_dir (str): Directory where uploads in progress are kept.
+        ttl (int): Number of seconds after the last chunk after which an unfinished upload expires.
+
+    Methods:
+        create(user_id, length, description, tags): Start a new upload.
+        get(upload_id, user_id): Get metadata and offset of an upload.
+        append(upload_id, user_id, offset, chunks): Write the next chunks of an upload.
+        completing(upload_id): Context of storing a completed upload.
+        path(upload_id): Path of the file with the uploaded bytes.
+        discard(upload_id): Remove an upload from the staging area.
+        purge_expired(): Remove abandoned uploads.
+    """
+
+    def __init__(self, staging_dir: str, ttl: int = RESUMABLE_UPLOAD_TTL):
+        self.staging_dir = staging_dir
+        self.ttl = ttl
+
+    def path(self, upload_id: str) -> str:
+        """Path of the file with the uploaded bytes."""
+        return os.path.join(self.staging_dir, f"{upload_id}.part")
+
+    def _meta_path(self, upload_id: str) -> str:
+        return os.path.join(self.staging_dir, f"{upload_id}.json")
+
+    def _save_meta(self, upload_id: str, meta: dict) -> None:
+        with open(self._meta_path(upload_id), "w") as file:
+            json.dump({k: v for k, v in meta.items() if k != "offset"}, file)
+
+    def _try_lock(self, upload_id: str) -> BinaryIO | None:
+        """
+        Take the exclusive lock of the upload without waiting.
+
+        Returns:
+            BinaryIO | None: The locked part file (closing it releases the lock),
+                None if another request holds the lock.
+
+        Raises:
+            FileNotFoundError: If the upload does not exist.
+        """
+        file = open(self.path(upload_id), "rb")
+        try:
+            fcntl.flock(file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            file.close()
+            return None
+        return file
+
+    def _upload_out(self, upload_id: str, meta: dict) -> ResumableUploadOut:
+        return ResumableUploadOut(
+            id=upload_id,
+            offset=meta["offset"],
+            length=meta["length"],
+            expires_at=datetime.fromtimestamp(meta["expires_at"], timezone.utc),
+        )
+
+    def create(
+        self, user_id: int, length: int, description: str, tags: list[str]
+    ) -> ResumableUploadOut:
+        """
+        Start a new upload.
+
+        Args:
+            user_id (int): The id of the uploading user.
+            length (int): The size of the whole file in bytes.
+            description (str): The description of the photo.
+            tags (list[str]): The tags of the photo.
+
+        Returns:
+            ResumableUploadOut: The new upload.
+
+        Raises:
+            HTTPException: 413 if the declared length is too large, 400 if it is not positive.
+        """
+        if length > MAX_UPLOAD_BYTES:
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail=f"Photo must be smaller than {MAX_UPLOAD_BYTES} bytes",
+            )
+        if length <= 0:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Upload length must be positive",
+            )
+        os.makedirs(self.staging_dir, exist_ok=True)
+        self.purge_expired()
+        upload_id = secrets.token_hex(16)
+        meta = {
+            "user_id": user_id,
+            "length": length,
+            "description": description,
+            "tags": tags,
+            "expires_at": time.time() + self.ttl,
+            "header_checked": False,
+            "completing": False,
+        }
+        open(self.path(upload_id), "wb").close()
+        self._save_meta(upload_id, meta)
+        return self._upload_out(upload_id, {**meta, "offset": 0})
+
+    def get(self, upload_id: str, user_id: int) -> dict:
+        """
+        Get metadata and the current offset of an upload.
+
+        Args:
+            upload_id (str): The id of the upload.
+            user_id (int): The id of the user asking for the upload.
+
+        Returns:
+            dict: Metadata of the upload with its current "offset".
+
+        Raises:
+            HTTPException: 404 if the upload does not exist or has expired, 403 if it belongs to another user.
+        """
+        try:
+            with open(self._meta_path(upload_id)) as file:
+                meta = json.load(file)
+            meta["offset"] = os.path.getsize(self.path(upload_id))
+        except (OSError, ValueError):
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND, detail="Upload not found"
+            )
+        if meta["expires_at"] < time.time():
+            self.discard(upload_id)
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND, detail="Upload not found"
+            )
+        if meta["user_id"] != user_id:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="This upload belongs to another user",
+            )
+        return meta
+
+    async def append(
+        self,
+        upload_id: str,
+        user_id: int,
+        offset: int,
+        chunks: AsyncIterator[bytes],
+    ) -> dict:
+        """
+        Write the next chunks of an upload.
+
+        The image header is validated as soon as enough bytes are received,
+        an upload of a file which is not a supported image is discarded.
+
+        Args:
+            upload_id (str): The id of the upload.
+            user_id (int): The id of the uploading user.
+            offset (int): The offset the chunks start at, it must be the current offset.
+            chunks (AsyncIterator[bytes]): The chunks of the request body.
+
+        Returns:
+            dict: Metadata of the upload with its new "offset".
+
+        Raises:
+            HTTPException: 409 if the offset is not the current offset or the upload is being written
+                or completed by another request, 413 if the chunks exceed the declared length,
+                errors of the image header validation.
+        """
+        self.get(upload_id, user_id)
+        try:
+            lock = self._try_lock(upload_id)
+        except FileNotFoundError:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND, detail="Upload not found"
+            )
+        if lock is None:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="Upload is being written by another request",
+            )
+        with lock:
+            meta = self.get(upload_id, user_id)
+            if meta.get("completing"):
+                raise HTTPException(
+                    status_code=status.HTTP_409_CONFLICT,
+                    detail="Upload is being completed by another request",
+                )
+            if offset != meta["offset"]:
+                raise HTTPException(
+                    status_code=status.HTTP_409_CONFLICT,
+                    detail=f"Upload offset is {meta['offset']}",
+                )
+            with open(self.path(upload_id), "ab") as file:
+                async for chunk in chunks:
+                    if meta["offset"] + len(chunk) > meta["length"]:
+                        raise HTTPException(
+                            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                            detail="Chunk exceeds the declared upload length",
+                        )
+                    file.write(chunk)
+                    meta["offset"] += len(chunk)
+            self._check_header(upload_id, meta)
+            meta["expires_at"] = time.time() + self.ttl
+            meta["completing"] = meta["offset"] == meta["length"]
+            self._save_meta(upload_id, meta)
+            return meta
+
+    @contextmanager
+    def completing(self, upload_id: str) -> Iterator[str]:
+        """
+        Context of storing an upload marked as completing by `append`.
+
+        The upload is removed when the context exits normally. If it raises, the mark is
+        cleared, so the last chunk (or an empty one at the final offset) can be sent again.
+
+        Args:
+            upload_id (str): The id of the upload.
+
+        Yields:
+            str: Path of the file with the uploaded bytes.
+        """
+        try:
+            yield self.path(upload_id)
+        except BaseException:
+            try:
+                with open(self._meta_path(upload_id)) as file:
+                    meta = json.load(file)
+                self._save_meta(upload_id, {**meta, "completing": False})
+            except (OSError, ValueError):
+                pass
+            raise
+        self.discard(upload_id)
+
+    def _check_header(self, upload_id: str, meta: dict) -> None:
+        """
+        Validate the image header once enough bytes of the upload are received.
+        An invalid upload is discarded.
+        """
+        if meta["header_checked"]:
+            return
+        with open(self.path(upload_id), "rb") as file:
+            header = file.read(IMAGE_HEADER_PROBE_BYTES)
+        complete = meta["offset"] == meta["length"]
+        try:
+            size = check_image_header(header)
+            if size is None and complete:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid image"
+                )
+        except HTTPException:
+            self.discard(upload_id)
+            raise
+        meta["header_checked"] = size is not None
+
+    def discard(self, upload_id: str) -> None:
+        """Remove an upload from the staging area."""
+        for path in (self.path(upload_id), self._meta_path(upload_id)):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def purge_expired(self) -> int:
+        """
+        Remove abandoned uploads.
+
+        Returns:
+            int: The number of removed uploads.
+        """
+        purged = 0
+        now = time.time()
+        try:
+            names = os.listdir(self.staging_dir)
+        except FileNotFoundError:
+            return 0
+        for name in names:
+            upload_id, extension = os.path.splitext(name)
+            if extension != ".json":
+                continue
+            try:
+                with open(os.path.join(self.staging_dir, name)) as file:
+                    expired = json.load(file)["expires_at"] < now
+            except (OSError, ValueError, KeyError):
+                expired = True
+            if not expired:
+                continue
+            try:
+                lock = self._try_lock(upload_id)
+            except FileNotFoundError:
+                lock = nullcontext()
+            if lock is None:
+                continue
+            with lock:
+                self.discard(upload_id)
+            purged += 1
+        return purged
+
+
+resumable_uploads = ResumableUploadStore(settings.upload_staging_dir)
@@ -1,4 +1,5 @@
 import unittest
+from unittest.mock import patch
 
 from fastapi import HTTPException, status
 
@@ -11,7 +12,11 @@ from src.repository.tags import (
     delete_tag,
     _get_tag,
     _get_photo,
+    suggest_tags,
+    get_popular_tags,
+    recount_tags_usage,
 )
+from src.services.tags import tag_cache
 
 
 def check_tag_in_list_tags(result, tag_name):
@@ -26,6 +31,7 @@ class TestRepositoryTags(unittest.IsolatedAsyncioTestCase):
         Base.metadata.drop_all(bind=engine)
         Base.metadata.create_all(engine)
         self.db = testing_session_local()
+        tag_cache.clear()
         self.user_admin = User(
             username="user_admin",
             email="admin@email.com",
@@ -73,12 +79,12 @@ class TestRepositoryTags(unittest.IsolatedAsyncioTestCase):
             user_id=2,
         )
         self.new_tag_name = "new_tag"
-        self.tag_1 = Tag(tag_name="tag_1")
-        self.tag_2 = Tag(tag_name="tag_2")
-        self.tag_3 = Tag(tag_name="tag_3")
-        self.tag_4 = Tag(tag_name="tag_4")
-        self.tag_5 = Tag(tag_name="tag_5")
-        self.tag_6 = Tag(tag_name="tag_6")
+        self.tag_1 = Tag(tag_name="tag_1", usage_count=2)
+        self.tag_2 = Tag(tag_name="tag_2", usage_count=1)
+        self.tag_3 = Tag(tag_name="tag_3", usage_count=1)
+        self.tag_4 = Tag(tag_name="tag_4", usage_count=1)
+        self.tag_5 = Tag(tag_name="tag_5", usage_count=1)
+        self.tag_6 = Tag(tag_name="tag_6", usage_count=1)
         self.db.add_all(
             [
                 self.user_admin,
@@ -266,3 +272,55 @@ class TestRepositoryTags(unittest.IsolatedAsyncioTestCase):
             _get_photo(photo_id=999, db=self.db)
         self.assertEqual(context.exception.status_code, status.HTTP_404_NOT_FOUND)
         self.assertEqual(context.exception.detail, "Photo not found")
+
+    async def test_suggest_tags_sorted_by_usage(self):
+        result = await suggest_tags(prefix="TAG", limit=2, db=self.db)
+        self.assertEqual(
+            [(tag.tag_name, tag.usage_count) for tag in result],
+            [("tag_1", 2), ("tag_2", 1)],
+        )
+
+    async def test_suggest_tags_cache_updated_on_write(self):
+        await suggest_tags(prefix="new", limit=5, db=self.db)
+        await add_tag(photo_id=2, tag_name=self.new_tag_name, user_id=3, db=self.db)
+        result = await suggest_tags(prefix="new", limit=5, db=self.db)
+        self.assertEqual([tag.tag_name for tag in result], [self.new_tag_name])
+
+    async def test_suggest_tags_database_fallback(self):
+        with patch.object(tag_cache, "max_size", 1):
+            result = await suggest_tags(prefix="tag_2", limit=1, db=self.db)
+        self.assertEqual([tag.tag_name for tag in result], ["tag_2"])
+
+    async def test_usage_count_changed_on_add_and_delete(self):
+        await add_tag(photo_id=3, tag_name="tag_1", user_id=2, db=self.db)
+        self.assertEqual(_get_tag(tag_id=1, db=self.db).usage_count, 3)
+        await delete_tag(photo_id=1, tag_id=1, user=self.user, db=self.db)
+        self.assertEqual(_get_tag(tag_id=1, db=self.db).usage_count, 2)
+
+    async def test_delete_tag_removes_unused_tag(self):
+        await delete_tag(photo_id=1, tag_id=2, user=self.user, db=self.db)
+        self.assertIsNone(self.db.query(Tag).filter(Tag.id == 2).first())
+
+    async def test_update_tag_moves_usage_count(self):
+        await update_tag(
+            photo_id=2,
+            tag_id=1,
+            tag_update_name="tag_2",
+            current_user_id=3,
+            db=self.db,
+        )
+        self.assertEqual(_get_tag(tag_id=1, db=self.db).usage_count, 1)
+        self.assertEqual(_get_tag(tag_id=2, db=self.db).usage_count, 2)
+
+    async def test_recount_tags_usage(self):
+        self.tag_1.usage_count = 10
+        self.tag_2.usage_count = 0
+        self.db.commit()
+        result = await recount_tags_usage(db=self.db)
+        self.assertEqual(result, 2)
+        self.assertEqual(_get_tag(tag_id=1, db=self.db).usage_count, 2)
+        self.assertEqual(_get_tag(tag_id=2, db=self.db).usage_count, 1)
+
+    async def test_get_popular_tags(self):
+        result = await get_popular_tags(limit=3, db=self.db)
+        self.assertEqual([tag.tag_name for tag in result], ["tag_1", "tag_2", "tag_3"])
@@ -1,52 +1,67 @@
 import unittest
 from datetime import datetime
-from unittest.mock import MagicMock
-from sqlalchemy.orm import Session
-from src.database.models import Photo, Tag, PhotoTag, User
+
+from fastapi import HTTPException, status
+from sqlalchemy import event
+
+from src.database.models import Base, Photo, Tag, PhotoTag, User
 from src.repository.users import admin_moderator_search_users_with_photos
+from tests.repository.db_test_config import engine, testing_session_local
 
 
 class TestSearchUsersWithPhotos(unittest.IsolatedAsyncioTestCase):
     def setUp(self):
-        self.session = MagicMock(spec=Session)
-        self.query_mock = MagicMock()
-        self.session.query.return_value = self.query_mock
-        self.query_mock.join.return_value = self.query_mock
-        self.query_mock.filter.return_value = self.query_mock
-        self.query_mock.distinct.return_value = self.query_mock
-        self.query_mock.group_by.return_value = self.query_mock
-        self.query_mock.order_by.return_value = self.query_mock
+        Base.metadata.drop_all(bind=engine)
+        Base.metadata.create_all(bind=engine)
+        self.session = testing_session_local()
 
         self.users = [
             User(
                 id=1,
                 username="user1",
                 email="user1@email.com",
+                password="pasS123!",
                 role="standard",
                 avatar="path/to/avatar1",
                 is_active=True,
+                created_at=datetime(2021, 1, 1),
             ),
             User(
                 id=2,
                 username="user2",
                 email="user2@email.com",
+                password="pasS123!",
                 role="standard",
                 avatar="path/to/avatar2",
                 is_active=True,
+                created_at=datetime(2021, 1, 2),
             ),
             User(
                 id=3,
                 username="user3",
                 email="user3@email.com",
+                password="pasS123!",
                 role="standard",
                 avatar="path/to/avatar3",
                 is_active=True,
+                created_at=datetime(2021, 1, 3),
+            ),
+            User(
+                id=4,
+                username="user4",
+                email="user4@email.com",
+                password="pasS123!",
+                role="standard",
+                avatar="path/to/avatar4",
+                is_active=True,
+                created_at=datetime(2021, 1, 4),
             ),
         ]
         self.photos = [
             Photo(
                 id=1,
                 file_path="path/to/photo1.jpg",
+                qr_path="path/to/qr1.png",
                 description="Beautiful mountain",
                 upload_date=datetime(2021, 1, 1),
                 user_id=1,
@@ -54,6 +69,7 @@ class TestSearchUsersWithPhotos(unittest.IsolatedAsyncioTestCase):
             Photo(
                 id=2,
                 file_path="path/to/photo2.jpg",
+                qr_path="path/to/qr2.png",
                 description="Sunset view",
                 upload_date=datetime(2021, 1, 2),
                 user_id=1,
@@ -61,58 +77,100 @@ class TestSearchUsersWithPhotos(unittest.IsolatedAsyncioTestCase):
             Photo(
                 id=3,
                 file_path="path/to/photo3.jpg",
+                qr_path="path/to/qr3.png",
                 description="Nature and wildlife on mountain",
                 upload_date=datetime(2021, 1, 3),
                 user_id=3,
             ),
+            Photo(
+                id=4,
+                file_path="path/to/photo4.jpg",
+                qr_path="path/to/qr4.png",
+                description="Sunset over the sea",
+                upload_date=datetime(2021, 1, 4),
+                user_id=2,
+            ),
         ]
         self.tags = [
-            Tag(id=1, tag_name="mountain"),
-            Tag(id=2, tag_name="sunset"),
-            Tag(id=3, tag_name="nature"),
+            Tag(id=1, tag_name="mountain", usage_count=1),
+            Tag(id=2, tag_name="sunset", usage_count=1),
+            Tag(id=3, tag_name="nature", usage_count=1),
         ]
         self.photo_tags = [
             PhotoTag(photo_id=1, tag_id=1),
             PhotoTag(photo_id=2, tag_id=2),
             PhotoTag(photo_id=3, tag_id=3),
         ]
+        self.session.add_all(self.users + self.photos + self.tags + self.photo_tags)
+        self.session.commit()
+
+    def tearDown(self):
+        self.session.close()
 
     async def test_search_by_username(self):
-        self.query_mock.all.return_value = [self.users[0]]
         result = await admin_moderator_search_users_with_photos(
             "user1", None, None, self.session
         )
-        self.assertEqual(self.query_mock.filter.call_count, 2)
         self.assertEqual(len(result), 1)
         self.assertEqual(result[0].username, "user1")
+        self.assertEqual(result[0].photo_count, 2)
 
     async def test_search_by_description(self):
-        self.query_mock.all.return_value = [self.users[1]]
         result = await admin_moderator_search_users_with_photos(
             None, "sunset", None, self.session
         )
-        self.assertEqual(len(result), 1)
-        self.assertEqual(result[0].username, "user2")
+        self.assertEqual([user.username for user in result], ["user2", "user1"])
+        self.assertEqual([user.photo_count for user in result], [1, 2])
 
     async def test_search_by_tag(self):
-        self.query_mock.all.return_value = [self.users[1]]
         result = await admin_moderator_search_users_with_photos(
             None, None, "nature", self.session
         )
-        self.query_mock.join.assert_called()
         self.assertEqual(len(result), 1)
-        self.assertEqual(result[0].username, "user2")
+        self.assertEqual(result[0].username, "user3")
 
     async def test_no_results(self):
-        self.query_mock.all.return_value = []
         result = await admin_moderator_search_users_with_photos(
             "nonexistent", None, None, self.session
         )
         self.assertEqual(len(result), 0)
 
     async def test_no_filters(self):
-        self.query_mock.all.return_value = self.users
         result = await admin_moderator_search_users_with_photos(
             None, None, None, self.session
         )
-        self.assertEqual(len(result), 3)
+        self.assertEqual(
+            [user.username for user in result], ["user3", "user2", "user1"]
+        )
+
+    async def test_sort_and_pagination(self):
+        result = await admin_moderator_search_users_with_photos(
+            None, None, None, self.session, "photo_count-desc", 0, 2
+        )
+        self.assertEqual([user.username for user in result], ["user1", "user3"])
+        result = await admin_moderator_search_users_with_photos(
+            None, None, None, self.session, "photo_count-desc", 2, 2
+        )
+        self.assertEqual([user.username for user in result], ["user2"])
+
+    async def test_invalid_sort_option(self):
+        with self.assertRaises(HTTPException) as context:
+            await admin_moderator_search_users_with_photos(
+                None, None, None, self.session, "email-asc"
+            )
+        self.assertEqual(context.exception.status_code, status.HTTP_400_BAD_REQUEST)
+
+    async def test_single_statement(self):
+        statements = []
+
+        def count_statement(conn, cursor, statement, parameters, context, many):
+            statements.append(statement)
+
+        event.listen(engine, "before_cursor_execute", count_statement)
+        try:
+            await admin_moderator_search_users_with_photos(
+                None, "mountain", "mountain", self.session
+            )
+        finally:
+            event.remove(engine, "before_cursor_execute", count_statement)
+        self.assertEqual(len(statements), 1)
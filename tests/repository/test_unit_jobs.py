@@ -0,0 +1,56 @@
+import unittest
+from unittest.mock import patch
+
+from src.services import jobs
+
+
+class TestJobQueue(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.queue = jobs.InMemoryJobQueue(max_attempts=3, retry_delay=0)
+        self.calls = []
+
+        async def flaky(value):
+            self.calls.append(value)
+            if value == "fail":
+                raise RuntimeError("storage unavailable")
+
+        self.handlers = patch.dict(jobs.handlers, {"flaky": flaky})
+        self.handlers.start()
+
+    def tearDown(self):
+        self.handlers.stop()
+
+    async def test_successful_job_is_acknowledged(self):
+        await self.queue.enqueue("flaky", {"value": "ok"})
+
+        self.assertEqual(await jobs.run_pending(self.queue), 1)
+        self.assertEqual(self.calls, ["ok"])
+        self.assertIsNone(await self.queue.dequeue())
+        self.assertEqual(await self.queue.dead_letters(), [])
+
+    async def test_failing_job_is_retried_and_dead_lettered(self):
+        await self.queue.enqueue("flaky", {"value": "fail"})
+
+        self.assertEqual(await jobs.run_pending(self.queue), 3)
+        self.assertEqual(self.calls, ["fail"] * 3)
+        dead = await self.queue.dead_letters()
+        self.assertEqual([(job.name, job.attempts) for job in dead], [("flaky", 3)])
+        self.assertIn("storage unavailable", dead[0].error)
+
+    async def test_unknown_job_is_dead_lettered_without_retries(self):
+        await self.queue.enqueue("unknown", {})
+
+        self.assertEqual(await jobs.run_pending(self.queue), 1)
+        dead = await self.queue.dead_letters()
+        self.assertEqual([(job.name, job.attempts) for job in dead], [("unknown", 1)])
+
+    async def test_unacknowledged_job_is_run_again(self):
+        self.queue.visibility_timeout = 0
+        await self.queue.enqueue("flaky", {"value": "ok"})
+
+        job = await self.queue.dequeue()
+        self.assertEqual((await self.queue.dequeue()).id, job.id)
+
+    def test_queue_without_storage_cannot_be_created(self):
+        with self.assertRaises(TypeError):
+            jobs.JobQueue()
@@ -0,0 +1,63 @@
+import unittest
+from io import BytesIO
+from unittest.mock import patch
+
+from PIL import Image
+
+from src.database.models import Base, Photo, User
+from src.services import metadata_backfill
+from tests.repository.db_test_config import engine, testing_session_local
+
+
+class TestMetadataBackfill(unittest.TestCase):
+    def setUp(self):
+        Base.metadata.drop_all(bind=engine)
+        Base.metadata.create_all(engine)
+        self.db = testing_session_local()
+        self.db.add(
+            User(
+                username="user",
+                email="user@email.com",
+                password="pasS123!",
+                role="standard",
+            )
+        )
+        self.db.add_all(
+            [
+                Photo(
+                    file_path=f"photo_url_{i}",
+                    qr_path="qr_url",
+                    description="description",
+                    user_id=1,
+                )
+                for i in range(5)
+            ]
+        )
+        self.db.commit()
+        image = BytesIO()
+        Image.new("RGB", (64, 48)).save(image, "PNG")
+        self.image = image.getvalue()
+
+    def tearDown(self):
+        self.db.close()
+
+    def fetch(self, url, probe_bytes=None):
+        if url == "photo_url_3":
+            raise OSError("not found")
+        return self.image[:100], 12345
+
+    def test_backfill_metadata(self):
+        with patch.object(
+            metadata_backfill, "fetch_image_header", side_effect=self.fetch
+        ):
+            updated = metadata_backfill.backfill_metadata(
+                self.db, batch_size=2, workers=2
+            )
+        self.assertEqual(updated, 4)
+        photos = self.db.query(Photo).order_by(Photo.id).all()
+        self.assertEqual(
+            [(photo.width, photo.height) for photo in photos],
+            [(64, 48)] * 3 + [(None, None)] + [(64, 48)],
+        )
+        self.assertEqual(photos[0].byte_size, 12345)
+        self.assertEqual(photos[0].mime_type, "image/png")
@@ -0,0 +1,98 @@
+import unittest
+from datetime import datetime
+
+from fastapi import HTTPException, status
+
+from src.database.models import Base, User, Photo, Tag, PhotoTag, Rating
+from src.repository.photos import get_photos_by_tags
+from tests.repository.db_test_config import engine, testing_session_local
+
+
+class TestPhotosByTags(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        Base.metadata.drop_all(bind=engine)
+        Base.metadata.create_all(engine)
+        self.db = testing_session_local()
+        self.user = User(
+            username="user",
+            email="user@email.com",
+            password="pasS123!",
+            confirmed=True,
+            role="standard",
+        )
+        self.db.add(self.user)
+        self.photos = [
+            Photo(
+                file_path=f"photo_url_{i}",
+                qr_path="qr_url",
+                description="description",
+                upload_date=datetime(2024, 5, i + 1),
+                user_id=1,
+            )
+            for i in range(4)
+        ]
+        self.db.add_all(self.photos)
+        self.db.add_all(
+            [
+                Tag(tag_name="cat", usage_count=3),
+                Tag(tag_name="dog", usage_count=2),
+                PhotoTag(photo_id=1, tag_id=1),
+                PhotoTag(photo_id=2, tag_id=1),
+                PhotoTag(photo_id=2, tag_id=2),
+                PhotoTag(photo_id=3, tag_id=1),
+                PhotoTag(photo_id=4, tag_id=2),
+                Rating(photo_id=1, user_id=1, score=5),
+                Rating(photo_id=3, user_id=1, score=2),
+            ]
+        )
+        self.db.commit()
+
+    def tearDown(self):
+        self.db.close()
+
+    async def test_get_photos_by_tag_case_insensitive(self):
+        result = await get_photos_by_tags(
+            ["CAT"], True, "upload_date-desc", None, 10, self.db
+        )
+        self.assertEqual([photo.id for photo in result.items], [3, 2, 1])
+        self.assertIsNone(result.next_cursor)
+
+    async def test_get_photos_by_tags_all_and_any(self):
+        result = await get_photos_by_tags(
+            ["cat", "dog"], True, "upload_date-asc", None, 10, self.db
+        )
+        self.assertEqual([photo.id for photo in result.items], [2])
+        result = await get_photos_by_tags(
+            ["cat", "dog"], False, "upload_date-asc", None, 10, self.db
+        )
+        self.assertEqual([photo.id for photo in result.items], [1, 2, 3, 4])
+
+    async def test_get_photos_by_tags_keyset_pagination(self):
+        page_ids = []
+        cursor = None
+        while True:
+            result = await get_photos_by_tags(
+                ["cat", "dog"], False, "upload_date-desc", cursor, 3, self.db
+            )
+            page_ids.append([photo.id for photo in result.items])
+            cursor = result.next_cursor
+            if cursor is None:
+                break
+        self.assertEqual(page_ids, [[4, 3, 2], [1]])
+
+    async def test_get_photos_by_tags_sorted_by_rating(self):
+        first_page = await get_photos_by_tags(
+            ["cat"], True, "rating-desc", None, 2, self.db
+        )
+        self.assertEqual([photo.id for photo in first_page.items], [1, 3])
+        second_page = await get_photos_by_tags(
+            ["cat"], True, "rating-desc", first_page.next_cursor, 2, self.db
+        )
+        self.assertEqual([photo.id for photo in second_page.items], [2])
+
+    async def test_get_photos_by_tags_invalid_cursor(self):
+        with self.assertRaises(HTTPException) as context:
+            await get_photos_by_tags(
+                ["cat"], True, "rating-desc", "not-a-cursor", 2, self.db
+            )
+        self.assertEqual(context.exception.status_code, status.HTTP_400_BAD_REQUEST)
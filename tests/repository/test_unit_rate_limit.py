@@ -0,0 +1,40 @@
+import unittest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from redis.exceptions import ConnectionError
+
+from src.services import rate_limit
+
+
+class TestRateLimit(unittest.IsolatedAsyncioTestCase):
+    def test_token_bucket_refills(self):
+        buckets = rate_limit.TokenBucketLimiter()
+        with patch.object(rate_limit.time, "monotonic", return_value=100.0):
+            results = [buckets.hit("key", 2, 10) for _ in range(3)]
+        self.assertEqual([result.allowed for result in results], [True, True, False])
+        self.assertEqual(results[2].reset, 5)
+        self.assertTrue(buckets.hit("other", 2, 10).allowed)
+        with patch.object(rate_limit.time, "monotonic", return_value=105.0):
+            self.assertTrue(buckets.hit("key", 2, 10).allowed)
+
+    async def test_sliding_window_in_redis(self):
+        redis = MagicMock()
+        redis.register_script.return_value = AsyncMock(return_value=[0, 0, b"12.5"])
+        limiter = rate_limit.RateLimiter(redis, {"upload": (20, 60)})
+
+        result = await limiter.hit("upload", "user:a@email.com")
+        self.assertFalse(result.allowed)
+        self.assertEqual(result.headers()["RateLimit-Reset"], "13")
+        script = redis.register_script.return_value
+        self.assertEqual(
+            script.call_args.kwargs["keys"], ["rate_limit:upload:user:a@email.com"]
+        )
+
+    async def test_falls_back_to_local_buckets_without_redis(self):
+        redis = MagicMock()
+        redis.register_script.return_value = AsyncMock(side_effect=ConnectionError())
+        limiter = rate_limit.RateLimiter(redis, {"login": (1, 60)})
+
+        self.assertTrue((await limiter.hit("login", "ip:1.2.3.4")).allowed)
+        self.assertFalse((await limiter.hit("login", "ip:1.2.3.4")).allowed)
+        redis.register_script.return_value.assert_awaited_once()
@@ -0,0 +1,53 @@
+import unittest
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from redis.exceptions import ConnectionError
+
+from src.services import read_your_writes
+from src.services.read_your_writes import WriteTracker
+
+
+class TestWriteTracker(unittest.IsolatedAsyncioTestCase):
+    async def test_write_is_remembered_for_the_window(self):
+        tracker = WriteTracker(None, window=5)
+
+        await tracker.mark("user:a@email.com")
+        self.assertTrue(await tracker.wrote_recently("user:a@email.com"))
+        self.assertFalse(await tracker.wrote_recently("user:b@email.com"))
+
+        tracker.window = -1
+        await tracker.mark("user:a@email.com")
+        self.assertFalse(await tracker.wrote_recently("user:a@email.com"))
+
+    async def test_marks_of_other_processes_are_read_from_redis(self):
+        redis = MagicMock()
+        redis.exists = AsyncMock(return_value=1)
+        tracker = WriteTracker(redis, window=5)
+
+        self.assertTrue(await tracker.wrote_recently("user:a@email.com"))
+        redis.exists.assert_awaited_once_with("recent_write:user:a@email.com")
+
+    async def test_primary_is_used_when_redis_fails(self):
+        redis = MagicMock()
+        redis.exists = AsyncMock(side_effect=ConnectionError())
+        tracker = WriteTracker(redis, window=5)
+
+        self.assertTrue(await tracker.wrote_recently("user:a@email.com"))
+
+    async def test_read_only_request_which_wrote_marks_its_client(self):
+        tracker = WriteTracker(None, window=5)
+        request = SimpleNamespace(method="GET", state=SimpleNamespace())
+
+        async def call_next(request):
+            request.state.wrote = True
+            return SimpleNamespace(status_code=200)
+
+        with patch.multiple(
+            read_your_writes,
+            write_tracker=tracker,
+            client_key=lambda request: "user:a@email.com",
+        ), patch.object(read_your_writes.settings, "db_replica_urls", "replica"):
+            await read_your_writes.route_reads(request, call_next)
+        self.assertFalse(request.state.use_primary)
+        self.assertTrue(await tracker.wrote_recently("user:a@email.com"))
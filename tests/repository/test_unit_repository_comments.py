@@ -2,7 +2,12 @@ import unittest
 
 from fastapi import HTTPException, status
 
-from src.repository.comments import add_comment, update_comment, delete_comment
+from src.repository.comments import (
+    add_comment,
+    update_comment,
+    delete_comment,
+    get_latest_comments_for_photos,
+)
 from src.database.models import Base, User, Photo, PhotoTag, Comment, Tag
 from tests.repository.db_test_config import engine, testing_session_local
 
@@ -175,3 +180,19 @@ class TestComments(unittest.IsolatedAsyncioTestCase):
                 db=self.db,
             )
         self.assertEqual(context.exception.status_code, status.HTTP_404_NOT_FOUND)
+
+    async def test_get_latest_comments_for_photos(self):
+        result = await get_latest_comments_for_photos(
+            [self.photo_1.id, self.photo_2.id, self.photo_1.id, 999],
+            limit=2,
+            db=self.db,
+        )
+        self.assertEqual([item.photo_id for item in result], [1, 2, 999])
+        self.assertEqual(
+            [comment.id for comment in result[0].comments],
+            [self.comment_3.id, self.comment_2.id],
+        )
+        self.assertEqual(
+            [comment.id for comment in result[1].comments], [self.comment_4.id]
+        )
+        self.assertEqual(result[2].comments, [])
@@ -1,4 +1,5 @@
 from io import BytesIO
+from unittest.mock import patch
 
 import pytest
 from fastapi.testclient import TestClient
@@ -11,7 +12,9 @@ from main import app
 from src.services.auth import auth_service
 from src.database.models import Base, User, Photo
 from src.database.db import get_db
-
+from src.services import jobs, rate_limit
+from src.services.presets import preset_cache
+from src.services.similar import photo_hash_index
 
 SQLALCHEMY_DATABASE_URL = "sqlite:///./test.db"
 
@@ -25,6 +28,8 @@ TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engin
 def session():
     Base.metadata.drop_all(bind=engine)
     Base.metadata.create_all(bind=engine)
+    preset_cache.clear()
+    photo_hash_index.clear()
 
     db = TestingSessionLocal()
     try:
@@ -33,6 +38,20 @@ def session():
         db.close()
 
 
+@pytest.fixture(scope="function", autouse=True)
+def job_queue():
+    queue = jobs.InMemoryJobQueue()
+    with patch.object(jobs, "job_queue", queue):
+        yield queue
+
+
+@pytest.fixture(scope="function", autouse=True)
+def rate_limiter():
+    limiter = rate_limit.RateLimiter(None, rate_limit.parse_limits({}))
+    with patch.object(rate_limit, "limiter", limiter):
+        yield limiter
+
+
 @pytest.fixture(scope="function")
 def client(session):
     def override_get_db():
@@ -0,0 +1,126 @@
+import csv
+import io
+import json
+
+from unittest.mock import patch
+
+import pytest
+
+from main import app
+from src.conf.config import settings
+from src.conf.redis_conf import BlockingSentinelConnectionPool, create_redis
+from src.database.db import get_db
+from src.schemas import UserOut
+from src.services.auth import auth_service
+from tests.routes.conftest import TestingSessionLocal, add_user_to_db, engine
+
+
+@pytest.fixture(scope="function")
+def admin_client(client):
+    app.dependency_overrides[auth_service.get_current_user] = lambda: UserOut(
+        id=1,
+        username="admin",
+        email="admin@email.com",
+        role="admin",
+        is_active=True,
+    )
+    yield client
+    app.dependency_overrides.pop(auth_service.get_current_user)
+
+
+@pytest.fixture(scope="function")
+def real_db(admin_client):
+    override_get_db = app.dependency_overrides.pop(get_db)
+    with patch("src.database.db.SessionLocal", TestingSessionLocal), patch(
+        "src.routes.admin.SessionLocal", TestingSessionLocal
+    ):
+        yield admin_client
+    app.dependency_overrides[get_db] = override_get_db
+
+
+def test_get_users_filtered(user, session, admin_client):
+    add_user_to_db(user, session).avatar = "avatar.jpg"
+    user.username, user.email, user.is_active = "banned", "banned@email.com", False
+    add_user_to_db(user, session).avatar = "avatar.jpg"
+    session.commit()
+
+    response = admin_client.get("/api/admin/", params={"is_active": False})
+    assert response.status_code == 200, response.text
+    assert [user["username"] for user in response.json()] == ["banned"]
+
+
+def test_export_users_ndjson(user, session, real_db):
+    add_user_to_db(user, session)
+
+    response = real_db.get("/api/admin/users/export")
+    assert response.status_code == 200, response.text
+    assert response.headers["content-type"] == "application/x-ndjson"
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert [line["email"] for line in lines] == [user.email]
+    assert "password" not in lines[0]
+
+
+def test_export_users_csv(user, session, real_db):
+    add_user_to_db(user, session)
+
+    response = real_db.get("/api/admin/users/export", params={"format": "csv"})
+    assert response.status_code == 200, response.text
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert [row["username"] for row in rows] == [user.username]
+
+
+def test_export_users_returns_its_connection(user, session, real_db):
+    add_user_to_db(user, session)
+    session.close()
+
+    response = real_db.get("/api/admin/users/export")
+    assert response.status_code == 200, response.text
+    assert len(response.text.splitlines()) == 1
+    assert engine.pool.checkedout() == 0
+
+
+def test_transformation_presets_crud(admin_client):
+    preset = {"name": "square_sepia", "params": {"width": 300, "effects": ["Sepia"]}}
+
+    response = admin_client.post("/api/admin/transformation_presets", json=preset)
+    assert response.status_code == 201, response.text
+    assert response.json()["params"] == [{"width": 300}, {"effect": "sepia"}]
+    response = admin_client.post("/api/admin/transformation_presets", json=preset)
+    assert response.status_code == 409, response.text
+
+    response = admin_client.put(
+        "/api/admin/transformation_presets/square_sepia", json={"width": 200}
+    )
+    assert response.status_code == 200, response.text
+    response = admin_client.get("/api/admin/transformation_presets")
+    assert [preset["params"] for preset in response.json()] == [[{"width": 200}]]
+
+    response = admin_client.delete("/api/admin/transformation_presets/square_sepia")
+    assert response.status_code == 200, response.text
+    assert admin_client.get("/api/admin/transformation_presets").json() == []
+
+
+def test_redis_pool_stats(admin_client):
+    response = admin_client.get("/api/admin/redis_pool")
+    assert response.status_code == 200, response.text
+    assert response.json() == {
+        "max_connections": settings.redis_max_connections,
+        "in_use": 0,
+        "available": 0,
+    }
+
+
+def test_sentinel_master_uses_blocking_pool():
+    with patch.object(settings, "redis_sentinels", "localhost:26379"):
+        pool = create_redis().connection_pool
+    assert isinstance(pool, BlockingSentinelConnectionPool)
+    assert pool.timeout == settings.redis_pool_timeout
+    assert pool.max_connections == settings.redis_max_connections
+
+
+def test_db_pool_stats(admin_client):
+    response = admin_client.get("/api/admin/db_pool")
+    assert response.status_code == 200, response.text
+    data = response.json()
+    assert data["size"] == settings.db_pool_size
+    assert data["in_use"] >= 0
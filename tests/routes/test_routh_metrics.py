@@ -0,0 +1,44 @@
+from unittest.mock import patch
+
+from prometheus_client import REGISTRY
+from sqlalchemy import text
+
+from src.conf.config import settings
+from src.services import metrics
+from tests.routes.conftest import engine
+
+
+def test_metrics_by_route_template(user, session, client):
+    response = client.post(
+        "/api/auth/login",
+        data={"username": "email", "password": user.password},
+    )
+    assert response.status_code == 401, response.text
+
+    unmatched = {"method": "GET", "route": "unmatched", "status": "200"}
+    scrapes_before = REGISTRY.get_sample_value("http_requests_total", unmatched)
+    assert client.get("/metrics").status_code == 404
+    with patch.object(settings, "metrics_token", "scrape-token"):
+        assert client.get("/metrics").status_code == 401
+        response = client.get(
+            "/metrics", headers={"Authorization": "Bearer scrape-token"}
+        )
+    assert response.status_code == 200, response.text
+    assert (
+        'http_requests_total{method="POST",route="/api/auth/login",status="401"}'
+        in response.text
+    )
+    assert REGISTRY.get_sample_value("http_requests_total", unmatched) == scrapes_before
+    assert "db_pool_in_use" in response.text
+
+
+def test_sql_statements_are_counted_per_request():
+    metrics.instrument_engine(engine, "test")
+    token = metrics._request_statements.set([0])
+    try:
+        with engine.connect() as connection:
+            connection.execute(text("SELECT 1"))
+            connection.execute(text("SELECT 2"))
+        assert metrics._request_statements.get() == [2]
+    finally:
+        metrics._request_statements.reset(token)
@@ -1,9 +1,34 @@
+import asyncio
+import fcntl
+import struct
+import zlib
+
+import cloudinary
+import cloudinary.api
+import cloudinary.exceptions
+import cloudinary.uploader
+import cloudinary.utils
 import pytest
+from fastapi import HTTPException
+from io import BytesIO
+from PIL import ExifTags, Image
+from prometheus_client import REGISTRY
 
 from unittest.mock import patch, MagicMock
+from redis.exceptions import ConnectionError
+from sqlalchemy import text
+from sqlalchemy.exc import SQLAlchemyError
 
-from src.database.models import Photo
+from main import app
+from src.database.models import Photo, PhotoAsset, Tag, TransformationPreset
+from src.conf.constant import MAX_UPLOAD_BYTES, RENDITION_FORMAT, RENDITION_WIDTHS
+from src.repository import photos as photos_repository
+from src.schemas import UserOut
+from src.services import jobs
+from src.services import photos as photos_services
 from src.services.auth import auth_service
+from src.services.geo import encode_geohash
+from src.services.uploads import resumable_uploads
 from tests.routes.conftest import add_user_to_db, create_x_photos
 
 
@@ -21,3 +46,838 @@ def test_get_photos(user, session, client):
         assert response.status_code == 200, response.text
         assert len(data) == no_of_photos
         assert data[1]["file_path"] == photos_created[1].file_path
+
+
+@pytest.fixture(scope="function")
+def user_client(client):
+    app.dependency_overrides[auth_service.get_current_user] = lambda: UserOut(
+        id=1,
+        username="userTest",
+        email="test@email.com",
+        role="standard",
+        is_active=True,
+    )
+    yield client
+    app.dependency_overrides.pop(auth_service.get_current_user)
+
+
+def run_jobs(session, files: dict[str, bytes] | None = None) -> int:
+    with patch.object(
+        photos_services, "SessionLocal", return_value=session
+    ), patch.object(
+        photos_services, "_download_photo", side_effect=lambda url: files[url]
+    ):
+        return asyncio.run(jobs.run_pending())
+
+
+def test_search_rate_limit(client, rate_limiter):
+    rate_limiter.limits["search"] = (2, 60)
+    token = asyncio.run(auth_service.create_access_token(data={"sub": "a@email.com"}))
+
+    for remaining in ("1", "0"):
+        response = client.get("/api/photos/photo/search", params={"query": "cat"})
+        assert response.status_code == 200, response.text
+        assert response.headers["RateLimit-Limit"] == "2"
+        assert response.headers["RateLimit-Remaining"] == remaining
+    response = client.get("/api/photos/photo/search", params={"query": "cat"})
+    assert response.status_code == 429, response.text
+    assert int(response.headers["Retry-After"]) > 0
+
+    response = client.get(
+        "/api/photos/photo/search",
+        params={"query": "cat"},
+        headers={"Authorization": f"Bearer {token}"},
+    )
+    assert response.status_code == 200, response.text
+    assert response.headers["RateLimit-Remaining"] == "1"
+
+
+def test_upload_photos_batch(user, session, user_client, mock_image):
+    add_user_to_db(user, session)
+    image = mock_image.getvalue()
+    stored = [
+        ("photo_url_0", "qr_url_0", {}, {"content_hash": "hash_0"}),
+        RuntimeError("upload failed"),
+    ]
+
+    with patch.object(photos_services, "store_photos", return_value=stored) as store:
+        response = user_client.post(
+            "/api/photos/batch",
+            files=[("files", (f"photo{i}.png", image, "image/png")) for i in range(3)],
+            data={
+                "descriptions": ["first", "second", " "],
+                "tags": ["cat,Dog", "cat", ""],
+            },
+        )
+    assert response.status_code == 200, response.text
+    data = response.json()
+    assert [item["status"] for item in data] == ["created", "failed", "failed"]
+    assert data[0]["photo"]["file_path"] == "photo_url_0"
+    assert data[1]["detail"] == "Photo upload failed"
+    assert data[2]["detail"] == "Description cannot be an empty string"
+    assert len(store.call_args.args[0]) == 2
+    assert session.query(Photo).count() == 1
+    assert session.query(Tag).filter(Tag.tag_name == "cat").one().usage_count == 1
+
+
+def test_upload_photos_batch_deduplicates(user, session, user_client, mock_image):
+    add_user_to_db(user, session)
+
+    with patch.object(
+        photos_services, "store_photo", return_value="photo_url"
+    ) as store:
+        response = user_client.post(
+            "/api/photos/batch",
+            files=[("files", ("photo.png", mock_image.getvalue(), "image/png"))] * 2,
+            data={"descriptions": ["first", "second"]},
+        )
+    assert response.status_code == 200, response.text
+    assert [item["status"] for item in response.json()] == ["created", "created"]
+    store.assert_called_once()
+    assert session.query(PhotoAsset).one().ref_count == 2
+
+
+def test_upload_photos_batch_unreadable_file(user, session, user_client, mock_image):
+    add_user_to_db(user, session)
+    read_and_hash = photos_services._read_and_hash
+
+    def read_or_fail(file_object):
+        data, content_hash = read_and_hash(file_object)
+        if data == b"unreadable":
+            raise OSError("unreadable file")
+        return data, content_hash
+
+    with patch.object(
+        photos_services, "_read_and_hash", side_effect=read_or_fail
+    ), patch.object(photos_services, "store_photo", return_value="photo_url"):
+        response = user_client.post(
+            "/api/photos/batch",
+            files=[
+                ("files", ("photo.png", mock_image.getvalue(), "image/png")),
+                ("files", ("broken.png", b"unreadable", "image/png")),
+            ],
+            data={"descriptions": ["first", "second"]},
+        )
+    assert response.status_code == 200, response.text
+    data = response.json()
+    assert [item["status"] for item in data] == ["created", "failed"]
+    assert data[1]["detail"] == "Photo upload failed"
+
+
+def test_upload_photos_batch_save_failure_discards_new_uploads(
+    user, session, user_client, mock_image
+):
+    add_user_to_db(user, session)
+    other_image = BytesIO()
+    Image.new("RGB", (10, 10), (0, 0, 255)).save(other_image, "PNG")
+    with patch.object(photos_services, "store_photo", return_value="stored_url"):
+        response = user_client.post(
+            "/api/photos/",
+            files={"file": ("photo.png", mock_image.getvalue(), "image/png")},
+            data={"description": "stored"},
+        )
+        assert response.status_code == 201, response.text
+
+    with patch.object(
+        photos_services, "store_photo", return_value="http://cdn/new_url.png"
+    ), patch.object(
+        photos_repository, "upload_photos", side_effect=SQLAlchemyError()
+    ), patch.object(
+        cloudinary.uploader, "destroy"
+    ) as destroy:
+        response = user_client.post(
+            "/api/photos/batch",
+            files=[
+                ("files", ("photo.png", mock_image.getvalue(), "image/png")),
+                ("files", ("other.png", other_image.getvalue(), "image/png")),
+            ],
+            data={"descriptions": ["first", "second"]},
+        )
+    assert response.status_code == 200, response.text
+    assert [item["detail"] for item in response.json()] == [
+        "Photo could not be saved"
+    ] * 2
+    destroy.assert_called_once_with("PhotoShare/new_url", invalidate=True)
+
+
+def test_upload_duplicate_photo_reuses_stored_photo(
+    user, session, user_client, mock_image
+):
+    add_user_to_db(user, session)
+    files = {"file": ("photo.png", mock_image.getvalue(), "image/png")}
+
+    with patch.object(
+        photos_services, "store_photo", return_value="photo_url"
+    ) as store:
+        first = user_client.post(
+            "/api/photos/", files=files, data={"description": "first"}
+        )
+        assert first.json()["qr_path"] is None
+        with patch.object(
+            photos_services, "_upload_to_cloudinary", return_value="qr_url"
+        ), patch.object(
+            photos_services,
+            "create_renditions",
+            return_value={"thumbnail": "thumbnail_url"},
+        ):
+            run_jobs(session, {"photo_url": mock_image.getvalue()})
+        second = user_client.post(
+            "/api/photos/", files=files, data={"description": "second"}
+        )
+    assert second.status_code == 201, second.text
+    store.assert_called_once()
+    assert second.json()["file_path"] == first.json()["file_path"] == "photo_url"
+    assert second.json()["qr_path"] == "qr_url"
+    assert second.json()["renditions"] == {"thumbnail": "thumbnail_url"}
+    assert session.query(PhotoAsset).one().ref_count == 2
+
+    with patch.object(photos_services, "delete_from_cloudinary") as delete:
+        response = user_client.delete(f"/api/photos/{first.json()['id']}")
+        assert response.status_code == 200, response.text
+        delete.assert_not_called()
+        response = user_client.delete(f"/api/photos/{second.json()['id']}")
+        assert response.status_code == 200, response.text
+        delete.assert_called_once()
+    assert session.query(PhotoAsset).count() == 0
+
+
+def gradient_image(width: int, height: int, image_format: str) -> bytes:
+    image = Image.new("L", (width, height))
+    image.putdata(
+        [
+            255 * x // width if y < height // 2 else 255 - 255 * x // width
+            for y in range(height)
+            for x in range(width)
+        ]
+    )
+    file = BytesIO()
+    image.save(file, image_format)
+    return file.getvalue()
+
+
+def test_get_similar_photos(user, session, user_client, mock_image):
+    add_user_to_db(user, session)
+    uploads = [
+        gradient_image(400, 300, "PNG"),
+        gradient_image(200, 150, "JPEG"),
+        mock_image.getvalue(),
+    ]
+    ids = []
+    with patch.object(
+        photos_services,
+        "store_photo",
+        side_effect=[f"photo_url_{i}" for i in range(3)],
+    ):
+        for upload in uploads:
+            response = user_client.post(
+                "/api/photos/",
+                files={"file": ("photo", upload, "image/png")},
+                data={"description": "similar"},
+            )
+            assert response.status_code == 201, response.text
+            ids.append(response.json()["id"])
+    with patch.object(
+        photos_services, "_upload_to_cloudinary", return_value="qr_url"
+    ), patch.object(photos_services, "create_renditions", return_value={}):
+        run_jobs(
+            session, {f"photo_url_{i}": upload for i, upload in enumerate(uploads)}
+        )
+
+    response = user_client.get(f"/api/photos/{ids[0]}/similar")
+    assert response.status_code == 200, response.text
+    assert [photo["id"] for photo in response.json()] == [ids[1]]
+    assert response.json()[0]["distance"] <= 6
+    response = user_client.get("/api/photos/999/similar")
+    assert response.status_code == 404, response.text
+
+
+def test_upload_photos_batch_mismatched_descriptions(user_client, mock_image):
+    response = user_client.post(
+        "/api/photos/batch",
+        files=[("files", ("photo.png", mock_image.getvalue(), "image/png"))] * 2,
+        data={"descriptions": ["only one"]},
+    )
+    assert response.status_code == 400, response.text
+
+
+def test_upload_photo_stream(user, session, user_client, mock_image):
+    add_user_to_db(user, session)
+
+    with patch.object(
+        photos_services, "store_photo", return_value="photo_url"
+    ) as store:
+        response = user_client.post(
+            "/api/photos/stream",
+            params={"description": "streamed", "tags": "cat"},
+            content=mock_image.getvalue(),
+            headers={"Content-Type": "image/png"},
+        )
+    assert response.status_code == 201, response.text
+    assert response.json()["file_path"] == "photo_url"
+    assert store.call_args.args[0].getvalue() == mock_image.getvalue()
+
+
+def test_upload_photo_metadata(user, session, user_client):
+    add_user_to_db(user, session)
+    exif = Image.Exif()
+    exif[ExifTags.Base.Make] = "Canon"
+    exif[ExifTags.Base.Model] = "EOS 5D"
+    exif[ExifTags.Base.Orientation] = 6
+    exif.get_ifd(ExifTags.IFD.Exif)[
+        ExifTags.Base.DateTimeOriginal
+    ] = "2024:05:01 12:30:00"
+    gps = exif.get_ifd(ExifTags.IFD.GPSInfo)
+    gps[ExifTags.GPS.GPSLatitudeRef] = "N"
+    gps[ExifTags.GPS.GPSLatitude] = (52.0, 13.0, 48.0)
+    gps[ExifTags.GPS.GPSLongitudeRef] = "W"
+    gps[ExifTags.GPS.GPSLongitude] = (21.0, 0.0, 36.0)
+    file = BytesIO()
+    Image.new("RGB", (400, 300)).save(file, "JPEG", exif=exif)
+
+    with patch.object(photos_services, "store_photo", return_value="photo_url"):
+        response = user_client.post(
+            "/api/photos/",
+            files={"file": ("photo.jpg", file.getvalue(), "image/jpeg")},
+            data={"description": "exif"},
+        )
+    assert response.status_code == 201, response.text
+    assert response.json()["width"] is None
+    with patch.object(
+        photos_services, "_upload_to_cloudinary", return_value="qr_url"
+    ), patch.object(photos_services, "create_renditions", return_value={}):
+        run_jobs(session, {"photo_url": file.getvalue()})
+    data = user_client.get(f"/api/photos/{response.json()['id']}").json()
+    assert (data["width"], data["height"]) == (300, 400)
+    assert data["byte_size"] == len(file.getvalue())
+    assert data["mime_type"] == "image/jpeg"
+    assert data["camera"] == "Canon EOS 5D"
+    assert data["captured_at"] == "2024-05-01T12:30:00"
+    assert (round(data["latitude"], 2), round(data["longitude"], 2)) == (52.23, -21.01)
+
+
+def test_get_nearby_photos(user, session, user_client):
+    add_user_to_db(user, session)
+    locations = [(52.2297, 21.0122), (52.2310, 21.0150), (52.4064, 16.9252)]
+    locations += [(52.2300, 21.0100)] * 3
+    for latitude, longitude in locations:
+        session.add(
+            Photo(
+                file_path="photo_url",
+                qr_path="qr_url",
+                description="located",
+                user_id=1,
+                latitude=latitude,
+                longitude=longitude,
+                geohash=encode_geohash(latitude, longitude),
+            )
+        )
+    session.add(
+        Photo(file_path="photo_url", qr_path="qr_url", description="", user_id=1)
+    )
+    session.commit()
+
+    pages, cursor = [], None
+    while True:
+        params = {"bbox": "20.9,52.1,21.1,52.3", "limit": 2}
+        response = user_client.get(
+            "/api/photos/nearby",
+            params={**params, "cursor": cursor} if cursor else params,
+        )
+        assert response.status_code == 200, response.text
+        pages.append([photo["id"] for photo in response.json()["items"]])
+        cursor = response.json()["next_cursor"]
+        if cursor is None:
+            break
+    assert pages == [[4, 5], [6, 1], [2]]
+
+    response = user_client.get(
+        "/api/photos/nearby", params={"lat": 52.2297, "lon": 21.0122, "radius": 200}
+    )
+    assert [photo["id"] for photo in response.json()["items"]] == [4, 5, 6, 1]
+    first = asyncio.run(
+        photos_repository.get_nearby_photos(
+            52.2, 21.0, 52.3, 21.1, None, 3, session, (52.2297, 21.0122, 200), 2
+        )
+    )
+    assert [photo.id for photo in first.items] == [4, 5, 6]
+    second = asyncio.run(
+        photos_repository.get_nearby_photos(
+            52.2,
+            21.0,
+            52.3,
+            21.1,
+            first.next_cursor,
+            3,
+            session,
+            (52.2297, 21.0122, 200),
+            2,
+        )
+    )
+    assert [photo.id for photo in second.items] == [1]
+    third = asyncio.run(
+        photos_repository.get_nearby_photos(
+            52.2,
+            21.0,
+            52.3,
+            21.1,
+            second.next_cursor,
+            3,
+            session,
+            (52.2297, 21.0122, 200),
+            2,
+        )
+    )
+    assert (third.items, third.next_cursor) == ([], None)
+    response = user_client.get("/api/photos/nearby", params={"bbox": "-180,-90,180,90"})
+    assert response.status_code == 400, response.text
+    response = user_client.get(
+        "/api/photos/nearby", params={"lat": 0, "lon": 179.9, "radius": 50_000}
+    )
+    assert response.status_code == 400, response.text
+    response = user_client.get("/api/photos/nearby", params={"bbox": "1,2,3"})
+    assert response.status_code == 400, response.text
+    response = user_client.get("/api/photos/nearby", params={"lat": 52.0})
+    assert response.status_code == 400, response.text
+
+
+def test_nearby_photos_scan_uses_geohash_index(session):
+    query = photos_repository._nearby_scan_query("u3qc", ("u3qcnh5jb", 4), 21, session)
+    statement = query.statement.compile(
+        session.get_bind(), compile_kwargs={"literal_binds": True}
+    )
+    plan = " ".join(
+        row[-1] for row in session.execute(text(f"EXPLAIN QUERY PLAN {statement}"))
+    )
+    assert "USING INDEX ix_photos_geohash_id" in plan
+    assert "TEMP B-TREE" not in plan
+
+
+def test_upload_photo_stream_not_an_image(user_client):
+    with patch.object(photos_services, "store_photo") as store:
+        response = user_client.post(
+            "/api/photos/stream",
+            params={"description": "text"},
+            content=b"definitely not an image",
+        )
+    assert response.status_code == 415, response.text
+    store.assert_not_called()
+
+
+def test_upload_photo_stream_too_large(user_client):
+    with patch.object(photos_services, "store_photo") as store:
+        response = user_client.post(
+            "/api/photos/stream",
+            params={"description": "huge"},
+            content=b"\x89PNG\r\n\x1a\n",
+            headers={"Content-Length": str(MAX_UPLOAD_BYTES + 1)},
+        )
+    assert response.status_code == 413, response.text
+    store.assert_not_called()
+
+
+def test_upload_photo_stream_decompression_bomb(user_client):
+    ihdr = b"IHDR" + struct.pack(">IIBBBBB", 20_000, 20_000, 8, 2, 0, 0, 0)
+    header = (
+        b"\x89PNG\r\n\x1a\n"
+        + struct.pack(">I", 13)
+        + ihdr
+        + struct.pack(">I", zlib.crc32(ihdr))
+        + struct.pack(">I", 0)
+        + b"IDAT"
+    )
+    with patch.object(photos_services, "store_photo") as store:
+        response = user_client.post(
+            "/api/photos/stream",
+            params={"description": "bomb"},
+            content=header,
+        )
+    assert response.status_code == 413, response.text
+    store.assert_not_called()
+
+
+def test_signed_upload(user, session, user_client):
+    add_user_to_db(user, session)
+    response = user_client.post("/api/photos/signed_upload")
+    assert response.status_code == 200, response.text
+    params = response.json()
+    assert params["public_id"].startswith("PhotoShare/1_")
+    api_secret = cloudinary.config().api_secret
+    signed = {key: params[key] for key in ("timestamp", "public_id", "allowed_formats")}
+    assert params["signature"] == cloudinary.utils.api_sign_request(signed, api_secret)
+
+    upload = {
+        "public_id": params["public_id"],
+        "version": 1,
+        "signature": cloudinary.utils.api_sign_request(
+            {"public_id": params["public_id"], "version": 1},
+            api_secret,
+            signature_version=1,
+        ),
+        "description": "direct",
+        "tags": ["cat"],
+    }
+    resource = {"format": "png", "bytes": 1024, "url": "photo_url"}
+    with patch.object(cloudinary.api, "resource", return_value=resource):
+        response = user_client.post("/api/photos/signed_upload/complete", json=upload)
+        assert response.status_code == 201, response.text
+        assert response.json()["file_path"] == "photo_url"
+        response = user_client.post("/api/photos/signed_upload/complete", json=upload)
+        assert response.status_code == 409, response.text
+
+    image = BytesIO()
+    Image.new("RGB", (64, 48)).save(image, "PNG")
+    with patch.object(
+        photos_services, "_upload_to_cloudinary", return_value="qr_url"
+    ), patch.object(photos_services, "create_renditions") as create_renditions:
+        assert run_jobs(session, {"photo_url": image.getvalue()}) == 2
+    create_renditions.assert_not_called()
+    photo = session.query(Photo).one()
+    assert (photo.qr_path, photo.width, photo.height) == ("qr_url", 64, 48)
+
+
+def test_signed_upload_complete_invalid_signature(user_client):
+    upload = {
+        "public_id": "PhotoShare/1_token",
+        "version": 1,
+        "signature": "forged",
+        "description": "direct",
+    }
+    response = user_client.post("/api/photos/signed_upload/complete", json=upload)
+    assert response.status_code == 400, response.text
+
+
+@pytest.fixture(scope="function")
+def staging_dir(tmp_path):
+    with patch.object(resumable_uploads, "staging_dir", str(tmp_path)):
+        yield tmp_path
+
+
+def test_resumable_upload(user, session, user_client, mock_image, staging_dir):
+    add_user_to_db(user, session)
+    image = mock_image.getvalue()
+
+    response = user_client.post(
+        "/api/photos/uploads",
+        params={"description": "resumed", "tags": "cat"},
+        headers={"Upload-Length": str(len(image))},
+    )
+    assert response.status_code == 201, response.text
+    location = response.headers["Location"]
+
+    response = user_client.patch(
+        location, content=image[:100], headers={"Upload-Offset": "0"}
+    )
+    assert response.status_code == 204, response.text
+    assert response.headers["Upload-Offset"] == "100"
+
+    response = user_client.patch(
+        location, content=image[:100], headers={"Upload-Offset": "0"}
+    )
+    assert response.status_code == 409, response.text
+
+    response = user_client.head(location)
+    assert response.headers["Upload-Offset"] == "100"
+
+    with patch.object(
+        photos_services, "store_photo", return_value="photo_url"
+    ) as store:
+        response = user_client.patch(
+            location, content=image[100:], headers={"Upload-Offset": "100"}
+        )
+    assert response.status_code == 201, response.text
+    assert response.json()["description"] == "resumed"
+    store.assert_called_once()
+    assert list(staging_dir.iterdir()) == []
+
+
+async def _no_chunks():
+    return
+    yield
+
+
+def test_resumable_upload_completed_once(
+    user, session, user_client, mock_image, staging_dir
+):
+    add_user_to_db(user, session)
+    image = mock_image.getvalue()
+    response = user_client.post(
+        "/api/photos/uploads",
+        params={"description": "completed once"},
+        headers={"Upload-Length": str(len(image))},
+    )
+    location = response.headers["Location"]
+    upload_id = location.rsplit("/", 1)[-1]
+
+    with open(resumable_uploads.path(upload_id), "rb") as file:
+        fcntl.flock(file, fcntl.LOCK_EX)
+        response = user_client.patch(
+            location, content=image, headers={"Upload-Offset": "0"}
+        )
+    assert response.status_code == 409, response.text
+
+    with patch.object(
+        photos_services,
+        "store_photo",
+        side_effect=HTTPException(status_code=502, detail="Cloudinary is down"),
+    ):
+        response = user_client.patch(
+            location, content=image, headers={"Upload-Offset": "0"}
+        )
+    assert response.status_code == 502, response.text
+
+    async def store_photo(file_object):
+        with pytest.raises(HTTPException) as error:
+            await resumable_uploads.append(upload_id, 1, len(image), _no_chunks())
+        assert error.value.status_code == 409
+        return "photo_url"
+
+    with patch.object(photos_services, "store_photo", side_effect=store_photo):
+        response = user_client.patch(
+            location, content=b"", headers={"Upload-Offset": str(len(image))}
+        )
+    assert response.status_code == 201, response.text
+    response = user_client.patch(
+        location, content=b"", headers={"Upload-Offset": str(len(image))}
+    )
+    assert response.status_code == 404, response.text
+    assert session.query(Photo).filter_by(description="completed once").count() == 1
+    assert list(staging_dir.iterdir()) == []
+
+
+def test_resumable_upload_not_an_image(user_client, staging_dir):
+    response = user_client.post(
+        "/api/photos/uploads",
+        params={"description": "text"},
+        headers={"Upload-Length": "100"},
+    )
+    location = response.headers["Location"]
+
+    response = user_client.patch(
+        location, content=b"not an image at all", headers={"Upload-Offset": "0"}
+    )
+    assert response.status_code == 415, response.text
+    assert list(staging_dir.iterdir()) == []
+
+
+def test_resumable_upload_purge_expired(user_client, staging_dir):
+    user_client.post(
+        "/api/photos/uploads",
+        params={"description": "abandoned"},
+        headers={"Upload-Length": "100"},
+    )
+    with patch.object(resumable_uploads, "ttl", -1):
+        user_client.post(
+            "/api/photos/uploads",
+            params={"description": "abandoned"},
+            headers={"Upload-Length": "100"},
+        )
+    assert resumable_uploads.purge_expired() == 1
+    assert len(list(staging_dir.iterdir())) == 2
+
+
+def test_upload_photo_with_renditions(user, session, user_client, mock_image):
+    add_user_to_db(user, session)
+    uploaded = []
+
+    def upload_to_cloudinary(file_object, public_id_prefix):
+        uploaded.append(Image.open(file_object))
+        return f"{public_id_prefix}/{len(uploaded)}"
+
+    with patch.object(
+        photos_services, "_upload_to_cloudinary", side_effect=upload_to_cloudinary
+    ):
+        response = user_client.post(
+            "/api/photos/",
+            files={"file": ("photo.png", mock_image.getvalue(), "image/png")},
+            data={"description": "renditions"},
+        )
+        assert response.status_code == 201, response.text
+        assert response.json()["renditions"] is None
+        assert len(uploaded) == 1
+        run_jobs(session, {response.json()["file_path"]: mock_image.getvalue()})
+    photo = user_client.get(f"/api/photos/{response.json()['id']}").json()
+    assert photo["qr_path"].startswith("PhotoShare/qr-codes/")
+    renditions = photo["renditions"]
+    assert set(renditions) == set(RENDITION_WIDTHS)
+    widths = {image.width for image in uploaded if image.format == RENDITION_FORMAT}
+    assert widths == {min(width, 500) for width in RENDITION_WIDTHS.values()}
+
+    with patch.object(cloudinary.uploader, "destroy") as destroy:
+        response = user_client.delete(f"/api/photos/{photo['id']}")
+    assert response.status_code == 200, response.text
+    destroyed = {call.args[0] for call in destroy.call_args_list}
+    assert {
+        f"PhotoShare/renditions/{url.rsplit('/', 1)[-1]}" for url in renditions.values()
+    } <= destroyed
+
+
+def test_create_renditions_failure_deletes_uploaded(mock_image):
+    results = ["PhotoShare/renditions/1"] + [
+        cloudinary.exceptions.Error("Upload failed")
+    ] * (len(RENDITION_WIDTHS) - 1)
+
+    with patch.object(
+        photos_services, "_upload_to_cloudinary", side_effect=results
+    ), patch.object(cloudinary.uploader, "destroy") as destroy:
+        with pytest.raises(cloudinary.exceptions.Error):
+            asyncio.run(photos_services.create_renditions(mock_image.getvalue()))
+    destroy.assert_called_once_with("PhotoShare/renditions/1", invalidate=True)
+
+
+def test_upload_photo_when_queue_is_down(
+    user, session, user_client, mock_image, job_queue
+):
+    add_user_to_db(user, session)
+
+    with patch.object(
+        photos_services, "_upload_to_cloudinary", return_value="photo_url"
+    ), patch.object(job_queue, "enqueue", side_effect=ConnectionError()):
+        response = user_client.post(
+            "/api/photos/",
+            files={"file": ("photo.png", mock_image.getvalue(), "image/png")},
+            data={"description": "queue down"},
+        )
+    assert response.status_code == 201, response.text
+
+    with patch.object(photos_services, "SessionLocal", return_value=session):
+        assert asyncio.run(photos_services.enqueue_unprocessed_photos()) == 2
+    with patch.object(photos_services, "_upload_to_cloudinary", return_value="qr_url"):
+        run_jobs(session, {"photo_url": mock_image.getvalue()})
+    photo = user_client.get(f"/api/photos/{response.json()['id']}").json()
+    assert photo["qr_path"] == "qr_url"
+    assert photo["width"] == 500
+
+
+def test_transform_photo_dedup(user, session, user_client):
+    add_user_to_db(user, session)
+    photo_id = create_x_photos(1, session)[0].id
+    params = {"width": 200, "effects": ["Sepia", "sepia", " pixelate "], "angle": 360}
+    equivalent = {"width": 200, "effects": ["sepia", "pixelate"], "angle": 0}
+
+    response = user_client.post(f"/api/photos/transformation/{photo_id}", json=params)
+    assert response.status_code == 200, response.text
+    transformation = response.json()
+    assert transformation["params"] == [
+        {"width": 200},
+        {"effect": "sepia"},
+        {"effect": "pixelate"},
+    ]
+
+    response = user_client.post(
+        f"/api/photos/transformation/{photo_id}", json=equivalent
+    )
+    assert response.status_code == 200, response.text
+    assert response.json() == transformation
+
+    user_client.post(f"/api/photos/transformation/{photo_id}", json={"width": 100})
+    response = user_client.get(
+        f"/api/photos/{photo_id}/transformations", params={"limit": 1}
+    )
+    assert response.status_code == 200, response.text
+    assert [item["params"] for item in response.json()] == [[{"width": 100}]]
+    response = user_client.get(
+        f"/api/photos/{photo_id}/transformations", params={"skip": 1}
+    )
+    assert [item["id"] for item in response.json()] == [transformation["id"]]
+
+
+def test_transformation_url_cached_by_hash():
+    params = [{"width": 321}]
+    param_hash = photos_services.transformation_hash(params)
+    with patch.object(
+        cloudinary.utils, "cloudinary_url", wraps=cloudinary.utils.cloudinary_url
+    ) as cloudinary_url:
+        urls = [
+            asyncio.run(
+                photos_services.transformation_url(
+                    "https://res.cloudinary.com/x/cached.jpg", params, param_hash
+                )
+            )
+            for _ in range(2)
+        ]
+    assert urls[0] == urls[1]
+    assert "w_321" in urls[0]
+    cloudinary_url.assert_called_once()
+
+
+def test_transform_photo_eager(user, session, user_client):
+    add_user_to_db(user, session)
+    photo_id = create_x_photos(1, session)[0].id
+
+    with patch.object(
+        photos_services, "SessionLocal", return_value=session
+    ), patch.object(cloudinary.uploader, "explicit") as explicit:
+        response = user_client.post(
+            f"/api/photos/transformation/{photo_id}",
+            params={"eager": True},
+            json={"width": 100},
+        )
+    assert response.status_code == 200, response.text
+    assert response.json()["status"] == "pending"
+    assert explicit.call_args.kwargs["eager"] == [[{"width": 100}]]
+    assert REGISTRY.get_sample_value(
+        "cloudinary_call_duration_seconds_count", {"operation": "explicit"}
+    )
+
+    response = user_client.get(
+        f"/api/photos/{photo_id}/transformations/{response.json()['id']}"
+    )
+    assert response.status_code == 200, response.text
+    assert response.json()["status"] == "ready"
+
+
+def test_transform_photo_with_preset(user, session, user_client):
+    add_user_to_db(user, session)
+    photo_id = create_x_photos(1, session)[0].id
+    session.add(
+        TransformationPreset(
+            name="thumb", params=[{"width": 100}], param_hash="thumb_hash"
+        )
+    )
+    session.commit()
+
+    response = user_client.post(
+        f"/api/photos/transformation/{photo_id}", params={"preset": "thumb"}
+    )
+    assert response.status_code == 200, response.text
+    assert response.json()["param_hash"] == "thumb_hash"
+
+    response = user_client.post(
+        f"/api/photos/transformation/{photo_id}", params={"preset": "unknown"}
+    )
+    assert response.status_code == 404, response.text
+    response = user_client.post(f"/api/photos/transformation/{photo_id}")
+    assert response.status_code == 400, response.text
+
+
+def test_upload_photo_precomputes_presets(user, session, user_client, mock_image):
+    add_user_to_db(user, session)
+    session.add(
+        TransformationPreset(
+            name="thumb", params=[{"width": 100}], param_hash="thumb_hash"
+        )
+    )
+    session.commit()
+
+    with patch.object(
+        photos_services, "store_photo", return_value="photo_url"
+    ), patch.object(
+        photos_services, "_upload_to_cloudinary", return_value="qr_url"
+    ), patch.object(
+        photos_services, "create_renditions", return_value={}
+    ), patch.object(
+        cloudinary.uploader, "explicit"
+    ) as explicit:
+        response = user_client.post(
+            "/api/photos/",
+            files={"file": ("photo.png", mock_image.getvalue(), "image/png")},
+            data={"description": "presets"},
+        )
+        assert response.status_code == 201, response.text
+        explicit.assert_not_called()
+        assert run_jobs(session, {"photo_url": mock_image.getvalue()}) == 3
+    assert explicit.call_args.kwargs["eager"] == [[{"width": 100}]]
+    response = user_client.get(f"/api/photos/{response.json()['id']}/transformations")
+    assert [(item["param_hash"], item["status"]) for item in response.json()] == [
+        ("thumb_hash", "ready")
+    ]
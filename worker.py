@@ -0,0 +1,17 @@
+import asyncio
+import logging
+
+from src.services import photos  # noqa: F401 (registers the job handlers)
+from src.services.jobs import run_worker
+
+
+async def main() -> None:
+    """Queues the processing of photos left unprocessed, then runs jobs forever."""
+    queued = await photos.enqueue_unprocessed_photos()
+    logging.info("Queued %d jobs of unprocessed photos", queued)
+    await run_worker()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(main())